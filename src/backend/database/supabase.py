@@ -1,14 +1,83 @@
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
+import logging
 import os
 import tempfile
 
+import httpx
 from dotenv import load_dotenv, find_dotenv
+from fastapi import Request
 
 load_dotenv(find_dotenv())
 
+logger = logging.getLogger(__name__)
+
 api_url: str = os.getenv("SUPABASE_URL")
 key: str = os.getenv("SUPABASE_KEY")
 
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))  # seconds
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))  # seconds, database queries
+SUPABASE_STORAGE_TIMEOUT = float(os.getenv("SUPABASE_STORAGE_TIMEOUT", "120"))  # seconds, model downloads
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))  # seconds
+
+
+def _pooled_session(session, timeout):
+    # Same base URL and auth headers as the session supabase-py built, with explicit pool limits
+    return session.__class__(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=httpx.Timeout(timeout, connect=SUPABASE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+        http2=True,
+    )
+
+
 def create_supabase_client():
-    supabase: Client = create_client(api_url, key)
-    return supabase
\ No newline at end of file
+    supabase: Client = create_client(api_url, key, options=ClientOptions(
+        postgrest_client_timeout=SUPABASE_TIMEOUT,
+        storage_client_timeout=SUPABASE_STORAGE_TIMEOUT,
+    ))
+
+    # Build the database and storage sessions now, so every request shares their connection pools
+    postgrest, storage = supabase.postgrest, supabase.storage
+    default_sessions = (postgrest.session, storage.session)
+    postgrest.session = _pooled_session(postgrest.session, SUPABASE_TIMEOUT)
+    storage.session = storage._client = _pooled_session(storage.session, SUPABASE_STORAGE_TIMEOUT)
+    for session in default_sessions:
+        session.close()
+    return supabase
+
+
+def close_supabase_client(supabase: Client):
+    for session in (supabase.postgrest.session, supabase.storage.session):
+        try:
+            session.close()
+        except Exception as e:
+            logger.warning(f"Error while closing Supabase connections: {str(e)}")
+
+
+def check_supabase(supabase: Client):
+    """Runs one cheap query and one storage call, returning the status of each."""
+    status = {}
+    try:
+        supabase.table("logs").select("id").limit(1).execute()
+        status["database"] = "ok"
+    except Exception as e:
+        status["database"] = f"error: {str(e)}"
+    try:
+        supabase.storage.list_buckets()
+        status["storage"] = "ok"
+    except Exception as e:
+        status["storage"] = f"error: {str(e)}"
+    return status
+
+
+def get_supabase_client(request: Request) -> Client:
+    # Created once in the app lifespan
+    return request.app.state.supabase
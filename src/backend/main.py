@@ -1,12 +1,86 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+_started = time.perf_counter()
+
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from routers import model
 from routers import logs
+from routers import admin
+from routers import predictions
+from routers import stream
+
+from database.supabase import create_supabase_client, close_supabase_client, check_supabase, get_supabase_client
+from services.registry import model_registry, run_refresh_loop, MODEL_REFRESH_INTERVAL
+from services.executor import shutdown_executor
+from services.inference import inference_pool
+from services.logs import log_sink
+from services.startup import startup_report, prewarm
+from services.predictions import PREDICTION_SCHEDULE_INTERVAL
+from services.scheduler import run_prediction_scheduler
+from services.intraday import STREAM_SOURCE
+from services.streaming import run_intraday_stream
+from services.timing import begin_request, end_request, mark_worker_exit, metrics_payload, server_timing
+
+logger = logging.getLogger(__name__)
+
+startup_report.started = _started
+startup_report.record("imports", time.perf_counter() - _started)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One client for the whole process, so requests reuse its pooled keep-alive connections
+    with startup_report.stage("supabase client"):
+        supabase = create_supabase_client()
+    app.state.supabase = supabase
+    log_sink.start(supabase)
+
+    # Models and pipelines warm up in the background; /ready turns green when done
+    prewarm_task = asyncio.create_task(prewarm(supabase))
+
+    refresh_task = None
+    if MODEL_REFRESH_INTERVAL > 0:
+        refresh_task = asyncio.create_task(run_refresh_loop(model_registry, supabase))
 
-app = FastAPI()
+    # Daily predictions are computed ahead of requests and archived
+    scheduler_task = None
+    if PREDICTION_SCHEDULE_INTERVAL > 0:
+        scheduler_task = asyncio.create_task(run_prediction_scheduler(supabase))
+
+    # Intraday bars are pushed to /stream subscribers as they arrive
+    stream_task = None
+    if STREAM_SOURCE != "none":
+        stream_task = asyncio.create_task(run_intraday_stream(supabase))
+
+    yield
+
+    prewarm_task.cancel()
+    if stream_task is not None:
+        stream_task.cancel()
+    if scheduler_task is not None:
+        scheduler_task.cancel()
+    if refresh_task is not None:
+        refresh_task.cancel()
+    shutdown_executor()
+    inference_pool.shutdown()
+    # Drain queued log rows before the process exits
+    await asyncio.to_thread(log_sink.stop)
+    close_supabase_client(supabase)
+    mark_worker_exit()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(model.router)
 app.include_router(logs.router)
+app.include_router(admin.router)
+app.include_router(predictions.router)
+app.include_router(stream.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,7 +89,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compresses larger responses for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.middleware("http")
+async def record_stage_timings(request: Request, call_next):
+    timings, token = begin_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        timings["total"] = time.perf_counter() - started
+        # Route template rather than raw path, so query strings and ids don't split the stats
+        route = request.scope.get("route")
+        end_request(getattr(route, "path", "unmatched"), request.method, status, timings, token)
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
 
 @app.get("/")
 def read_root():
-    return {"message": "farcry backend working..."}
\ No newline at end of file
+    return {"message": "farcry backend working..."}
+
+@app.get("/ready")
+def ready():
+    # Readiness probe: 503 until models are loaded and the pipelines have run once
+    return JSONResponse(status_code=200 if startup_report.ready else 503, content=startup_report.describe())
+
+@app.get("/metrics")
+def metrics():
+    return Response(content=metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/health")
+def health(supabase=Depends(get_supabase_client)):
+    checks = check_supabase(supabase)
+    healthy = all(value == "ok" for value in checks.values())
+    return JSONResponse(status_code=200 if healthy else 503, content={"status": "ok" if healthy else "degraded", **checks})
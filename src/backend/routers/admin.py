@@ -0,0 +1,59 @@
+import hmac
+import os
+
+from fastapi import APIRouter, HTTPException, Depends, Header, status
+from services.registry import model_registry
+from services.cache import prediction_cache
+from services.inference import inference_pool
+from services.logs import log_sink
+from services.predictions import prediction_store
+from services.scheduler import run_scheduled_predictions
+from services.streaming import stream_hub
+
+from supabase import Client
+from database.supabase import get_supabase_client
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # required; the admin endpoints refuse every request while it is unset
+
+def require_admin(x_admin_token: str = Header(default=None)):
+    # Fails closed: without a configured token nobody is an admin
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+@router.get("/models/", dependencies=[Depends(require_admin)])
+async def list_models():
+    return model_registry.describe()
+
+@router.post("/models/refresh/", dependencies=[Depends(require_admin)])
+def refresh_models(force: bool = False, supabase: Client = Depends(get_supabase_client)):
+    changed = model_registry.refresh(supabase, force=force)
+    return {"changed": changed, "models": model_registry.describe()}
+
+@router.get("/cache/", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    return prediction_cache.stats()
+
+@router.get("/inference/", dependencies=[Depends(require_admin)])
+async def inference_workers():
+    return inference_pool.describe()
+
+@router.get("/logs/", dependencies=[Depends(require_admin)])
+async def log_sink_stats():
+    return log_sink.stats()
+
+@router.get("/predictions/", dependencies=[Depends(require_admin)])
+async def scheduled_predictions():
+    return prediction_store.describe()
+
+@router.post("/predictions/run/", dependencies=[Depends(require_admin)])
+async def run_predictions(supabase: Client = Depends(get_supabase_client)):
+    rows = await run_scheduled_predictions(supabase)
+    return {"archived": len(rows), **prediction_store.describe()}
+
+@router.get("/stream/", dependencies=[Depends(require_admin)])
+async def stream_stats():
+    return stream_hub.describe()
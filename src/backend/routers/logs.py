@@ -1,15 +1,57 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from services.logs import get_logs
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from services.logs import get_logs, stream_logs, summarize_logs
 
 from supabase import Client
-from database.supabase import create_supabase_client
+from database.supabase import get_supabase_client
 
 router = APIRouter(tags=["logs"])
 
-def get_supabase_client() -> Client:
-    return create_supabase_client()
+def log_filters(
+    start: datetime = Query(None, description="Inclusive lower bound on datetime"),
+    end: datetime = Query(None, description="Exclusive upper bound on datetime"),
+    system: str = None,
+    action: str = None,
+    code: int = None
+):
+    return {"start": start, "end": end, "system": system, "action": action, "code": code}
+
+LOG_PAGE_SIZE = 100
 
+# Plain def routes: FastAPI runs the blocking Supabase queries in its threadpool instead of on the event loop
 @router.get("/logs/")
-async def return_logs(supabase: Client = Depends(get_supabase_client)):
-    logs_result = get_logs(supabase=supabase)
-    return logs_result
\ No newline at end of file
+def return_logs(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: str = None,
+    filters: dict = Depends(log_filters),
+    supabase: Client = Depends(get_supabase_client)
+):
+    try:
+        logs_result = get_logs(supabase=supabase, limit=limit or LOG_PAGE_SIZE, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if logs_result is None or limit is not None or cursor is not None:
+        return logs_result
+    # Callers that don't paginate keep the bare list; the next page's cursor rides along in a header
+    if logs_result["next_cursor"]:
+        response.headers["X-Next-Cursor"] = logs_result["next_cursor"]
+    return logs_result["items"]
+
+@router.get("/logs/export")
+def export_logs(filters: dict = Depends(log_filters), supabase: Client = Depends(get_supabase_client)):
+    return StreamingResponse(stream_logs(supabase, **filters), media_type="application/x-ndjson")
+
+@router.get("/logs/summary")
+def logs_summary(
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    filters: dict = Depends(log_filters),
+    supabase: Client = Depends(get_supabase_client)
+):
+    if filters["start"] is None:
+        filters["start"] = datetime.now() - timedelta(days=7)
+    return summarize_logs(supabase, bucket=bucket, **filters)
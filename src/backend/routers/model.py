@@ -1,23 +1,62 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
 from services.model import regression_prediction
 from services.model import time_series_prediction
+from services.model import multi_asset_prediction
+from services.encoding import series_response
+from services.forecasting import FORECAST_STEPS, MAX_FORECAST_STEPS, parse_interval_levels, slice_forecast
+from services.backtest import backtest_regression, MAX_BACKTEST_YEARS
 
 from supabase import Client
-from database.supabase import create_supabase_client
+from database.supabase import get_supabase_client
 
 router = APIRouter(tags=["model"])
 
-def get_supabase_client() -> Client:
-    return create_supabase_client()
-
 @router.get("/predictRegression/")
 async def predict_regression(supabase: Client = Depends(get_supabase_client)):
 
-    prediction_result = regression_prediction(supabase=supabase)
+    prediction_result = await regression_prediction(supabase=supabase)
     return prediction_result
 
 @router.get("/predictTimeSeries/")
-async def predict_time_series(supabase: Client = Depends(get_supabase_client)):
+async def predict_time_series(
+    format: str = Query("json", pattern="^(json|columnar|arrow)$",
+                        description="json: {date: value} maps; columnar: start epoch day plus value arrays; arrow: Arrow IPC stream"),
+    horizon: int = Query(FORECAST_STEPS, ge=1, le=MAX_FORECAST_STEPS, description="Forecast days, e.g. 7, 30, 90 or 180"),
+    intervals: str = Query("", description="Comma-separated prediction interval levels: 80, 95"),
+    if_none_match: str = Header(default=None),
+    supabase: Client = Depends(get_supabase_client)
+):
+    try:
+        levels = parse_interval_levels(intervals)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    prediction_result = await time_series_prediction(supabase=supabase)
+    # Every horizon and interval is a slice of the same cached longest-horizon forecast
+    sliced = {symbol: slice_forecast(result, horizon, levels) for symbol, result in prediction_result.items()}
+    return series_response(sliced, format, if_none_match)
+
+@router.get("/predict/")
+async def predict(
+    assets: str = Query("BTC,ETH", description="Comma-separated symbols or tickers"),
+    family: str = Query("regression", pattern="^(regression|time_series)$"),
+    horizon: int = Query(FORECAST_STEPS, ge=1, le=MAX_FORECAST_STEPS, description="Forecast days (time_series only)"),
+    intervals: str = Query("", description="Comma-separated prediction interval levels: 80, 95 (time_series only)"),
+    supabase: Client = Depends(get_supabase_client)
+):
+    try:
+        levels = parse_interval_levels(intervals)
+        return await multi_asset_prediction(supabase, assets.split(","), family, horizon, levels)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    prediction_result = time_series_prediction(supabase=supabase)
-    return prediction_result
\ No newline at end of file
+@router.get("/backtest/")
+async def backtest(
+    assets: str = Query("BTC,ETH", description="Comma-separated symbols or tickers"),
+    years: int = Query(3, ge=1, le=MAX_BACKTEST_YEARS),
+    supabase: Client = Depends(get_supabase_client)
+):
+    try:
+        return await backtest_regression(supabase, assets.split(","), years)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
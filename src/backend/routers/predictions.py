@@ -0,0 +1,22 @@
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from services.predictions import get_archived_predictions
+
+from supabase import Client
+from database.supabase import get_supabase_client
+
+router = APIRouter(tags=["predictions"])
+
+@router.get("/predictions/")
+def archived_predictions(
+    asset: str = None,
+    family: str = Query(None, pattern="^(regression|time_series)$"),
+    start: date = Query(None, description="Inclusive lower bound on the input bar date"),
+    end: date = Query(None, description="Exclusive upper bound on the input bar date"),
+    limit: int = Query(1000, ge=1, le=5000),
+    supabase: Client = Depends(get_supabase_client)
+):
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    return get_archived_predictions(supabase, asset=asset, family=family, start=start, end=end, limit=limit)
@@ -0,0 +1,49 @@
+import asyncio
+import os
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from services.assets import resolve_assets
+from services.streaming import stream_hub
+
+router = APIRouter(tags=["stream"])
+
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))  # seconds between keep-alive comments
+
+async def server_sent_events(subscription):
+    while True:
+        try:
+            event = await asyncio.wait_for(subscription.get(), timeout=STREAM_HEARTBEAT)
+        except asyncio.TimeoutError:
+            # Keeps proxies from closing an idle connection
+            yield b": keep-alive\n\n"
+            continue
+        yield b"id: %d\nevent: bar\ndata: %s\n\n" % (event["seq"], orjson.dumps(event))
+
+@router.get("/stream/")
+async def stream(assets: str = Query("BTC,ETH", description="Comma-separated symbols or tickers")):
+    try:
+        resolved, errors = resolve_assets(assets.split(","))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if errors or not resolved:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors or "No assets requested")
+
+    try:
+        subscription = stream_hub.subscribe([asset.symbol for asset in resolved])
+    except OverflowError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    async def events():
+        # Runs until the client disconnects and the response cancels this generator
+        try:
+            async for chunk in server_sent_events(subscription):
+                yield chunk
+        finally:
+            stream_hub.unsubscribe(subscription)
+
+    # identity encoding: GZipMiddleware would otherwise buffer events until enough compressed output piles up
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "Content-Encoding": "identity",
+                                      "X-Accel-Buffering": "no"})
@@ -0,0 +1,263 @@
+"""
+Offline load test for the backend endpoints.
+
+Runs the real FastAPI app under uvicorn in this process, with market data read
+from fixture CSVs and a fake Supabase whose storage serves model artifacts from
+a local directory. Each endpoint is driven by a number of concurrent clients;
+the report has latency percentiles, throughput and the per-stage breakdown
+recorded by services.timing, and is written as JSON so runs can be compared.
+
+    cd src/backend
+    python -m scripts.benchmark --clients 8 --requests 400
+    python -m scripts.benchmark --baseline benchmark_results/previous.json
+    python -m scripts.benchmark --cold --processes 4
+
+Without --artifacts, synthetic models are trained on the fixture data. With
+--artifacts DIR, DIR/<bucket>/<path> must hold the real artifacts named by the
+asset registry (or by --assets-config).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from scripts.fakes import FakeSupabase, write_fixture_data, write_synthetic_models
+
+DEFAULT_ENDPOINTS = ["/predictRegression/", "/predictTimeSeries/", "/predictTimeSeries/?format=columnar", "/logs/"]
+DEFAULT_TICKERS = ["BTC-USD", "ETH-USD"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help=f"Path to benchmark, repeatable (default: {', '.join(DEFAULT_ENDPOINTS)})")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint before measuring")
+    parser.add_argument("--cold", action="store_true", help="Clear the prediction cache before every request")
+    parser.add_argument("--processes", type=int,
+                        help="Inference worker processes (INFERENCE_PROCESSES); compare runs to measure core scaling")
+    parser.add_argument("--fixtures", help="Directory of <ticker>.csv files (generated when omitted)")
+    parser.add_argument("--artifacts", help="Directory of <bucket>/<path> model artifacts (synthetic models when omitted)")
+    parser.add_argument("--assets-config", help="ASSETS_CONFIG file to use with --artifacts")
+    parser.add_argument("--output", help="Result file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative p99 increase over the baseline before exiting with status 1")
+    return parser.parse_args()
+
+
+def prepare_environment(args, workdir):
+    """Points the backend at local data; must run before the backend modules are imported."""
+    if getattr(args, "processes", None) is not None:
+        os.environ["INFERENCE_PROCESSES"] = str(args.processes)
+    fixtures = args.fixtures or os.path.join(workdir, "fixtures")
+    if not args.fixtures:
+        write_fixture_data(fixtures, DEFAULT_TICKERS)
+
+    os.environ.update({
+        "MARKET_DATA_SOURCE": "fixture",
+        "MARKET_DATA_FIXTURE_DIR": fixtures,
+        "MARKET_DATA_DIR": os.path.join(workdir, "market_data"),
+        "MODEL_CACHE_DIR": os.path.join(workdir, "models"),
+        "LOG_SPILL_PATH": os.path.join(workdir, "logs_spill.jsonl"),
+        "MODEL_REFRESH_INTERVAL": "0",
+    })
+    # Measure the on-demand pipelines unless asked to benchmark scheduled results
+    os.environ.setdefault("PREDICTION_SCHEDULE_INTERVAL", "0")
+    os.environ.setdefault("STREAM_SOURCE", "none")
+
+    artifacts = args.artifacts
+    if artifacts is None:
+        artifacts = os.path.join(workdir, "artifacts")
+        config = os.path.join(workdir, "assets.json")
+        tickers = [name for name in os.listdir(fixtures) if name.endswith(".csv")]
+        write_synthetic_models(artifacts, fixtures, [name[:-len(".csv")] for name in sorted(tickers)], config)
+        os.environ["ASSETS_CONFIG"] = config
+    elif args.assets_config:
+        os.environ["ASSETS_CONFIG"] = args.assets_config
+    return artifacts
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+async def drive(client, path, clients, total, before_request=None):
+    """Sends total requests to path from `clients` concurrent workers; returns (latencies, status counts, seconds)."""
+    latencies, statuses = [], {}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            if before_request is not None:
+                before_request()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(clients)])
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def wait_until_ready(client, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return response.json()
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Backend did not become ready")
+
+
+async def run_benchmark(args, base_url):
+    import httpx
+
+    from services.cache import prediction_cache
+    from services.timing import stage_recorder
+
+    endpoints = args.endpoints or DEFAULT_ENDPOINTS
+    before_request = prediction_cache.clear if args.cold else None
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        startup = await wait_until_ready(client)
+        for path in endpoints:
+            await drive(client, path, min(args.clients, args.warmup or 1), args.warmup, before_request)
+            stage_recorder.reset()
+            latencies, statuses, elapsed = await drive(client, path, args.clients, args.requests, before_request)
+
+            stages = {}
+            for samples in stage_recorder.snapshot().values():
+                for name, values in samples.items():
+                    stages.setdefault(name, []).extend(values)
+            results[path] = {
+                "latency": percentiles(latencies),
+                "throughput_rps": len(latencies) / elapsed if elapsed else None,
+                "statuses": statuses,
+                "stages": {name: percentiles(values) for name, values in sorted(stages.items())},
+            }
+            summary = results[path]["latency"]
+            print(f"{path}: p50 {summary['p50_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms, "
+                  f"{results[path]['throughput_rps']:.1f} req/s, statuses {statuses}")
+    return startup, results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """Prints p99 changes against a baseline and returns the endpoints that regressed beyond the limit."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["endpoints"]
+    regressed = []
+    for path, result in results.items():
+        before = baseline.get(path, {}).get("latency", {}).get("p99_ms")
+        after = result["latency"].get("p99_ms")
+        if before is None or after is None:
+            continue
+        change = (after - before) / before
+        print(f"{path}: p99 {before:.1f} -> {after:.1f} ms ({change:+.0%})")
+        if change > max_regression:
+            regressed.append(path)
+    return regressed
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="farcry_benchmark_")
+    artifacts = prepare_environment(args, workdir)
+
+    import main as backend
+
+    fake = FakeSupabase(artifacts)
+    backend.create_supabase_client = lambda: fake
+    backend.close_supabase_client = lambda supabase: None
+
+    port = free_port()
+    server, thread = start_server(backend.app, port)
+    try:
+        startup, results = asyncio.run(run_benchmark(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "clients": args.clients,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "cold": args.cold,
+            "inference_processes": int(os.environ.get("INFERENCE_PROCESSES", "0")),
+            "synthetic_models": args.artifacts is None,
+        },
+        "startup": startup,
+        "endpoints": results,
+    }
+    output = args.output or os.path.join("benchmark_results", f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        regressed = compare(results, args.baseline, args.max_regression)
+        if regressed:
+            print(f"p99 regressed by more than {args.max_regression:.0%} on: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Exports a trained regression pipeline as a compact linear inference artifact.
+
+The pipeline is loaded with its full stack (pycaret by default), scored on the
+asset's recent market data and written as an Arrow file that the backend loads
+with kind "linear" (services/linear.py). Export fails, writing nothing, when
+the artifact's predictions differ from model.predict.
+
+    cd src/backend
+    python -m scripts.export_linear --asset BTC
+    python -m scripts.export_linear --asset ETH --model ./eth_br_model.pkl --output eth_linear.arrow
+    python -m scripts.export_linear --asset BTC --upload
+
+Then point the asset's regression model at the new file in ASSETS_CONFIG:
+    "regression": {"bucket": "regression_models", "path": "BTC/btc_br_model.arrow", "kind": "linear"}
+"""
+import argparse
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from services.assets import ASSETS
+from services.features import model_feature_columns
+from services.linear import export_linear
+from services.market_data import market_store
+from services.model import preprocess_for_prediction
+from services.registry import _load_artifact, model_registry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--asset", required=True, help="Symbol from the asset registry")
+    parser.add_argument("--model", help="Local pipeline file (downloaded from Supabase storage when omitted)")
+    parser.add_argument("--kind", default="pycaret", help="Kind of the local pipeline file")
+    parser.add_argument("--days", type=int, default=365, help="Days of market data used for the parity check")
+    parser.add_argument("--output", help="Artifact path (default: next to the model path, with .arrow)")
+    parser.add_argument("--upload", action="store_true", help="Upload the artifact to the model's bucket")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    asset = ASSETS.get(args.asset.upper())
+    if asset is None or asset.regression is None:
+        raise SystemExit(f"No regression model registered for {args.asset}")
+    spec = asset.regression
+    target_path = os.path.splitext(spec.path)[0] + ".arrow"
+
+    supabase = None
+    if args.model:
+        with open(args.model, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+        model = _load_artifact(args.kind, args.model)
+    else:
+        from database.supabase import create_supabase_client
+        supabase = create_supabase_client()
+        entry = model_registry.get(supabase, spec.bucket, spec.path)
+        model, version = entry.model, entry.version
+
+    columns = list(spec.features) if spec.features else model_feature_columns(model)
+    if columns is None:
+        raise SystemExit("The pipeline does not record its input columns (feature_names_in_)")
+
+    end = datetime.now()
+    history = market_store.get_window(asset.ticker, (end - timedelta(days=args.days)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+    history['Adj Close'] = history['Close']
+    X = preprocess_for_prediction(history, columns, asset.ticker)[columns]
+
+    output = args.output or os.path.basename(target_path)
+    difference = export_linear(model, X, output, source_version=version)
+    print(f"Wrote {output}: {len(columns)} features, parity checked on {len(X)} rows (max difference {difference:.3g})")
+
+    if args.upload:
+        if supabase is None:
+            from database.supabase import create_supabase_client
+            supabase = create_supabase_client()
+        with open(output, "rb") as f:
+            supabase.storage.from_(spec.bucket).upload(
+                target_path, f.read(), {"content-type": "application/vnd.apache.arrow.file", "upsert": "true"})
+        print(f"Uploaded to {spec.bucket}/{target_path}")
+
+
+if __name__ == "__main__":
+    main()
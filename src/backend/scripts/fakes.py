@@ -0,0 +1,288 @@
+"""
+Local stand-ins for the external services, used by the benchmark and other
+offline scripts: a fake Supabase client whose storage serves artifact files
+from a directory and whose tables live in memory, plus generators for
+synthetic market data and models.
+"""
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """The subset of the postgrest query builder the backend uses."""
+
+    def __init__(self, table):
+        self._table = table
+        self._columns = None
+        self._filters = []
+        self._order = None
+        self._limit = None
+        self._insert = None
+        self._conflict = None
+
+    def select(self, columns="*"):
+        if columns.strip() != "*":
+            self._columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self._insert = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict="id", ignore_duplicates=False):
+        self._insert = rows if isinstance(rows, list) else [rows]
+        self._conflict = ([c.strip() for c in on_conflict.split(",")], ignore_duplicates)
+        return self
+
+    def _filter(self, column, test):
+        self._filters.append(lambda row: row.get(column) is not None and test(row[column]))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: str(v) == str(value))
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v <= value)
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def execute(self):
+        if self._insert is not None:
+            return FakeResponse(self._table.insert(self._insert, self._conflict))
+        rows = [row for row in self._table.rows() if all(test(row) for test in self._filters)]
+        if self._order is not None:
+            column, desc = self._order
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns is not None:
+            rows = [{c: row.get(c) for c in self._columns} for row in rows]
+        return FakeResponse(rows)
+
+
+class FakeFunctionCall:
+    """In-memory logs_summary: the GROUP BY the database function performs."""
+
+    def __init__(self, table, params):
+        self._table = table
+        self._params = params
+
+    def execute(self):
+        p = self._params
+        counts = {}
+        for row in self._table.rows():
+            moment = str(row["datetime"])
+            if (p["start_at"] and moment < p["start_at"]) or (p["end_at"] and moment >= p["end_at"]):
+                continue
+            if any(p[f"{column}_filter"] is not None and str(row.get(column)) != str(p[f"{column}_filter"])
+                   for column in ("system", "action", "code")):
+                continue
+            bucket = moment[:10] + " 00:00:00" if p["bucket_size"] == "day" else moment[:13] + ":00:00"
+            total, errors = counts.get((bucket, row["action"]), (0, 0))
+            counts[(bucket, row["action"])] = (total + 1, errors + (1 if int(row["code"] or 0) >= 500 else 0))
+        return FakeResponse([{"bucket": bucket, "action": action, "count": total, "errors": errors}
+                             for (bucket, action), (total, errors) in sorted(counts.items())])
+
+
+class FakeTable:
+    def __init__(self):
+        self._rows = []
+        self._lock = threading.Lock()
+
+    def insert(self, rows, conflict=None):
+        with self._lock:
+            inserted = []
+            for row in rows:
+                if conflict is not None:
+                    columns, ignore_duplicates = conflict
+                    match = next((i for i, existing in enumerate(self._rows)
+                                  if all(existing.get(c) == row.get(c) for c in columns)), None)
+                    if match is not None:
+                        if not ignore_duplicates:
+                            self._rows[match] = dict(row, id=self._rows[match]["id"])
+                        continue
+                row = dict(row, id=len(self._rows) + 1)
+                self._rows.append(row)
+                inserted.append(row)
+            return inserted
+
+    def rows(self):
+        with self._lock:
+            return list(self._rows)
+
+
+class FakeBucket:
+    def __init__(self, directory):
+        self._directory = directory
+
+    def download(self, path):
+        with open(os.path.join(self._directory, path), "rb") as f:
+            return f.read()
+
+    def list(self, folder=""):
+        directory = os.path.join(self._directory, folder)
+        if not os.path.isdir(directory):
+            return []
+        items = []
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), "rb") as f:
+                etag = hashlib.md5(f.read()).hexdigest()
+            items.append({"name": name, "metadata": {"eTag": etag}})
+        return items
+
+
+class FakeStorage:
+    """Serves <root>/<bucket>/<path> as the object <path> of <bucket>."""
+
+    def __init__(self, root):
+        self._root = root
+
+    def from_(self, bucket):
+        return FakeBucket(os.path.join(self._root, bucket))
+
+    def list_buckets(self):
+        return sorted(os.listdir(self._root)) if os.path.isdir(self._root) else []
+
+
+class FakeSupabase:
+    def __init__(self, artifacts_dir):
+        self.storage = FakeStorage(artifacts_dir)
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        with self._lock:
+            table = self.tables.setdefault(name, FakeTable())
+        return FakeQuery(table)
+
+    def rpc(self, function, params):
+        """Stands in for the database functions the backend calls (see the README)."""
+        if function != "logs_summary":
+            raise ValueError(f"Unknown function {function}")
+        return FakeFunctionCall(self.table("logs")._table, params)
+
+
+def write_fixture_data(directory, tickers, days=1100, seed=7):
+    """Writes a random-walk daily OHLCV <ticker>.csv per ticker, ending yesterday."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize() - pd.Timedelta(days=1)
+    index = pd.date_range(end=end, periods=days, freq="D", name="Date")
+    for number, ticker in enumerate(tickers):
+        start = 1000.0 * (number + 1)
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        open_ = np.concatenate([[start], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.01, days)) * close
+        frame = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.uniform(1e8, 5e8, days),
+        }, index=index)
+        frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+
+
+
+def write_intraday_fixture(directory, fixtures_dir, tickers, days=2, interval="1h", seed=11):
+    """
+    Writes intraday <ticker>.csv files for ReplaySource: random-walk bars for
+    the last `days` days, starting from the last daily close in fixtures_dir.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(interval[:-1] + "min" if interval.endswith("m") else interval)
+    end = pd.Timestamp.now().normalize()
+    index = pd.date_range(start=end - pd.Timedelta(days=days), end=end, freq=step, inclusive="left", name="Date")
+    for ticker in tickers:
+        daily = pd.read_csv(os.path.join(fixtures_dir, f"{ticker}.csv"), index_col=0)
+        start = float(daily["Close"].iloc[-1])
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.004, len(index))))
+        open_ = np.concatenate([[start], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.002, len(index))) * close
+        frame = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.uniform(4e6, 2e7, len(index)),
+        }, index=index)
+        frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+
+
+SYNTHETIC_FEATURES = ["volatility_bbm", "trend_macd", "trend_ema_fast", "momentum_rsi", "volume_obv"]
+
+
+def write_synthetic_models(artifacts_dir, fixtures_dir, tickers, config_path):
+    """
+    Fits a small sklearn linear regression and a SARIMAX model per ticker on
+    the fixture data, stores them under <artifacts_dir>/<bucket>/<path> and
+    writes the matching ASSETS_CONFIG file.
+    """
+    from sklearn.linear_model import LinearRegression
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    from services.features import compute_indicators
+    from services.market_data import FixtureSource
+
+    source = FixtureSource(fixtures_dir)
+    config = []
+    for ticker in tickers:
+        symbol = ticker.split("-")[0].upper()
+        history = source.fetch(ticker, pd.Timestamp("1970-01-01"), pd.Timestamp.now())
+        history["Adj Close"] = history["Close"]
+
+        # Same frame the serving path builds: OHLCV, Adj Close, then the indicators the model reads
+        features = compute_indicators(history, SYNTHETIC_FEATURES).dropna()
+        target = features["Close"].shift(-1).dropna()
+        regression = LinearRegression().fit(features.iloc[:-1], target)
+        regression_path = f"{symbol}/{symbol.lower()}_linear_model.pkl"
+        os.makedirs(os.path.join(artifacts_dir, "regression_models", symbol), exist_ok=True)
+        with open(os.path.join(artifacts_dir, "regression_models", regression_path), "wb") as f:
+            pickle.dump(regression, f)
+
+        # Trained up to 60 days ago, so the live state has bars to catch up on
+        train = np.log(history["Close"].iloc[:-60].asfreq("D"))
+        sarima = SARIMAX(train, order=(1, 1, 1)).fit(disp=False)
+        sarima_path = f"{symbol}/{symbol.lower()}_sarima_model.pkl.gz"
+        os.makedirs(os.path.join(artifacts_dir, "time_series_models", symbol), exist_ok=True)
+        with gzip.open(os.path.join(artifacts_dir, "time_series_models", sarima_path), "wb") as f:
+            sarima.save(f)
+
+        config.append({
+            "symbol": symbol,
+            "ticker": ticker,
+            "regression": {"bucket": "regression_models", "path": regression_path, "kind": "pickle"},
+            "time_series": {"bucket": "time_series_models", "path": sarima_path, "kind": "sarimax"},
+        })
+
+    with open(config_path, "w") as f:
+        json.dump(config, f, indent=2)
+    return config
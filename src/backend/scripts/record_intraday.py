@@ -0,0 +1,36 @@
+"""
+Records recent intraday bars from Yahoo Finance for offline replay.
+
+Writes one <ticker>.csv per asset, which the backend streams with
+STREAM_SOURCE=replay and STREAM_REPLAY_DIR pointing at the directory.
+
+    cd src/backend
+    python -m scripts.record_intraday --output fixtures/intraday
+    python -m scripts.record_intraday --ticker BTC-USD --period 7d --interval 15m
+"""
+import argparse
+
+from services.assets import ASSETS
+from services.intraday import STREAM_INTERVAL, STREAM_REPLAY_DIR, record_intraday
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticker", action="append", dest="tickers",
+                        help="Ticker to record, repeatable (default: every registered asset)")
+    parser.add_argument("--period", default="5d", help="How far back to record, as a yfinance period")
+    parser.add_argument("--interval", default=STREAM_INTERVAL, help="Bar interval, as a yfinance interval")
+    parser.add_argument("--output", default=STREAM_REPLAY_DIR, help="Directory for the CSV files")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    tickers = args.tickers or [asset.ticker for asset in ASSETS.values()]
+    written = record_intraday(tickers, args.output, period=args.period, interval=args.interval)
+    for ticker, count in written.items():
+        print(f"{ticker}: {count} {args.interval} bar(s)")
+
+
+if __name__ == "__main__":
+    main()
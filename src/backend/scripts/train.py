@@ -0,0 +1,301 @@
+"""
+Retrains the regression and time series models of many assets in parallel and
+writes the artifacts the backend serves, plus a manifest describing them.
+
+Market data for every asset is fetched up front in one batched store read.
+Each (asset, model family) pair is then trained in its own worker process.
+Every training row is built from the same PREDICTION_WINDOW_DAYS window the
+serving path reads, so the models see exactly the feature values they will be
+scored on. Feature matrices are cached on disk under --cache-dir, keyed by
+ticker, data range, feature set and window, so a rerun on the same data skips
+the indicators.
+
+    cd src/backend
+    python -m scripts.train --output trained_models
+    python -m scripts.train --asset BTC --asset ETH --asset SOL-USD --jobs 4
+    python -m scripts.train --regression-kind pickle --time-series-kind sarimax --upload
+
+Artifacts are written to <output>/<bucket>/<SYMBOL>/<run>/..., one directory
+per run, so a new run never overwrites files a running backend may still be
+loading. <output>/manifest.json lists each model's bucket, path, kind, version
+(the artifact hash the registry reports) and exact feature list. Assets and
+families not retrained in the run keep their entries from the current asset
+registry (ASSETS_CONFIG), so the manifest is always a complete ASSETS_CONFIG,
+and the backend scores each regression model on exactly those columns:
+    ASSETS_CONFIG=trained_models/manifest.json
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from services.assets import ASSETS
+from services.backtest import serving_features
+from services.features import INDICATOR_COLUMNS
+from services.market_data import OHLCV_COLUMNS, market_store
+from services.model import PREDICTION_WINDOW_DAYS
+
+BUCKETS = {"regression": "regression_models", "time_series": "time_series_models"}
+ARTIFACT_NAMES = {
+    "pycaret": "br_model.pkl",
+    "pickle": "br_model.pkl",
+    "sarimax": "sarima_model.pkl.gz",
+    "prophet": "prophet_model.pkl",
+}
+# Orders from the SARIMA notebooks; other assets use the default
+SARIMA_ORDERS = {
+    "BTC": ((1, 1, 2), (1, 1, 1, 12)),
+    "ETH": ((1, 1, 1), (1, 1, 1, 30)),
+}
+DEFAULT_SARIMA_ORDER = ((1, 1, 1), (1, 1, 1, 12))
+EXCLUDED_FEATURES = ['others_dr', 'others_dlr', 'others_cr']  # dropped by preprocess_for_prediction too
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--asset", action="append", dest="assets",
+                        help="Symbol from the asset registry or a ticker such as SOL-USD, repeatable (default: all registered)")
+    parser.add_argument("--family", action="append", dest="families", choices=sorted(BUCKETS),
+                        help="Model family to train, repeatable (default: both)")
+    parser.add_argument("--regression-kind", choices=["pycaret", "pickle"], default="pycaret",
+                        help="pycaret Bayesian ridge (as in the notebooks) or a plain sklearn pipeline")
+    parser.add_argument("--time-series-kind", choices=["sarimax", "prophet"],
+                        help="Time series model (default: each asset's registered kind, sarimax for new assets)")
+    parser.add_argument("--features", help="Comma-separated indicator columns (default: every ta indicator)")
+    parser.add_argument("--regression-start", default="2014-01-01", help="First day of regression training data")
+    parser.add_argument("--time-series-start", default="2022-01-01", help="First day of time series training data")
+    parser.add_argument("--end", help="Last day of training data (default: yesterday, the last complete bar)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Training processes")
+    parser.add_argument("--cache-dir", default="/tmp/farcry_features", help="Feature matrix cache")
+    parser.add_argument("--output", default="trained_models", help="Artifact and manifest directory")
+    parser.add_argument("--upload", action="store_true", help="Upload the artifacts to Supabase storage")
+    return parser.parse_args()
+
+
+def resolve_training_assets(names):
+    """Registered assets by symbol or ticker; unknown names are taken as new tickers."""
+    if not names:
+        return [(asset.symbol, asset.ticker, asset) for asset in ASSETS.values()]
+    by_ticker = {asset.ticker.upper(): asset for asset in ASSETS.values()}
+    resolved = []
+    for name in names:
+        asset = ASSETS.get(name.upper()) or by_ticker.get(name.upper())
+        if asset is not None:
+            resolved.append((asset.symbol, asset.ticker, asset))
+        else:
+            resolved.append((name.split("-")[0].upper(), name, None))
+    return resolved
+
+
+def feature_set_key(indicators):
+    return hashlib.sha256(",".join(indicators).encode()).hexdigest()[:10]
+
+
+def feature_matrix(ticker, history, indicators, cache_dir):
+    """
+    OHLCV, Adj Close and the requested indicators for every bar of history, each
+    row computed from only its serving window (services.backtest.serving_features).
+    Cached as an Arrow file named after the ticker, the data range and row count
+    (a backfill changes the key), the feature set and the window length.
+    """
+    key = (f"{ticker}_{history.index[0]:%Y%m%d}_{history.index[-1]:%Y%m%d}_{len(history)}"
+           f"_{feature_set_key(indicators)}_w{PREDICTION_WINDOW_DAYS}")
+    path = os.path.join(cache_dir, f"{key}.arrow")
+    if os.path.exists(path):
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return table.to_pandas().set_index("Date"), True
+
+    frame = history[OHLCV_COLUMNS].copy()
+    frame['Adj Close'] = frame['Close']
+    features = serving_features(frame, list(frame.columns) + list(indicators))
+    os.makedirs(cache_dir, exist_ok=True)
+    table = pa.Table.from_pandas(features.rename_axis("Date").reset_index(), preserve_index=False)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(temporary, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temporary, path)
+    return features, False
+
+
+def file_version(path):
+    """The version the registry will report for the artifact: a hash of its bytes."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def artifact_location(output, family, symbol, run, kind):
+    path = f"{symbol}/{run}/{symbol.lower()}_{ARTIFACT_NAMES[kind]}"
+    local_path = os.path.join(output, BUCKETS[family], path)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    return path, local_path
+
+
+def train_regression(symbol, ticker, history, kind, indicators, cache_dir, output, run):
+    started = time.perf_counter()
+    features, cached = feature_matrix(ticker, history, indicators, cache_dir)
+    data = features.drop(columns=EXCLUDED_FEATURES, errors='ignore').dropna()
+    data['next'] = data['Close'].shift(-1)
+    data = data.dropna()  # the last bar has no next close yet
+    columns = [column for column in data.columns if column != 'next']
+
+    path, local_path = artifact_location(output, "regression", symbol, run, kind)
+    if kind == "pycaret":
+        from pycaret.regression import create_model, finalize_model, predict_model, save_model, setup
+        setup(data=data, target='next', session_id=123, verbose=False, html=False, n_jobs=1)
+        model = finalize_model(create_model('br', verbose=False))
+        save_model(model, local_path[:-len(".pkl")], verbose=False)  # PyCaret appends .pkl itself
+        fitted = predict_model(model, data=data[columns], verbose=False)['prediction_label'].to_numpy()
+    else:
+        from sklearn.impute import SimpleImputer
+        from sklearn.linear_model import BayesianRidge
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+        model = Pipeline([("impute", SimpleImputer()), ("scale", StandardScaler()), ("model", BayesianRidge())])
+        model.fit(data[columns], data['next'])
+        with open(local_path, "wb") as f:
+            pickle.dump(model, f)
+        fitted = model.predict(data[columns])
+
+    return {
+        "bucket": BUCKETS["regression"], "path": path, "kind": kind,
+        "version": file_version(local_path), "features": columns,
+        "training": {
+            "start": f"{data.index[0]:%Y-%m-%d}", "end": f"{data.index[-1]:%Y-%m-%d}", "rows": len(data),
+            "feature_set": feature_set_key(indicators), "feature_cache_hit": cached,
+            "in_sample_mae": round(float(np.mean(np.abs(fitted - data['next'].to_numpy()))), 4),
+            "seconds": round(time.perf_counter() - started, 2),
+        },
+    }
+
+
+def train_time_series(symbol, ticker, history, kind, output, run):
+    started = time.perf_counter()
+    close = history['Close'].asfreq('D')  # daily frequency, so forecasts are dated from the index
+    path, local_path = artifact_location(output, "time_series", symbol, run, kind)
+    if kind == "sarimax":
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        order, seasonal_order = SARIMA_ORDERS.get(symbol, DEFAULT_SARIMA_ORDER)
+        # Fitted on log closes; the serving path maps forecasts back through exp
+        results = SARIMAX(np.log(close), order=order, seasonal_order=seasonal_order).fit(disp=False)
+        with gzip.open(local_path, "wb") as f:
+            results.save(f)
+        training = {"order": list(order), "seasonal_order": list(seasonal_order), "aic": round(float(results.aic), 2)}
+    else:
+        from prophet import Prophet
+        model = Prophet()
+        model.fit(pd.DataFrame({'ds': close.index, 'y': close.to_numpy()}).dropna())
+        with open(local_path, "wb") as f:
+            pickle.dump(model, f)
+        training = {}
+
+    training.update({"start": f"{close.index[0]:%Y-%m-%d}", "end": f"{close.index[-1]:%Y-%m-%d}", "rows": int(close.count()),
+                     "seconds": round(time.perf_counter() - started, 2)})
+    return {"bucket": BUCKETS["time_series"], "path": path, "kind": kind, "version": file_version(local_path),
+            "training": training}
+
+
+def manifest_assets(trained, specs):
+    """
+    The current asset registry with this run's models swapped in, followed by
+    newly trained assets. Models this run did not train (or failed to) keep their
+    registered spec, so the backend can serve every asset from the manifest.
+    """
+    entries = {
+        asset.symbol: {"symbol": asset.symbol, "ticker": asset.ticker,
+                       **{family: spec.to_config() if spec is not None else None
+                          for family, spec in (("regression", asset.regression), ("time_series", asset.time_series))}}
+        for asset in ASSETS.values()
+    }
+    for symbol, ticker, _ in trained:
+        if not any((symbol, family) in specs for family in BUCKETS):
+            continue
+        entry = entries.setdefault(symbol, {"symbol": symbol, "ticker": ticker, **{family: None for family in BUCKETS}})
+        entry.update({family: specs[(symbol, family)] for family in BUCKETS if (symbol, family) in specs})
+    return list(entries.values())
+
+
+def upload(supabase, output, spec):
+    with open(os.path.join(output, spec["bucket"], spec["path"]), "rb") as f:
+        supabase.storage.from_(spec["bucket"]).upload(
+            spec["path"], f.read(), {"content-type": "application/octet-stream", "upsert": "true"})
+    print(f"Uploaded {spec['bucket']}/{spec['path']}")
+
+
+def main():
+    args = parse_args()
+    families = args.families or sorted(BUCKETS)
+    assets = resolve_training_assets(args.assets)
+    indicators = [c for c in (args.features.split(",") if args.features else INDICATOR_COLUMNS) if c not in EXCLUDED_FEATURES]
+    unknown = sorted(set(indicators) - set(INDICATOR_COLUMNS))
+    if unknown:
+        raise SystemExit(f"Unknown indicator columns: {', '.join(unknown)}")
+    end = args.end or (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    run = datetime.now().strftime('%Y%m%d%H%M%S')
+
+    # One batched read for every ticker; the workers only train
+    tickers = [ticker for _, ticker, _ in assets]
+    starts = {"regression": args.regression_start, "time_series": args.time_series_start}
+    # The store's end bound is exclusive; the day after includes the --end bar itself
+    until = (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    histories = market_store.get_windows(tickers, min(starts[family] for family in families), until)
+
+    tasks = {}
+    for symbol, ticker, asset in assets:
+        history = histories.get(ticker)
+        if history is None or history.empty:
+            print(f"{symbol}: no market data for {ticker}, skipped")
+            continue
+        for family in families:
+            window = history.loc[starts[family]:]
+            if family == "regression":
+                tasks[(symbol, family)] = (train_regression, symbol, ticker, window, args.regression_kind,
+                                           indicators, args.cache_dir, args.output, run)
+            else:
+                registered = asset.time_series.kind if asset is not None and asset.time_series is not None else "sarimax"
+                tasks[(symbol, family)] = (train_time_series, symbol, ticker, window,
+                                           args.time_series_kind or registered, args.output, run)
+
+    # spawn: pycaret and statsmodels keep module-level state that must not be shared between trainings
+    specs, failures = {}, {}
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs), mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(*task): key for key, task in tasks.items()}
+        for future in as_completed(futures):
+            symbol, family = futures[future]
+            try:
+                specs[(symbol, family)] = spec = future.result()
+                print(f"{symbol} {family}: {spec['kind']} {spec['version']} in {spec['training']['seconds']}s")
+            except Exception as e:
+                failures[(symbol, family)] = e
+                print(f"{symbol} {family}: failed: {e}")
+
+    manifest = {"created_at": datetime.now().isoformat(timespec="seconds"), "run": run, "end": end,
+                "assets": manifest_assets(assets, specs)}
+    manifest_path = os.path.join(args.output, "manifest.json")
+    os.makedirs(args.output, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {manifest_path}: {len(specs)} new model(s), {len(manifest['assets'])} asset(s) in total")
+
+    if args.upload:
+        from database.supabase import create_supabase_client
+        supabase = create_supabase_client()
+        for spec in specs.values():
+            upload(supabase, args.output, spec)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
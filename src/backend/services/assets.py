@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON file overriding the built-in asset list (see load_assets)
+ASSETS_CONFIG = os.getenv("ASSETS_CONFIG")
+MAX_ASSETS_PER_REQUEST = int(os.getenv("MAX_ASSETS_PER_REQUEST", "50"))
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    bucket: str
+    path: str
+    kind: str  # "pycaret", "linear", "sarimax", "prophet" or "pickle"
+    version: str = None  # artifact hash recorded by the training manifest
+    features: tuple = None  # input columns the model was trained on, in order (training manifest)
+    trained_until: str = None  # last day of training data, YYYY-MM-DD (training manifest)
+
+    @classmethod
+    def from_config(cls, entry):
+        """Builds a spec from an ASSETS_CONFIG or manifest entry; extra keys (training details) are ignored."""
+        if not entry:
+            return None
+        features = entry.get("features")
+        return cls(bucket=entry["bucket"], path=entry["path"], kind=entry["kind"], version=entry.get("version"),
+                   features=tuple(features) if features else None,
+                   trained_until=(entry.get("training") or {}).get("end"))
+
+    def to_config(self):
+        """The ASSETS_CONFIG entry from_config reads back into this spec."""
+        entry = {"bucket": self.bucket, "path": self.path, "kind": self.kind}
+        if self.version:
+            entry["version"] = self.version
+        if self.features:
+            entry["features"] = list(self.features)
+        if self.trained_until:
+            entry["training"] = {"end": self.trained_until}
+        return entry
+
+
+@dataclass(frozen=True)
+class Asset:
+    symbol: str
+    ticker: str
+    regression: ModelSpec = None
+    time_series: ModelSpec = None
+
+    def model_specs(self):
+        return [spec for spec in (self.regression, self.time_series) if spec is not None]
+
+
+DEFAULT_ASSETS = [
+    Asset(
+        symbol="BTC",
+        ticker="BTC-USD",
+        regression=ModelSpec("regression_models", "BTC/btc_br_model.pkl", "pycaret"),
+        time_series=ModelSpec("time_series_models", "BTC/btc_sarima_model.pkl.gz", "sarimax"),
+    ),
+    Asset(
+        symbol="ETH",
+        ticker="ETH-USD",
+        regression=ModelSpec("regression_models", "ETH/eth_br_model.pkl", "pycaret"),
+        time_series=ModelSpec("time_series_models", "ETH/eth_prophet_model.pkl", "prophet"),
+    ),
+]
+
+
+def load_assets(path=ASSETS_CONFIG):
+    """
+    Loads the asset registry. The config file is a JSON list such as
+    [{"symbol": "SOL", "ticker": "SOL-USD",
+      "regression": {"bucket": "regression_models", "path": "SOL/sol_br_model.pkl", "kind": "pycaret"},
+      "time_series": {"bucket": "time_series_models", "path": "SOL/sol_prophet_model.pkl", "kind": "prophet"}}]
+    or a training manifest written by scripts/train.py, {"assets": [...]}, whose
+    model entries also carry their version and feature list.
+    """
+    if not path:
+        return {asset.symbol: asset for asset in DEFAULT_ASSETS}
+
+    with open(path) as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries["assets"]
+    assets = {}
+    for entry in entries:
+        asset = Asset(
+            symbol=entry["symbol"].upper(),
+            ticker=entry["ticker"],
+            regression=ModelSpec.from_config(entry.get("regression")),
+            time_series=ModelSpec.from_config(entry.get("time_series")),
+        )
+        assets[asset.symbol] = asset
+    logger.info(f"Loaded {len(assets)} assets from {path}.")
+    return assets
+
+
+ASSETS = load_assets()
+
+
+def resolve_assets(names):
+    """Maps requested symbols or tickers to assets. Returns (assets, errors) so unknown names don't fail the batch."""
+    by_ticker = {asset.ticker.upper(): asset for asset in ASSETS.values()}
+    assets, errors = [], {}
+    for name in names:
+        key = name.strip().upper()
+        if not key:
+            continue
+        asset = ASSETS.get(key) or by_ticker.get(key)
+        if asset is None:
+            errors[key] = "Unknown asset"
+        elif asset not in assets:
+            assets.append(asset)
+    if len(assets) > MAX_ASSETS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_ASSETS_PER_REQUEST} assets per request")
+    return assets, errors
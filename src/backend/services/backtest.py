@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from services.assets import resolve_assets
+from services.cache import prediction_cache
+from services.executor import run_blocking
+from services.features import INDICATOR_COLUMNS, compute_indicators, entry_feature_columns
+from services.logs import insert_log
+from services.market_data import OHLCV_COLUMNS, market_store
+from services.model import PREDICTION_WINDOW_DAYS, resolve_models
+from services.timing import stage
+from services.window_features import windowed_indicators
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_TIMEOUT = float(os.getenv("BACKTEST_TIMEOUT", "30"))  # seconds
+MAX_BACKTEST_YEARS = 10
+
+
+def fetch_backtest_history(tickers, years):
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365 * years)).strftime('%Y-%m-%d')
+    windows = market_store.get_windows(tickers, start_date, end_date)
+    for data in windows.values():
+        if not data.empty:
+            data['Adj Close'] = data['Close']
+    return windows
+
+
+def serving_features(history, columns=None):
+    """
+    The feature row the live pipeline would have scored on each day of history.
+
+    fetch_recent_data reads the bars of the last PREDICTION_WINDOW_DAYS days with
+    an exclusive end, so the row for day t is built from the bars dated
+    t - (PREDICTION_WINDOW_DAYS - 2) days through t, and nothing earlier. One pass
+    over the whole history would give different values for cumulative and
+    long-warmup indicators (volume_obv, volume_nvi, trend_kst_sig, ...), so the
+    rows come from windowed_indicators, which rebuilds every window in one
+    vectorized pass. Histories with missing days fall back to one indicator pass
+    per day, since their windows hold fewer bars.
+    """
+    indicator_columns = None if columns is None else [c for c in INDICATOR_COLUMNS if c in set(columns)]
+    window = PREDICTION_WINDOW_DAYS - 1
+    if len(history) < window:
+        raise ValueError("Not enough history to backtest")
+
+    steps = history.index.to_series().diff().iloc[1:]
+    if (steps == pd.Timedelta(days=1)).all() and not history[OHLCV_COLUMNS].isna().any().any():
+        features = windowed_indicators(history, window, indicator_columns)
+    else:
+        span = timedelta(days=window - 1)
+        days = history.index[history.index >= history.index[0] + span]
+        rows = [compute_indicators(history.loc[day - span:day], indicator_columns).iloc[-1] for day in days]
+        if not rows:
+            raise ValueError("Not enough history to backtest")
+        features = pd.DataFrame(rows, index=days)
+    features = features.drop(['others_dr', 'others_dlr', 'others_cr'], axis=1, errors='ignore')
+    return features if columns is None else features[list(columns)]
+
+
+def backtest_asset(entry, history):
+    """
+    Walk-forward evaluation of a next-day regression model over a whole history.
+
+    Each day is scored on the features the live card would have used that day
+    (see serving_features), all in a single model.predict call. The prediction
+    made on day t is compared with the close of day t+1, and the BUY/DON'T BUY
+    call (prediction above the day-t close) with the actual move. Days up to the
+    model's recorded training end are in-sample; for models without one
+    (artifacts not trained by scripts/train.py) the overlap is unknown.
+    """
+    features = serving_features(history, entry_feature_columns(entry))
+    predictions = np.asarray(entry.model.predict(features.fillna(0)), dtype=float)
+
+    close = history['Close'].reindex(features.index).to_numpy(dtype=float)
+    next_close = np.roll(close, -1)
+    # The last prediction has no next close yet
+    predictions, close, next_close = predictions[:-1], close[:-1], next_close[:-1]
+    if len(predictions) == 0:
+        raise ValueError("Not enough history to backtest")
+
+    errors = predictions - next_close
+    buy = predictions > close
+    went_up = next_close > close
+    trained_until = entry.spec.trained_until
+    return {
+        "model_version": entry.version,
+        "start": features.index[0].strftime('%Y-%m-%d'),
+        "end": features.index[-2].strftime('%Y-%m-%d'),
+        "days": int(len(predictions)),
+        "feature_window_days": PREDICTION_WINDOW_DAYS,
+        "training_end": trained_until,
+        # Days the model saw while training; None when the artifact does not record its training range
+        "in_sample_days": int((features.index[:-1] <= pd.Timestamp(trained_until)).sum()) if trained_until else None,
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mape": float(np.mean(np.abs(errors / next_close)) * 100),
+        "recommendation_accuracy": float(np.mean(buy == went_up)),
+        "buy_signals": int(buy.sum()),
+        "buy_hit_rate": float(went_up[buy].mean()) if buy.any() else None,
+        "up_day_rate": float(went_up.mean()),
+    }
+
+
+async def backtest_regression(supabase, names, years):
+    assets, errors = resolve_assets(names)
+    with stage("market_data"):
+        windows = await run_blocking(fetch_backtest_history, [asset.ticker for asset in assets], years)
+    with stage("model_load"):
+        entries = await run_blocking(resolve_models, supabase, assets, "regression")
+
+    async def run(asset):
+        history, entry = windows.get(asset.ticker), entries[asset.symbol]
+        if isinstance(entry, Exception):
+            raise entry
+        if history is None or history.empty:
+            raise ValueError(f"No data fetched for {asset.symbol}")
+        key = (f"backtest_{years}y", asset.symbol, history.index[-1], entry.version)
+        return await prediction_cache.get_or_compute_async(key, lambda: backtest_asset(entry, history))
+
+    try:
+        outcomes = await asyncio.wait_for(
+            asyncio.gather(*[run(asset) for asset in assets], return_exceptions=True), timeout=BACKTEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Backtest timed out after {BACKTEST_TIMEOUT}s")
+        insert_log(supabase, system="model_service", action="backtest_regression", code=504)
+        raise HTTPException(status_code=504, detail="Backtest timed out")
+
+    results = {}
+    for asset, outcome in zip(assets, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error backtesting {asset.symbol}: {str(outcome)}")
+            errors[asset.symbol] = str(outcome)
+        else:
+            results[asset.symbol] = outcome
+
+    code = 200 if not errors else (500 if not results else 207)
+    insert_log(supabase, system="model_service", action="backtest_regression", code=code)
+    return {"results": results, "errors": errors}
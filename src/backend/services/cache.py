@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from services.executor import submit_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Caches prediction results keyed by (endpoint, asset, last bar date, model version).
+
+    A key stays valid until a newer bar (or model version) shows up for the same
+    endpoint and asset, at which point the older entries are dropped. Concurrent
+    misses for one key are coalesced: the first caller computes, the others wait
+    on the same future, so a burst of identical requests costs one pipeline run.
+    Failures are propagated to every waiter and never cached.
+    """
+
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _claim(self, key):
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.hits += 1
+                return future, False
+
+            self.misses += 1
+            future = Future()
+            # Running futures can't be cancelled, so a waiter timing out never cancels the shared result
+            future.set_running_or_notify_cancel()
+            # A newer bar or model version supersedes every older entry for this endpoint and asset
+            for other in [k for k in self._futures if k[:2] == key[:2] and k != key]:
+                if self._futures[other].done():
+                    del self._futures[other]
+            self._futures[key] = future
+            return future, True
+
+    def _release_failed(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def _complete(self, key, future, compute):
+        try:
+            future.set_result(compute())
+        except BaseException as e:
+            self._release_failed(key, future)
+            future.set_exception(e)
+
+    def get_or_compute(self, key, compute):
+        future, leader = self._claim(key)
+        if leader:
+            self._complete(key, future, compute)
+        return future.result()
+
+    async def get_or_compute_async(self, key, compute):
+        """Like get_or_compute, but the leader's computation runs in the prediction pool and nobody blocks the event loop."""
+        future, leader = self._claim(key)
+        if leader:
+            submit_blocking(self._complete, key, future, compute)
+        return await asyncio.wrap_future(future)
+
+    def _complete_many(self, keys, futures, compute_many):
+        try:
+            outcomes = compute_many(keys)
+        except BaseException as e:
+            outcomes = {key: e for key in keys}
+        for key in keys:
+            outcome = outcomes.get(key, KeyError(f"No result computed for {key}"))
+            if isinstance(outcome, BaseException):
+                self._release_failed(key, futures[key])
+                futures[key].set_exception(outcome)
+            else:
+                futures[key].set_result(outcome)
+
+    async def get_or_compute_many(self, keys, compute_many):
+        """
+        Batched variant: compute_many receives the keys this caller leads and returns
+        a dict of key -> result or exception, computed in one pool job. Returns the
+        same mapping for every requested key, so one failure doesn't fail the batch.
+        """
+        futures, owned = {}, []
+        for key in keys:
+            futures[key], leader = self._claim(key)
+            if leader:
+                owned.append(key)
+        if owned:
+            submit_blocking(self._complete_many, owned, {key: futures[key] for key in owned}, compute_many)
+
+        outcomes = {}
+        for key, future in futures.items():
+            try:
+                outcomes[key] = await asyncio.wrap_future(future)
+            except Exception as e:
+                outcomes[key] = e
+        return outcomes
+
+    def clear(self):
+        """Drops every completed entry (in-flight computations are kept for their waiters)."""
+        with self._lock:
+            for key in [k for k, f in self._futures.items() if f.done()]:
+                del self._futures[key]
+
+    def stats(self):
+        return {"entries": len(self._futures), "hits": self.hits, "misses": self.misses}
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+SERIES_FORMATS = ("json", "columnar", "arrow")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _daily(series):
+    """Reindexes a date-indexed series onto a gapless daily range (missing days become NaN)."""
+    index = pd.DatetimeIndex(series.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    index = index.normalize()
+    values = pd.Series(np.asarray(series, dtype=float), index=index)
+    values = values[~values.index.duplicated(keep="last")].sort_index()
+    return values.reindex(pd.date_range(values.index[0], values.index[-1], freq="D"))
+
+
+def columnar_series(series):
+    """Encodes a daily series as the epoch day of its first value plus one value per day."""
+    if len(series) == 0:
+        return {"start_day": None, "values": []}
+    daily = _daily(series)
+    return {"start_day": int((daily.index[0] - _EPOCH).days), "values": daily.to_numpy()}
+
+
+def legacy_series(result):
+    """The original {timestamp: value} shape, kept for existing clients."""
+    payload = {
+        "historical": result["historical"].to_dict(),
+        "forecast": result["forecast"].apply(float).to_dict(),
+        "model_version": result["model_version"],
+    }
+    if "intervals" in result:
+        payload["intervals"] = {
+            level: {side: band.apply(float).to_dict() for side, band in bands.items()}
+            for level, bands in result["intervals"].items()
+        }
+    return payload
+
+
+def _columnar_result(result):
+    payload = {
+        "historical": columnar_series(result["historical"]),
+        "forecast": columnar_series(result["forecast"]),
+        "model_version": result["model_version"],
+    }
+    if "intervals" in result:
+        payload["intervals"] = {
+            level: {side: columnar_series(band) for side, band in bands.items()}
+            for level, bands in result["intervals"].items()
+        }
+    return payload
+
+
+def series_etag(results, fmt):
+    # (symbol, last bar, model version) fully determines a cached forecast; horizon and intervals pick the slice
+    parts = [fmt] + [
+        f"{symbol}:{result['historical'].index[-1]}:{result['model_version']}"
+        f":{len(result['forecast'])}:{','.join(result.get('intervals', {}))}"
+        for symbol, result in sorted(results.items())
+    ]
+    # Weak: GZipMiddleware sends the same representation gzip-compressed or not, which are not byte-identical
+    return 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(etag, if_none_match):
+    """Weak comparison (RFC 9110): W/"x" and "x" match, and * matches any current representation."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+
+def _arrow_payload(results):
+    import pyarrow as pa
+
+    assets, kinds, days, values = [], [], [], []
+    for symbol, result in results.items():
+        series = {"historical": result["historical"], "forecast": result["forecast"]}
+        for level, bands in result.get("intervals", {}).items():
+            series[f"lower_{level}"], series[f"upper_{level}"] = bands["lower"], bands["upper"]
+        for kind, values_series in series.items():
+            if len(values_series) == 0:
+                continue
+            daily = _daily(values_series)
+            assets += [symbol] * len(daily)
+            kinds += [kind] * len(daily)
+            days.append(((daily.index - _EPOCH).days).to_numpy(dtype=np.int32))
+            values.append(daily.to_numpy())
+
+    table = pa.table({
+        "asset": pa.array(assets).dictionary_encode(),
+        "kind": pa.array(kinds).dictionary_encode(),
+        "date": pa.array(np.concatenate(days) if days else np.array([], dtype=np.int32), type=pa.int32()).cast(pa.date32()),
+        "value": pa.array(np.concatenate(values) if values else np.array([]), type=pa.float64()),
+    })
+    versions = {symbol: result["model_version"] for symbol, result in results.items()}
+    table = table.replace_schema_metadata({"model_versions": orjson.dumps(versions)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode_series(results, fmt, if_none_match):
+    etag = series_etag(results, fmt)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if fmt == "arrow":
+        return Response(content=_arrow_payload(results), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    if fmt == "columnar":
+        payload = {symbol: _columnar_result(result) for symbol, result in results.items()}
+        return Response(content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                        media_type="application/json", headers=headers)
+
+    payload = jsonable_encoder({symbol: legacy_series(result) for symbol, result in results.items()})
+    return Response(content=orjson.dumps(payload), media_type="application/json", headers=headers)
+
+
+def series_response(results, fmt="json", if_none_match=None):
+    """
+    Encodes {symbol: {"historical", "forecast", "model_version"[, "intervals"]}}
+    in the requested format, answering 304 when the client already holds the
+    same version.
+    """
+    with stage("encode"):
+        return _encode_series(results, fmt, if_none_match)
@@ -0,0 +1,30 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))  # 0 keeps inference on this thread pool
+# Pool threads also wait on inference processes, so by default there are enough to keep every process busy
+PREDICTION_WORKERS = int(os.getenv("PREDICTION_WORKERS", str(max(4, 2 * INFERENCE_PROCESSES))))
+PREDICTION_TIMEOUT = float(os.getenv("PREDICTION_TIMEOUT", "60"))  # seconds per request
+
+# Bounded pool for the blocking stages (market data, storage, pandas, model inference)
+_executor = ThreadPoolExecutor(max_workers=PREDICTION_WORKERS, thread_name_prefix="prediction")
+
+
+def submit_blocking(func, *args, **kwargs):
+    """Submits a blocking call to the prediction pool, carrying over the caller's context variables."""
+    context = contextvars.copy_context()
+    return _executor.submit(functools.partial(context.run, func, *args, **kwargs))
+
+
+async def run_blocking(func, *args, **kwargs):
+    return await asyncio.wrap_future(submit_blocking(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import zlib
+
+import numpy as np
+from ta import momentum, others, trend, volatility, volume
+
+logger = logging.getLogger(__name__)
+
+FEATURE_PARITY_CHECK = os.getenv("FEATURE_PARITY_CHECK", "false").lower() == "true"
+
+# Every indicator add_all_ta_features builds, with the exact parameters it uses.
+# Each entry is (factory(df, fillna) -> ta indicator, [(column, method), ...]),
+# so columns sharing one indicator object are computed together.
+INDICATORS = [
+    (lambda d, f: volume.AccDistIndexIndicator(high=d["High"], low=d["Low"], close=d["Close"], volume=d["Volume"], fillna=f),
+     [("volume_adi", "acc_dist_index")]),
+    (lambda d, f: volume.OnBalanceVolumeIndicator(close=d["Close"], volume=d["Volume"], fillna=f),
+     [("volume_obv", "on_balance_volume")]),
+    (lambda d, f: volume.ChaikinMoneyFlowIndicator(high=d["High"], low=d["Low"], close=d["Close"], volume=d["Volume"], fillna=f),
+     [("volume_cmf", "chaikin_money_flow")]),
+    (lambda d, f: volume.ForceIndexIndicator(close=d["Close"], volume=d["Volume"], window=13, fillna=f),
+     [("volume_fi", "force_index")]),
+    (lambda d, f: volume.EaseOfMovementIndicator(high=d["High"], low=d["Low"], volume=d["Volume"], window=14, fillna=f),
+     [("volume_em", "ease_of_movement"), ("volume_sma_em", "sma_ease_of_movement")]),
+    (lambda d, f: volume.VolumePriceTrendIndicator(close=d["Close"], volume=d["Volume"], fillna=f),
+     [("volume_vpt", "volume_price_trend")]),
+    (lambda d, f: volume.VolumeWeightedAveragePrice(high=d["High"], low=d["Low"], close=d["Close"], volume=d["Volume"], window=14, fillna=f),
+     [("volume_vwap", "volume_weighted_average_price")]),
+    (lambda d, f: volume.MFIIndicator(high=d["High"], low=d["Low"], close=d["Close"], volume=d["Volume"], window=14, fillna=f),
+     [("volume_mfi", "money_flow_index")]),
+    (lambda d, f: volume.NegativeVolumeIndexIndicator(close=d["Close"], volume=d["Volume"], fillna=f),
+     [("volume_nvi", "negative_volume_index")]),
+
+    (lambda d, f: volatility.BollingerBands(close=d["Close"], window=20, window_dev=2, fillna=f),
+     [("volatility_bbm", "bollinger_mavg"), ("volatility_bbh", "bollinger_hband"), ("volatility_bbl", "bollinger_lband"),
+      ("volatility_bbw", "bollinger_wband"), ("volatility_bbp", "bollinger_pband"),
+      ("volatility_bbhi", "bollinger_hband_indicator"), ("volatility_bbli", "bollinger_lband_indicator")]),
+    (lambda d, f: volatility.KeltnerChannel(close=d["Close"], high=d["High"], low=d["Low"], window=10, fillna=f),
+     [("volatility_kcc", "keltner_channel_mband"), ("volatility_kch", "keltner_channel_hband"),
+      ("volatility_kcl", "keltner_channel_lband"), ("volatility_kcw", "keltner_channel_wband"),
+      ("volatility_kcp", "keltner_channel_pband"), ("volatility_kchi", "keltner_channel_hband_indicator"),
+      ("volatility_kcli", "keltner_channel_lband_indicator")]),
+    (lambda d, f: volatility.DonchianChannel(high=d["High"], low=d["Low"], close=d["Close"], window=20, offset=0, fillna=f),
+     [("volatility_dcl", "donchian_channel_lband"), ("volatility_dch", "donchian_channel_hband"),
+      ("volatility_dcm", "donchian_channel_mband"), ("volatility_dcw", "donchian_channel_wband"),
+      ("volatility_dcp", "donchian_channel_pband")]),
+    (lambda d, f: volatility.AverageTrueRange(close=d["Close"], high=d["High"], low=d["Low"], window=10, fillna=f),
+     [("volatility_atr", "average_true_range")]),
+    (lambda d, f: volatility.UlcerIndex(close=d["Close"], window=14, fillna=f),
+     [("volatility_ui", "ulcer_index")]),
+
+    (lambda d, f: trend.MACD(close=d["Close"], window_slow=26, window_fast=12, window_sign=9, fillna=f),
+     [("trend_macd", "macd"), ("trend_macd_signal", "macd_signal"), ("trend_macd_diff", "macd_diff")]),
+    (lambda d, f: trend.SMAIndicator(close=d["Close"], window=12, fillna=f),
+     [("trend_sma_fast", "sma_indicator")]),
+    (lambda d, f: trend.SMAIndicator(close=d["Close"], window=26, fillna=f),
+     [("trend_sma_slow", "sma_indicator")]),
+    (lambda d, f: trend.EMAIndicator(close=d["Close"], window=12, fillna=f),
+     [("trend_ema_fast", "ema_indicator")]),
+    (lambda d, f: trend.EMAIndicator(close=d["Close"], window=26, fillna=f),
+     [("trend_ema_slow", "ema_indicator")]),
+    (lambda d, f: trend.VortexIndicator(high=d["High"], low=d["Low"], close=d["Close"], window=14, fillna=f),
+     [("trend_vortex_ind_pos", "vortex_indicator_pos"), ("trend_vortex_ind_neg", "vortex_indicator_neg"),
+      ("trend_vortex_ind_diff", "vortex_indicator_diff")]),
+    (lambda d, f: trend.TRIXIndicator(close=d["Close"], window=15, fillna=f),
+     [("trend_trix", "trix")]),
+    (lambda d, f: trend.MassIndex(high=d["High"], low=d["Low"], window_fast=9, window_slow=25, fillna=f),
+     [("trend_mass_index", "mass_index")]),
+    (lambda d, f: trend.DPOIndicator(close=d["Close"], window=20, fillna=f),
+     [("trend_dpo", "dpo")]),
+    (lambda d, f: trend.KSTIndicator(close=d["Close"], roc1=10, roc2=15, roc3=20, roc4=30, window1=10, window2=10,
+                                     window3=10, window4=15, nsig=9, fillna=f),
+     [("trend_kst", "kst"), ("trend_kst_sig", "kst_sig"), ("trend_kst_diff", "kst_diff")]),
+    (lambda d, f: trend.IchimokuIndicator(high=d["High"], low=d["Low"], window1=9, window2=26, window3=52, visual=False, fillna=f),
+     [("trend_ichimoku_conv", "ichimoku_conversion_line"), ("trend_ichimoku_base", "ichimoku_base_line"),
+      ("trend_ichimoku_a", "ichimoku_a"), ("trend_ichimoku_b", "ichimoku_b")]),
+    (lambda d, f: trend.STCIndicator(close=d["Close"], window_slow=50, window_fast=23, cycle=10, smooth1=3, smooth2=3, fillna=f),
+     [("trend_stc", "stc")]),
+    (lambda d, f: trend.ADXIndicator(high=d["High"], low=d["Low"], close=d["Close"], window=14, fillna=f),
+     [("trend_adx", "adx"), ("trend_adx_pos", "adx_pos"), ("trend_adx_neg", "adx_neg")]),
+    (lambda d, f: trend.CCIIndicator(high=d["High"], low=d["Low"], close=d["Close"], window=20, constant=0.015, fillna=f),
+     [("trend_cci", "cci")]),
+    (lambda d, f: trend.IchimokuIndicator(high=d["High"], low=d["Low"], window1=9, window2=26, window3=52, visual=True, fillna=f),
+     [("trend_visual_ichimoku_a", "ichimoku_a"), ("trend_visual_ichimoku_b", "ichimoku_b")]),
+    (lambda d, f: trend.AroonIndicator(high=d["High"], low=d["Low"], window=25, fillna=f),
+     [("trend_aroon_up", "aroon_up"), ("trend_aroon_down", "aroon_down"), ("trend_aroon_ind", "aroon_indicator")]),
+    (lambda d, f: trend.PSARIndicator(high=d["High"], low=d["Low"], close=d["Close"], step=0.02, max_step=0.20, fillna=f),
+     [("trend_psar_up", "psar_up"), ("trend_psar_down", "psar_down"),
+      ("trend_psar_up_indicator", "psar_up_indicator"), ("trend_psar_down_indicator", "psar_down_indicator")]),
+
+    (lambda d, f: momentum.RSIIndicator(close=d["Close"], window=14, fillna=f),
+     [("momentum_rsi", "rsi")]),
+    (lambda d, f: momentum.StochRSIIndicator(close=d["Close"], window=14, smooth1=3, smooth2=3, fillna=f),
+     [("momentum_stoch_rsi", "stochrsi"), ("momentum_stoch_rsi_k", "stochrsi_k"), ("momentum_stoch_rsi_d", "stochrsi_d")]),
+    (lambda d, f: momentum.TSIIndicator(close=d["Close"], window_slow=25, window_fast=13, fillna=f),
+     [("momentum_tsi", "tsi")]),
+    (lambda d, f: momentum.UltimateOscillator(high=d["High"], low=d["Low"], close=d["Close"], window1=7, window2=14, window3=28,
+                                              weight1=4.0, weight2=2.0, weight3=1.0, fillna=f),
+     [("momentum_uo", "ultimate_oscillator")]),
+    (lambda d, f: momentum.StochasticOscillator(high=d["High"], low=d["Low"], close=d["Close"], window=14, smooth_window=3, fillna=f),
+     [("momentum_stoch", "stoch"), ("momentum_stoch_signal", "stoch_signal")]),
+    (lambda d, f: momentum.WilliamsRIndicator(high=d["High"], low=d["Low"], close=d["Close"], lbp=14, fillna=f),
+     [("momentum_wr", "williams_r")]),
+    (lambda d, f: momentum.AwesomeOscillatorIndicator(high=d["High"], low=d["Low"], window1=5, window2=34, fillna=f),
+     [("momentum_ao", "awesome_oscillator")]),
+    (lambda d, f: momentum.ROCIndicator(close=d["Close"], window=12, fillna=f),
+     [("momentum_roc", "roc")]),
+    (lambda d, f: momentum.PercentagePriceOscillator(close=d["Close"], window_slow=26, window_fast=12, window_sign=9, fillna=f),
+     [("momentum_ppo", "ppo"), ("momentum_ppo_signal", "ppo_signal"), ("momentum_ppo_hist", "ppo_hist")]),
+    (lambda d, f: momentum.PercentageVolumeOscillator(volume=d["Volume"], window_slow=26, window_fast=12, window_sign=9, fillna=f),
+     [("momentum_pvo", "pvo"), ("momentum_pvo_signal", "pvo_signal"), ("momentum_pvo_hist", "pvo_hist")]),
+    (lambda d, f: momentum.KAMAIndicator(close=d["Close"], window=10, pow1=2, pow2=30, fillna=f),
+     [("momentum_kama", "kama")]),
+
+    (lambda d, f: others.DailyReturnIndicator(close=d["Close"], fillna=f),
+     [("others_dr", "daily_return")]),
+    (lambda d, f: others.DailyLogReturnIndicator(close=d["Close"], fillna=f),
+     [("others_dlr", "daily_log_return")]),
+    (lambda d, f: others.CumulativeReturnIndicator(close=d["Close"], fillna=f),
+     [("others_cr", "cumulative_return")]),
+]
+
+# Column order matches add_all_ta_features
+INDICATOR_COLUMNS = [column for _, outputs in INDICATORS for column, _ in outputs]
+
+
+def model_feature_columns(model):
+    """Returns the input columns a fitted pycaret/sklearn pipeline was trained on, or None if it doesn't say."""
+    for candidate in (model, getattr(model, "steps", [[None, None]])[0][1]):
+        for attribute in ("feature_names_in_", "_feature_names_in"):
+            columns = getattr(candidate, attribute, None)
+            if columns is not None:
+                return list(columns)
+    return None
+
+
+def entry_feature_columns(entry):
+    """
+    Input columns of a registry entry: the feature list recorded by its training
+    manifest when there is one, otherwise what the pipeline itself reports.
+    """
+    if entry.spec.features:
+        return list(entry.spec.features)
+    return model_feature_columns(entry.model)
+
+
+def model_inputs(processed, entry):
+    """Restricts a feature frame to exactly the columns a manifest-trained model was fit on, in training order."""
+    if entry.spec.features:
+        return processed[list(entry.spec.features)]
+    return processed
+
+
+def compute_indicators(df, columns=None, fillna=True):
+    """
+    Adds only the requested indicator columns (all of them when columns is None)
+    to a copy of an OHLCV frame, with the same parameters and column order as
+    ta.add_all_ta_features.
+    """
+    wanted = set(INDICATOR_COLUMNS if columns is None else columns)
+    out = df.copy()
+    for factory, outputs in INDICATORS:
+        needed = [(column, method) for column, method in outputs if column in wanted]
+        if not needed:
+            continue
+        indicator = factory(df, fillna)
+        for column, method in needed:
+            out[column] = getattr(indicator, method)()
+    return out
+
+
+def verify_parity(df, columns=None, rtol=1e-9, atol=1e-9):
+    """Compares compute_indicators with ta.add_all_ta_features on df; returns the mismatching columns."""
+    from ta import add_all_ta_features
+
+    reference = add_all_ta_features(df.copy(), open="Open", high="High", low="Low", close="Close", volume="Volume", fillna=True)
+    engine = compute_indicators(df, columns)
+    checked = [c for c in INDICATOR_COLUMNS if columns is None or c in columns]
+    return [c for c in checked
+            if not np.allclose(engine[c].to_numpy(float), reference[c].to_numpy(float), rtol=rtol, atol=atol, equal_nan=True)]
+
+
+class FeatureEngine:
+    """
+    Computes model-aware features and remembers the last result per ticker.
+
+    Only the indicator columns the model reads are built. Prediction windows have
+    a fixed length, so the work for a new daily bar is bounded by that window, not
+    by the length of the history; repeated requests for the same bar reuse the
+    stored frame.
+    """
+
+    def __init__(self):
+        self._state = {}
+        self._verified = set()
+        self._lock = threading.Lock()
+
+    def compute(self, df, columns=None, ticker=None):
+        indicator_columns = None if columns is None else [c for c in INDICATOR_COLUMNS if c in set(columns)]
+        # The values are part of the key, so a restated bar with unchanged dates is recomputed
+        values = zlib.crc32(np.ascontiguousarray(df.to_numpy(dtype='float64')).tobytes())
+        key = (df.index[0], df.index[-1], len(df), values, None if indicator_columns is None else tuple(indicator_columns))
+        if ticker is not None:
+            cached = self._state.get(ticker)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        features = compute_indicators(df, indicator_columns)
+
+        if FEATURE_PARITY_CHECK and ticker is not None and ticker not in self._verified:
+            mismatches = verify_parity(df, indicator_columns)
+            if mismatches:
+                logger.warning(f"Feature parity check failed for {ticker}: {mismatches}")
+            self._verified.add(ticker)
+
+        if ticker is not None:
+            with self._lock:
+                self._state[ticker] = (key, features)
+        return features
+
+
+feature_engine = FeatureEngine()
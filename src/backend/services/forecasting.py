@@ -0,0 +1,145 @@
+import copy
+import logging
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORECAST_HORIZONS = (7, 30, 90, 180)  # days
+FORECAST_STEPS = 90  # default horizon
+MAX_FORECAST_STEPS = max(FORECAST_HORIZONS)
+INTERVAL_LEVELS = (80, 95)  # central prediction intervals, in percent
+
+
+def band_columns(level):
+    return f"lower_{level}", f"upper_{level}"
+
+
+def parse_interval_levels(text):
+    """Parses a comma-separated list such as "80,95" into supported interval levels."""
+    levels = []
+    for part in (text or "").split(","):
+        part = part.strip().rstrip("%")
+        if not part:
+            continue
+        if not part.isdigit() or int(part) not in INTERVAL_LEVELS:
+            raise ValueError(f"Unsupported interval {part!r}; choose from {', '.join(map(str, INTERVAL_LEVELS))}")
+        if int(part) not in levels:
+            levels.append(int(part))
+    return sorted(levels)
+
+
+def slice_forecast(result, horizon=FORECAST_STEPS, levels=()):
+    """
+    Cuts a full-length cached result down to the first `horizon` days and the
+    requested interval levels. The cached frames are shared, so nothing is
+    modified in place.
+    """
+    sliced = {key: value for key, value in result.items() if key != "bands"}
+    sliced["forecast"] = result["forecast"].iloc[:horizon]
+    bands = result.get("bands")
+    if levels and bands is not None:
+        sliced["intervals"] = {}
+        for level in levels:
+            lower, upper = band_columns(level)
+            if lower not in bands:
+                continue  # the model produced no uncertainty estimate
+            sliced["intervals"][str(level)] = {"lower": bands[lower].iloc[:horizon], "upper": bands[upper].iloc[:horizon]}
+    return sliced
+
+
+class SarimaStateStore:
+    """
+    Keeps one live SARIMAX results object per asset and moves it forward in time.
+
+    The loaded artifact stops at its training date. Each call feeds only the
+    daily log closes observed since the last update through the state-space
+    extend path (a Kalman filter pass over the new points, no refit), so the
+    forecast origin follows the latest bar. A new model version from the
+    registry starts over from the artifact.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, symbol):
+        with self._guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    @staticmethod
+    def _last_observed(results):
+        index = getattr(results.model, "_index", None)
+        if isinstance(index, pd.DatetimeIndex) and len(index):
+            return index[-1]
+        return None
+
+    def advance(self, symbol, entry, close):
+        """Returns (results, last observed date) after applying the closes newer than the current state."""
+        with self._lock(symbol):
+            state = self._states.get(symbol)
+            if state is None or state["version"] != entry.version:
+                state = {"version": entry.version, "results": entry.model,
+                         "last_date": self._last_observed(entry.model)}
+                self._states[symbol] = state
+
+            if state["last_date"] is None:
+                logger.warning(f"SARIMAX model for {symbol} has no date index; forecasting from its training end.")
+                return state["results"], None
+
+            new = close[close.index > state["last_date"]]
+            if not new.empty:
+                # Missing days become NaN, which the Kalman filter skips
+                dates = pd.date_range(state["last_date"] + timedelta(days=1), new.index[-1], freq='D')
+                endog = np.log(new.reindex(dates).to_numpy())
+                state["results"] = state["results"].extend(endog)
+                state["last_date"] = dates[-1]
+                logger.info(f"Extended {symbol} SARIMAX state with {len(dates)} observation(s) up to {dates[-1]:%Y-%m-%d}.")
+            return state["results"], state["last_date"]
+
+
+sarima_states = SarimaStateStore()
+
+
+def sarima_forecast(entry, data, symbol):
+    results, last_date = sarima_states.advance(symbol, entry, data['Close'])
+    # One pass over the longest horizon; shorter horizons are prefixes of it
+    forecast_log = results.get_forecast(steps=MAX_FORECAST_STEPS)
+    columns = {'Forecast': np.exp(np.asarray(forecast_log.predicted_mean))}
+    for level in INTERVAL_LEVELS:
+        # The model is fitted on log closes, so the interval bounds map through exp as well
+        bounds = np.exp(np.asarray(forecast_log.conf_int(alpha=1 - level / 100)))
+        lower, upper = band_columns(level)
+        columns[lower], columns[upper] = bounds[:, 0], bounds[:, 1]
+
+    origin = last_date if last_date is not None else data.index[-1]
+    forecast_dates = pd.date_range(start=origin + timedelta(days=1), periods=MAX_FORECAST_STEPS, freq='D')
+    forecast_df = pd.DataFrame(columns, index=forecast_dates)
+    return forecast_df.fillna(0)
+
+
+def prophet_forecast(entry, data, symbol):
+    # Prophet has no incremental update; its forecast only depends on the dates asked for
+    future_dates = pd.DataFrame({'ds': pd.date_range(start=data.index[-1] + timedelta(days=1), periods=MAX_FORECAST_STEPS, freq='D')})
+    # Point forecast without Prophet's own sampling; a shallow copy keeps the shared model untouched
+    point_model = copy.copy(entry.model)
+    point_model.uncertainty_samples = 0
+    forecast = point_model.predict(future_dates).set_index('ds')
+    forecast_df = pd.DataFrame({'Forecast': forecast['yhat'].to_numpy()}, index=forecast.index)
+
+    # One set of posterior predictive samples gives the bands for every interval level
+    if entry.model.uncertainty_samples:
+        samples = entry.model.predictive_samples(future_dates)['yhat']
+        for level in INTERVAL_LEVELS:
+            lower, upper = band_columns(level)
+            tail = (100 - level) / 2
+            forecast_df[lower] = np.nanpercentile(samples, tail, axis=1)
+            forecast_df[upper] = np.nanpercentile(samples, 100 - tail, axis=1)
+    return forecast_df
+
+
+FORECASTERS = {"sarimax": sarima_forecast, "prophet": prophet_forecast}
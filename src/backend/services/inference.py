@@ -0,0 +1,226 @@
+import logging
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from prometheus_client import Counter
+
+from services.assets import ASSETS
+from services.executor import INFERENCE_PROCESSES
+from services.registry import LoadedModel, _asset_of, _load_artifact, model_registry
+from services.timing import collect_stages, record_stage, stage
+
+logger = logging.getLogger(__name__)
+
+WORKER_RESTARTS = Counter("farcry_inference_worker_restarts_total", "Inference worker processes replaced after a crash")
+
+
+def pack_frame(df):
+    """
+    Splits a float frame into (int64 index, column names, 2-D values) so it
+    crosses the process boundary as two contiguous buffers instead of a
+    pickled DataFrame with its block manager.
+    """
+    return df.index.asi8, list(df.columns), np.ascontiguousarray(df.to_numpy(dtype='float64'))
+
+
+def unpack_frame(packed, index_name='Date'):
+    index, columns, values = packed
+    return pd.DataFrame(values, index=pd.DatetimeIndex(index, name=index_name), columns=columns, copy=False)
+
+
+def model_ref(entry):
+    """What a worker needs to find (or load) the same model version the parent resolved."""
+    return entry.spec, entry.version, entry.local_path
+
+
+# Worker process state: the current model of each spec, as (local file, model) by (bucket, path);
+# loading a new version replaces the old one instead of piling up every version seen
+_worker_models = {}
+
+
+def _worker_entry(spec, version, local_path):
+    key = (spec.bucket, spec.path)
+    cached = _worker_models.get(key)
+    if cached is None or cached[0] != local_path:
+        with stage("model_deserialize", _asset_of(spec)):
+            model = _load_artifact(spec.kind, local_path)
+        _worker_models[key] = (local_path, model)
+    else:
+        model = cached[1]
+    return LoadedModel(spec=spec, version=version, model=model, local_path=local_path)
+
+
+def _init_worker(refs):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for ref in refs:
+        try:
+            _worker_entry(*ref)
+        except Exception as e:
+            logger.error(f"Inference worker could not preload {ref[0].path}: {str(e)}")
+    logger.info(f"Inference worker ready with {len(_worker_models)} model(s).")
+
+
+def _ping():
+    return len(_worker_models)
+
+
+def _predict_rows(jobs):
+    from services.model import predict_latest_rows
+
+    with collect_stages() as stages:
+        outcomes = predict_latest_rows({
+            key: (asset, unpack_frame(packed), _worker_entry(*ref)) for key, (asset, packed, ref) in jobs.items()
+        })
+    return outcomes, stages
+
+
+def _forecast(symbol, packed, ref):
+    from services.forecasting import FORECASTERS
+
+    with collect_stages() as stages:
+        entry = _worker_entry(*ref)
+        with stage("forecast", symbol):
+            forecast_df = FORECASTERS[entry.spec.kind](entry, unpack_frame(packed), symbol)
+    return pack_frame(forecast_df), stages
+
+
+class InferencePool:
+    """
+    Runs the CPU-bound stages (features, model.predict, forecasts) in worker
+    processes, so one backend process can use every core.
+
+    Assets are sharded over single-process pools by their position in the
+    registry, so the registered assets spread evenly over the workers and an
+    asset always lands on the same worker, which loads only its
+    shard's models (once, when it starts) and keeps per-asset state such as
+    the SARIMAX filter warm. A worker that dies is replaced with a fresh
+    process on the current model versions, and the call is retried once.
+    """
+
+    def __init__(self, processes=INFERENCE_PROCESSES):
+        self.processes = processes
+        self.restarts = 0
+        self._pools = [None] * processes
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+        self._positions = {symbol: position for position, symbol in enumerate(ASSETS)}
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def shard(self, symbol):
+        position = self._positions.get(symbol)
+        if position is None:  # not registered: a stable hash still pins it to one worker
+            position = zlib.crc32(symbol.encode())
+        return position % self.processes
+
+    def _shard_refs(self, shard):
+        refs = []
+        for asset in ASSETS.values():
+            if self.shard(asset.symbol) != shard:
+                continue
+            for spec in asset.model_specs():
+                entry = model_registry.peek(spec.bucket, spec.path)
+                if entry is not None:
+                    refs.append(model_ref(entry))
+        return refs
+
+    def _pool(self, shard):
+        with self._lock:
+            pool = self._pools[shard]
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=1, mp_context=self._context,
+                                           initializer=_init_worker, initargs=(self._shard_refs(shard),))
+                self._pools[shard] = pool
+            return pool
+
+    def _replace(self, shard, broken):
+        with self._lock:
+            if self._pools[shard] is broken:
+                self._pools[shard] = None
+                self.restarts += 1
+                WORKER_RESTARTS.inc()
+                logger.error(f"Inference worker {shard} died; starting a new one.")
+        broken.shutdown(wait=False)
+
+    def _submit(self, shard, fn, *args):
+        pool = self._pool(shard)
+        try:
+            return pool, pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._replace(shard, pool)
+            pool = self._pool(shard)
+            return pool, pool.submit(fn, *args)
+
+    def _result(self, shard, pool, future, fn, *args):
+        """Waits for a worker result, retrying once on a fresh worker if the process crashed."""
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._replace(shard, pool)
+            _, future = self._submit(shard, fn, *args)
+            return future.result()
+
+    def start(self):
+        """Starts every worker and waits until each has loaded its models. Blocking."""
+        futures = [(shard, *self._submit(shard, _ping)) for shard in range(self.processes)]
+        loaded = [self._result(shard, pool, future, _ping) for shard, pool, future in futures]
+        logger.info(f"Started {self.processes} inference worker(s) with {sum(loaded)} model(s).")
+
+    def predict_rows(self, jobs):
+        """Process-pool counterpart of services.model.predict_latest_rows; blocking."""
+        by_shard = {}
+        for key, (asset, df, entry) in jobs.items():
+            by_shard.setdefault(self.shard(asset.symbol), {})[key] = (asset, pack_frame(df), model_ref(entry))
+
+        # Every shard works on its part at the same time
+        pending = [(shard, part, *self._submit(shard, _predict_rows, part)) for shard, part in by_shard.items()]
+        outcomes = {}
+        for shard, part, pool, future in pending:
+            try:
+                shard_outcomes, stages = self._result(shard, pool, future, _predict_rows, part)
+            except Exception as e:
+                outcomes.update({key: e for key in part})
+                continue
+            outcomes.update(shard_outcomes)
+            for name, asset, seconds in stages:
+                record_stage(name, seconds, asset)
+        return outcomes
+
+    def forecast(self, symbol, entry, data):
+        """Runs the asset's forecaster on its worker and returns the forecast frame; blocking."""
+        shard = self.shard(symbol)
+        packed = pack_frame(data[['Open', 'High', 'Low', 'Close', 'Volume']])
+        args = (symbol, packed, model_ref(entry))
+        pool, future = self._submit(shard, _forecast, *args)
+        forecast, stages = self._result(shard, pool, future, _forecast, *args)
+        for name, asset, seconds in stages:
+            record_stage(name, seconds, asset)
+        return unpack_frame(forecast, index_name=None)
+
+    def describe(self):
+        return {
+            "processes": self.processes,
+            "restarts": self.restarts,
+            "workers": [
+                {"shard": shard, "assets": [a.symbol for a in ASSETS.values() if self.shard(a.symbol) == shard],
+                 "pids": list(getattr(pool, "_processes", None) or {}) if pool is not None else []}
+                for shard, pool in enumerate(self._pools)
+            ],
+        }
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = self._pools, [None] * self.processes
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+inference_pool = InferencePool()
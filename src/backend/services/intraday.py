@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from services.market_data import normalize_ohlcv
+
+logger = logging.getLogger(__name__)
+
+STREAM_SOURCE = os.getenv("STREAM_SOURCE", "none")  # "yfinance", "replay" or "none" (streaming off)
+STREAM_INTERVAL = os.getenv("STREAM_INTERVAL", "1h")  # yfinance interval: "15m", "30m", "1h", ...
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "60"))
+STREAM_REPLAY_DIR = os.getenv("STREAM_REPLAY_DIR", "fixtures/intraday")
+STREAM_REPLAY_DELAY = float(os.getenv("STREAM_REPLAY_DELAY", "0.05"))  # seconds between replayed bars
+
+
+def interval_length(interval):
+    """Bar length of a yfinance interval string ("1h", "30m", "1d")."""
+    return pd.Timedelta(interval[:-1] + "min" if interval.endswith("m") else interval)
+
+
+def _bar(row):
+    return {column.lower(): float(row[column]) for column in ('Open', 'High', 'Low', 'Close', 'Volume')}
+
+
+class YFinanceIntradaySource:
+    """
+    Completed intraday bars from Yahoo Finance, polled every poll_seconds.
+
+    Each poll downloads the last two days for every ticker in one call and
+    yields, oldest first, the bars that closed since the previous poll. The
+    first poll replays the bars of the current UTC day, so consumers start
+    with the whole partial day.
+    """
+
+    def __init__(self, interval=STREAM_INTERVAL, poll_seconds=STREAM_POLL_SECONDS):
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self._length = interval_length(interval)
+
+    def _download(self, tickers):
+        import yfinance as yf
+        data = yf.download(list(tickers), period="2d", interval=self.interval, group_by='ticker', progress=False)
+        bars = {}
+        for ticker in tickers:
+            try:
+                bars[ticker] = normalize_ohlcv(data, ticker, daily=False) if not data.empty else pd.DataFrame()
+            except KeyError:
+                bars[ticker] = pd.DataFrame()
+        return bars
+
+    async def stream(self, tickers):
+        """Yields (ticker, bar timestamp, {"open", "high", "low", "close", "volume"})."""
+        now = pd.Timestamp(datetime.utcnow())
+        last_seen = dict.fromkeys(tickers, now.normalize() - pd.Timedelta(microseconds=1))
+        while True:
+            try:
+                fetched = await asyncio.to_thread(self._download, tickers)
+            except Exception as e:
+                logger.error(f"Intraday download failed: {str(e)}")
+                fetched = {}
+            closed_before = pd.Timestamp(datetime.utcnow()) - self._length
+            pending = []
+            for ticker, frame in fetched.items():
+                if frame.empty:
+                    continue
+                # The last bar is still forming until a full interval has passed
+                fresh = frame[(frame.index > last_seen[ticker]) & (frame.index <= closed_before)]
+                pending.extend((timestamp, ticker, row) for timestamp, row in fresh.iterrows())
+            for timestamp, ticker, row in sorted(pending, key=lambda item: item[0]):
+                last_seen[ticker] = timestamp
+                yield ticker, timestamp, _bar(row)
+            await asyncio.sleep(self.poll_seconds)
+
+
+class ReplaySource:
+    """
+    Recorded intraday bars read from <ticker>.csv files (as written by
+    DataFrame.to_csv) and replayed in timestamp order, delay seconds apart,
+    so streaming can be exercised offline and much faster than real time.
+    """
+
+    def __init__(self, directory=STREAM_REPLAY_DIR, delay=STREAM_REPLAY_DELAY, repeat=False):
+        self.directory = directory
+        self.delay = delay
+        self.repeat = repeat
+
+    def _load(self, tickers):
+        bars = []
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                logger.warning(f"No recorded intraday bars for {ticker} at {path}.")
+                continue
+            frame = normalize_ohlcv(pd.read_csv(path, index_col=0, parse_dates=True), daily=False)
+            bars.extend((timestamp, ticker, _bar(row)) for timestamp, row in frame.iterrows())
+        return sorted(bars, key=lambda item: item[0])
+
+    async def stream(self, tickers):
+        bars = await asyncio.to_thread(self._load, tickers)
+        logger.info(f"Replaying {len(bars)} intraday bar(s) from {self.directory}.")
+        while True:
+            for timestamp, ticker, bar in bars:
+                yield ticker, timestamp, bar
+                await asyncio.sleep(self.delay)
+            if not self.repeat or not bars:
+                return
+
+
+def create_intraday_source(name=STREAM_SOURCE):
+    if name == "yfinance":
+        return YFinanceIntradaySource()
+    if name == "replay":
+        return ReplaySource()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown intraday source: {name}")
+
+
+def record_intraday(tickers, directory, period="5d", interval=STREAM_INTERVAL):
+    """Downloads recent intraday bars into <ticker>.csv files that ReplaySource can play back."""
+    import yfinance as yf
+    os.makedirs(directory, exist_ok=True)
+    data = yf.download(list(tickers), period=period, interval=interval, group_by='ticker', progress=False)
+    written = {}
+    for ticker in tickers:
+        frame = normalize_ohlcv(data, ticker, daily=False)
+        frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+        written[ticker] = len(frame)
+    return written
@@ -0,0 +1,180 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+logger = logging.getLogger(__name__)
+
+LINEAR_FORMAT_VERSION = "1"
+
+
+class LinearArtifact:
+    """
+    Inference runtime for an exported linear regression pipeline.
+
+    The artifact is an Arrow IPC file with one row per input feature (name,
+    fill value for missing inputs, coefficient) and the intercept in the schema
+    metadata. It is memory-mapped, so loading takes milliseconds, needs neither
+    pycaret nor sklearn, and every worker on a host shares the same pages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+        metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        if metadata.get("format_version") != LINEAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported linear artifact version: {metadata.get('format_version')}")
+
+        self.feature_names_in_ = np.array(table.column("feature").to_pylist(), dtype=object)
+        # Float columns without nulls convert without copying, straight from the mapped file
+        self.fill = table.column("fill").to_numpy()
+        self.coef_ = table.column("coef").to_numpy()
+        self.intercept_ = float(metadata["intercept"])
+        self.source_version = metadata.get("source_version")
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        values = np.asarray(X, dtype=float)
+        values = np.where(np.isnan(values), self.fill, values)
+        return values @ self.coef_ + self.intercept_
+
+
+def _imputer_fill(model, features):
+    """Per-feature fill values of the pipeline's numeric imputer, 0 where it has none."""
+    fill = dict.fromkeys(features, 0.0)
+    for _, step in getattr(model, "steps", []):
+        transformer = getattr(step, "transformer", step)  # pycaret wraps sklearn transformers
+        statistics = getattr(transformer, "statistics_", None)
+        if statistics is None:
+            continue
+        columns = getattr(transformer, "feature_names_in_", None)
+        if columns is None:
+            columns = getattr(step, "include", None) or features
+        for column, value in zip(columns, statistics):
+            if column in fill:
+                try:
+                    fill[column] = float(value)
+                except (TypeError, ValueError):
+                    pass
+    return np.array([fill[f] for f in features], dtype=float)
+
+
+# Steps that only touch missing values; on complete inputs they pass every column through unchanged
+IMPUTERS = {"SimpleImputer", "IterativeImputer", "KNNImputer", "CleanColumnNames"}
+
+
+def _scaler_affine(transformer, n):
+    """(multiplier, shift) per column of a fitted sklearn scaler, x -> x * multiplier + shift; None for other steps."""
+    name = type(transformer).__name__
+    zeros, ones = np.zeros(n), np.ones(n)
+    if name == "StandardScaler":
+        mean = transformer.mean_ if transformer.with_mean else zeros
+        scale = transformer.scale_ if transformer.with_std else ones
+        return 1 / scale, -mean / scale
+    if name == "RobustScaler":
+        center = transformer.center_ if transformer.with_centering else zeros
+        scale = transformer.scale_ if transformer.with_scaling else ones
+        return 1 / scale, -center / scale
+    if name == "MinMaxScaler":
+        return transformer.scale_, transformer.min_
+    if name == "MaxAbsScaler":
+        return 1 / transformer.scale_, zeros
+    return None
+
+
+def extract_linear(model, features):
+    """
+    Folds a fitted pipeline's preprocessing constants and its final estimator's
+    coef_/intercept_ into one affine map over the input features, x @ coef + intercept.
+
+    Every column the pipeline carries is tracked as weights over the inputs plus
+    an offset. Imputers are skipped (their fill values are exported separately),
+    scalers rescale the columns they were fit on (pycaret's TransformerWrapper
+    limits a step to its include list), and the estimator's coefficients are
+    mapped back through them. Any other step is not linear and is rejected.
+    """
+    n = len(features)
+    columns = {feature: (np.eye(n)[i], 0.0) for i, feature in enumerate(features)}
+    steps = getattr(model, "steps", None) or [(None, model)]
+
+    for _, step in steps[:-1]:
+        if step is None or step == "passthrough":
+            continue
+        transformer = getattr(step, "transformer", step)  # pycaret wraps sklearn transformers
+        include = getattr(step, "include", None) if transformer is not step else None
+        if include is not None and len(include) == 0:
+            continue  # a wrapper with no columns to work on, e.g. the categorical imputer on numeric data
+        name = type(transformer).__name__
+        if name in IMPUTERS:
+            continue
+        targets = getattr(transformer, "feature_names_in_", None)
+        targets = list(targets) if targets is not None else list(include or columns)
+        affine = _scaler_affine(transformer, len(targets))
+        if affine is None:
+            raise ValueError(f"Pipeline step {name} is not linear; the model cannot be exported")
+        for column, multiplier, shift in zip(targets, *affine):
+            weights, offset = columns[column]
+            columns[column] = (weights * multiplier, offset * multiplier + shift)
+
+    estimator = steps[-1][1]
+    estimator_coef = getattr(estimator, "coef_", None)
+    if estimator_coef is None:
+        raise ValueError(f"{type(estimator).__name__} has no coef_; only linear estimators can be exported")
+    estimator_coef = np.ravel(estimator_coef)
+    names = getattr(estimator, "feature_names_in_", None)
+    names = list(names) if names is not None else list(columns)
+    if len(names) != len(estimator_coef):
+        raise ValueError(f"{type(estimator).__name__} has {len(estimator_coef)} coefficients for {len(names)} columns")
+
+    coef = np.zeros(n)
+    intercept = float(np.ravel(getattr(estimator, "intercept_", 0.0))[0])
+    for name, weight in zip(names, estimator_coef):
+        weights, offset = columns[name]
+        coef += weight * weights
+        intercept += weight * offset
+    return coef, intercept
+
+
+def check_parity(model, artifact, X, rtol=1e-6, atol=1e-6):
+    """Compares model.predict with the exported artifact on X; returns the largest absolute difference."""
+    expected = np.asarray(model.predict(X), dtype=float)
+    actual = artifact.predict(X)
+    difference = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if not np.allclose(expected, actual, rtol=rtol, atol=atol):
+        raise ValueError(f"Exported artifact does not match model.predict (max difference {difference})")
+    return difference
+
+
+def export_linear(model, X, path, source_version=None):
+    """
+    Writes the compact artifact for a fitted regression pipeline whose input
+    columns are X's, then reloads it and checks parity with model.predict on X.
+    Nothing is left at path when the check fails.
+    """
+    features = [str(c) for c in X.columns]
+    coef, intercept = extract_linear(model, features)
+    fill = _imputer_fill(model, features)
+
+    table = pa.table({
+        "feature": pa.array(features, type=pa.string()),
+        "fill": pa.array(fill, type=pa.float64()),
+        "coef": pa.array(coef, type=pa.float64()),
+    }).replace_schema_metadata({
+        "format_version": LINEAR_FORMAT_VERSION,
+        "intercept": repr(intercept),
+        "source_version": source_version or "",
+    })
+    with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    try:
+        difference = check_parity(model, LinearArtifact(path), X)
+    except Exception:
+        os.remove(path)
+        raise
+    logger.info(f"Exported {len(features)}-feature linear artifact to {path} (max parity difference {difference:.3g}).")
+    return difference
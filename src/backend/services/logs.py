@@ -1,10 +1,316 @@
-def get_logs(supabase):
+import base64
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "100"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "2"))  # seconds
+LOG_RETRY_INTERVAL = float(os.getenv("LOG_RETRY_INTERVAL", "30"))  # seconds between retries while the database is down
+LOG_SPILL_PATH = os.getenv("LOG_SPILL_PATH", "/tmp/farcry_logs_spill.jsonl")
+
+_STOP = object()
+
+
+class LogSink:
+    """
+    Writes log rows to Supabase from a background thread.
+
+    Callers only enqueue into a bounded queue; rows are flushed with multi-row
+    inserts when a batch fills up or the flush interval passes. While the
+    database is unreachable, batches are appended to a local spill file that is
+    replayed, in order, before the next successful flush. When the queue is full
+    new rows are dropped and counted.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._thread = None
+        self._supabase = None
+        self._spill_lock = threading.Lock()
+        self._retry_at = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def start(self, supabase):
+        self._supabase = supabase
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        """Flushes everything still queued, then stops the writer thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Log queue still full at shutdown; remaining rows are dropped.")
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                while True:
+                    try:
+                        pending = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pending is not _STOP:
+                        batch.append(pending)
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= LOG_BATCH_SIZE or time.monotonic() >= deadline:
+                if batch:
+                    self._flush(batch)
+                    batch = []
+                deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+
+    def _insert(self, rows):
+        for start in range(0, len(rows), LOG_BATCH_SIZE):
+            with stage("log_insert"):
+                self._supabase.table("logs").insert(rows[start:start + LOG_BATCH_SIZE]).execute()
+
+    def _spill(self, rows):
+        try:
+            with self._spill_lock, open(LOG_SPILL_PATH, "a") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+            self.spilled += len(rows)
+        except OSError as e:
+            logger.error(f"Could not spill {len(rows)} log rows: {str(e)}")
+            self.dropped += len(rows)
+
+    def _trim_spill(self, remaining):
+        """Replaces the spill file with the rows not yet written (removes it when none are left)."""
+        if not remaining:
+            os.remove(LOG_SPILL_PATH)
+            return
+        temporary = f"{LOG_SPILL_PATH}.tmp"
+        with open(temporary, "w") as f:
+            for row in remaining:
+                f.write(json.dumps(row) + "\n")
+        os.replace(temporary, LOG_SPILL_PATH)
+
+    def _replay_spill(self):
+        replayed = 0
+        with self._spill_lock:
+            if not os.path.exists(LOG_SPILL_PATH):
+                return
+            with open(LOG_SPILL_PATH) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            try:
+                # The file is trimmed after every chunk, so a failure part way only retries the rows not yet written
+                for start in range(0, len(rows), LOG_BATCH_SIZE):
+                    self._insert(rows[start:start + LOG_BATCH_SIZE])
+                    replayed = min(start + LOG_BATCH_SIZE, len(rows))
+                    self._trim_spill(rows[replayed:])
+            finally:
+                self.written += replayed
+                self.spilled -= min(self.spilled, replayed)
+        logger.info(f"Replayed {replayed} spilled log rows.")
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        if self._supabase is None or time.monotonic() < self._retry_at:
+            self._spill(batch)
+            return
+        try:
+            self._replay_spill()
+            self._insert(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error while inserting logs, spilling {len(batch)} rows: {str(e)}")
+            self._retry_at = time.monotonic() + LOG_RETRY_INTERVAL
+            self._spill(batch)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+log_sink = LogSink()
+
+
+def insert_log(supabase, system, action, code):
+    log_entry = {
+        "datetime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "system": system,
+        "action": action,
+        "code": code
+    }
+
+    with stage("insert_log"):
+        if log_sink.stats()["running"]:
+            log_sink.enqueue(log_entry)
+            return
+
+        # No background writer (e.g. scripts): write synchronously as before
+        try:
+            supabase.table("logs").insert(log_entry).execute()
+        except Exception as e:
+            logger.error(f"Error while inserting log: {str(e)}")
+
+
+LOG_COLUMNS = "id, datetime, system, action, code"
+LOG_EXPORT_PAGE_SIZE = int(os.getenv("LOG_EXPORT_PAGE_SIZE", "1000"))
+LOG_SUMMARY_FUNCTION = os.getenv("LOG_SUMMARY_FUNCTION", "logs_summary")  # database function that groups the logs
+LOG_SUMMARY_MAX_ROWS = int(os.getenv("LOG_SUMMARY_MAX_ROWS", "20000"))  # rows scanned when that function is missing
+
+
+def encode_cursor(row_id):
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode()
+
+
+def decode_cursor(cursor):
     try:
-        response = supabase.table("logs").select("datetime, system, action, code").execute()
-        return response.data
-    except AttributeError as e:
-        print(f"AttributeError: {e}")
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _filtered_query(supabase, columns, filters):
+    query = supabase.table("logs").select(columns)
+    if filters.get("start") is not None:
+        query = query.gte("datetime", filters["start"].strftime('%Y-%m-%d %H:%M:%S'))
+    if filters.get("end") is not None:
+        query = query.lt("datetime", filters["end"].strftime('%Y-%m-%d %H:%M:%S'))
+    for column in ("system", "action", "code"):
+        if filters.get(column) is not None:
+            query = query.eq(column, filters[column])
+    return query
+
+
+def _pages(supabase, columns, filters, page_size, descending=True, after_id=None):
+    """Yields pages of rows, walking the id keyset so every page is an indexed range scan."""
+    while True:
+        query = _filtered_query(supabase, columns, filters)
+        if after_id is not None:
+            query = query.lt("id", after_id) if descending else query.gt("id", after_id)
+        rows = query.order("id", desc=descending).limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1]["id"]
+
+
+def get_logs(supabase, limit=100, cursor=None, **filters):
+    """Returns one page of logs, newest first, with the cursor of the next page (None on the last one)."""
+    try:
+        after_id = decode_cursor(cursor) if cursor else None
+        query = _filtered_query(supabase, LOG_COLUMNS, filters)
+        if after_id is not None:
+            query = query.lt("id", after_id)
+        with stage("log_query"):
+            rows = query.order("id", desc=True).limit(limit + 1).execute().data
+        next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+        return {"items": rows[:limit], "next_cursor": next_cursor}
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"An error occurred while fetching logs: {str(e)}")
         return None
+
+
+def stream_logs(supabase, **filters):
+    """Yields every matching log as one NDJSON line, oldest first, fetching a page at a time."""
+    for rows in _pages(supabase, LOG_COLUMNS, filters, LOG_EXPORT_PAGE_SIZE, descending=False):
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def _summary_bucket(value, bucket):
+    moment = datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        moment = moment.replace(hour=0)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _summary_rows(counts):
+    return [
+        {"bucket": moment, "action": action, "count": total, "errors": errors, "error_rate": errors / total}
+        for (moment, action), (total, errors) in sorted(counts.items())
+    ]
+
+
+def _summary_params(bucket, filters):
+    def moment(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value is not None else None
+
+    return {"bucket_size": bucket, "start_at": moment(filters.get("start")), "end_at": moment(filters.get("end")),
+            "system_filter": filters.get("system"), "action_filter": filters.get("action"),
+            "code_filter": filters.get("code")}
+
+
+def _scan_summary(supabase, bucket, filters):
+    """Groups the newest LOG_SUMMARY_MAX_ROWS matching rows here; older rows are left out and reported as truncated."""
+    counts, scanned, truncated = {}, 0, False
+    pages = _pages(supabase, "id, datetime, action, code", filters, min(LOG_EXPORT_PAGE_SIZE, LOG_SUMMARY_MAX_ROWS))
+    for rows in pages:
+        taken = rows[:LOG_SUMMARY_MAX_ROWS - scanned]
+        for row in taken:
+            key = (_summary_bucket(row["datetime"], bucket), row["action"])
+            total, errors = counts.get(key, (0, 0))
+            counts[key] = (total + 1, errors + (1 if int(row["code"] or 0) >= 500 else 0))
+        scanned += len(taken)
+        if scanned >= LOG_SUMMARY_MAX_ROWS:
+            truncated = len(taken) < len(rows) or next(pages, None) is not None
+            break
+    return {"buckets": _summary_rows(counts), "truncated": truncated, "scanned_rows": scanned}
+
+
+def summarize_logs(supabase, bucket="hour", **filters):
+    """
+    Counts requests and server errors (code >= 500) per action per time bucket.
+
+    The grouping runs in the database (the logs_summary function in the README),
+    so only one row per bucket and action is transferred. Without that function
+    the newest LOG_SUMMARY_MAX_ROWS rows are grouped here instead, and the result
+    is marked as truncated when older rows were left out.
+    """
+    try:
+        with stage("log_query"):
+            grouped = supabase.rpc(LOG_SUMMARY_FUNCTION, _summary_params(bucket, filters)).execute().data
     except Exception as e:
-        print(f"An error occurred: {e}")
-        return None
\ No newline at end of file
+        logger.warning(f"Log summary function {LOG_SUMMARY_FUNCTION} failed, scanning rows instead: {str(e)}")
+        with stage("log_query"):
+            return _scan_summary(supabase, bucket, filters)
+
+    counts = {(_summary_bucket(row["bucket"], bucket), row["action"]): (int(row["count"]), int(row["errors"]))
+              for row in grouped}
+    return {"buckets": _summary_rows(counts), "truncated": False, "scanned_rows": None}
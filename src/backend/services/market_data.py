@@ -0,0 +1,248 @@
+import glob
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "/tmp/farcry_market_data")
+MARKET_DATA_SOURCE = os.getenv("MARKET_DATA_SOURCE", "yfinance")  # "yfinance" or "fixture"
+MARKET_DATA_FIXTURE_DIR = os.getenv("MARKET_DATA_FIXTURE_DIR", "fixtures/market_data")
+MARKET_DATA_RECHECK_SECONDS = int(os.getenv("MARKET_DATA_RECHECK_SECONDS", "900"))
+MARKET_DATA_RETRY_SECONDS = int(os.getenv("MARKET_DATA_RETRY_SECONDS", "60"))  # back-off after a failed download
+MAX_SEGMENTS = 32
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def normalize_ohlcv(df, ticker=None, daily=True):
+    """
+    Brings a downloaded frame to a naive DatetimeIndex and float OHLCV columns.
+    Daily bars are indexed by date; intraday bars (daily=False) keep their UTC timestamps.
+    """
+    if isinstance(df.columns, pd.MultiIndex):
+        if ticker is not None and ticker in df.columns.get_level_values(0):
+            df = df[ticker]
+        elif ticker is not None and ticker in df.columns.get_level_values(1):
+            df = df.xs(ticker, axis=1, level=1)
+        else:
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+    df = df[OHLCV_COLUMNS].astype('float64')
+    index = pd.to_datetime(df.index)
+    if daily:
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        index = index.normalize()
+    elif index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    df.index = index
+    df.index.name = 'Date'
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df.dropna(subset=['Close'])
+
+
+class YFinanceSource:
+    """Daily bars from Yahoo Finance."""
+
+    def fetch(self, ticker, start, end):
+        return self.fetch_many([ticker], start, end)[ticker]
+
+    def fetch_many(self, tickers, start, end):
+        """Downloads every ticker in a single yf.download call."""
+        import yfinance as yf
+        logger.info(f"Downloading {', '.join(tickers)} bars from {start:%Y-%m-%d} to {end:%Y-%m-%d}.")
+        data = yf.download(list(tickers), start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'),
+                           interval='1d', group_by='ticker', progress=False)
+        bars = {}
+        for ticker in tickers:
+            try:
+                bars[ticker] = normalize_ohlcv(data, ticker) if not data.empty else pd.DataFrame()
+            except KeyError:
+                bars[ticker] = pd.DataFrame()
+        return bars
+
+
+class FixtureSource:
+    """Daily bars read from local CSV files named <ticker>.csv, as written by DataFrame.to_csv."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start, end):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        data = normalize_ohlcv(pd.read_csv(path, index_col=0, parse_dates=True))
+        return data[(data.index >= start) & (data.index < end)]
+
+    def fetch_many(self, tickers, start, end):
+        return {ticker: self.fetch(ticker, start, end) for ticker in tickers}
+
+
+def create_source(name=MARKET_DATA_SOURCE):
+    if name == "yfinance":
+        return YFinanceSource()
+    if name == "fixture":
+        return FixtureSource(MARKET_DATA_FIXTURE_DIR)
+    raise ValueError(f"Unknown market data source: {name}")
+
+
+class OHLCVStore:
+    """
+    Append-only on-disk store of daily bars, one directory per ticker.
+
+    Each download is written as its own Arrow IPC segment and segments are read
+    back through memory maps. Only complete bars (before today) are stored, and
+    only the days missing from the store are requested from the source.
+    """
+
+    def __init__(self, root, source):
+        self.root = root
+        self.source = source
+        self._frames = {}
+        self._last_checked = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def set_source(self, source):
+        with self._locks_guard:
+            self.source = source
+            self._last_checked.clear()
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.root, ticker)
+
+    def _segments(self, ticker):
+        return sorted(glob.glob(os.path.join(self._ticker_dir(ticker), "*.arrow")))
+
+    def _load(self, ticker):
+        frame = self._frames.get(ticker)
+        if frame is not None:
+            return frame
+
+        tables = []
+        for path in self._segments(ticker):
+            with pa.memory_map(path, 'r') as source:
+                tables.append(ipc.open_file(source).read_all())
+        if tables:
+            frame = pa.concat_tables(tables).to_pandas().set_index('Date')
+            frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        else:
+            frame = pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype='float64')
+        self._frames[ticker] = frame
+        return frame
+
+    def _write_segment(self, ticker, df, name=None):
+        directory = self._ticker_dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        name = name or f"{df.index[0]:%Y%m%d}-{df.index[-1]:%Y%m%d}-{time.time_ns()}.arrow"
+        path = os.path.join(directory, name)
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        tmp_path = path + ".tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return path
+
+    def _append(self, ticker, new_bars):
+        frame = self._load(ticker)
+        new_bars = new_bars[~new_bars.index.isin(frame.index)]
+        if new_bars.empty:
+            return
+        self._write_segment(ticker, new_bars)
+        frame = pd.concat([frame, new_bars]).sort_index()
+        self._frames[ticker] = frame
+
+        segments = self._segments(ticker)
+        if len(segments) > MAX_SEGMENTS:
+            # Fold all segments into one so memory-mapped reads stay cheap
+            self._write_segment(ticker, frame, name=f"00000000-{frame.index[-1]:%Y%m%d}-compact-{time.time_ns()}.arrow")
+            for path in segments:
+                os.remove(path)
+        logger.info(f"Stored {len(new_bars)} new {ticker} bar(s); last bar {frame.index[-1]:%Y-%m-%d}.")
+
+    def _missing_range(self, ticker, start, end):
+        """Returns the (start, end) span still needed for ticker, or None when the store covers it."""
+        frame = self._load(ticker)
+        last_complete = min(end, pd.Timestamp(datetime.now().date())) - timedelta(days=1)
+
+        if frame.empty:
+            fetch_start, fetch_end = start, last_complete + timedelta(days=1)
+        else:
+            fetch_start = start if start < frame.index[0] else frame.index[-1] + timedelta(days=1)
+            fetch_end = last_complete + timedelta(days=1) if frame.index[-1] < last_complete else frame.index[0]
+        if fetch_start >= fetch_end:
+            return None
+
+        # The source may not have published the latest bar yet; don't ask again on every request
+        checked = self._last_checked.get(ticker)
+        if checked is not None and checked[0] <= start and time.monotonic() - checked[1] < checked[2]:
+            return None
+        return fetch_start, fetch_end
+
+    def _ensure_many(self, tickers, start, end):
+        missing = {}
+        for ticker in tickers:
+            span = self._missing_range(ticker, start, end)
+            if span is not None:
+                missing[ticker] = span
+        if not missing:
+            return
+
+        # One download for every ticker that is behind; bars already stored are skipped on append
+        fetch_start = min(span[0] for span in missing.values())
+        fetch_end = max(span[1] for span in missing.values())
+        last_complete = pd.Timestamp(datetime.now().date()) - timedelta(days=1)
+        try:
+            with stage("market_download"):
+                fetched = self.source.fetch_many(list(missing), fetch_start, fetch_end)
+        except Exception as e:
+            # Requests keep getting the stored bars while the source is down, without each one waiting on a retry
+            logger.error(f"Market data download failed, serving stored bars for {MARKET_DATA_RETRY_SECONDS}s: {str(e)}")
+            for ticker in missing:
+                self._last_checked[ticker] = (start, time.monotonic(), MARKET_DATA_RETRY_SECONDS)
+            return
+
+        for ticker in missing:
+            bars = fetched.get(ticker)
+            if bars is not None and not bars.empty:
+                self._append(ticker, bars[bars.index <= last_complete])
+            self._last_checked[ticker] = (start, time.monotonic(), MARKET_DATA_RECHECK_SECONDS)
+
+    def get_windows(self, tickers, start, end):
+        """Returns the daily bars for start <= date < end per ticker, fetching only what is missing locally."""
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        tickers = list(dict.fromkeys(tickers))
+        locks = [self._lock(ticker) for ticker in sorted(tickers)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            self._ensure_many(tickers, start, end)
+            frames = {ticker: self._load(ticker) for ticker in tickers}
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        return {ticker: frame[(frame.index >= start) & (frame.index < end)].copy() for ticker, frame in frames.items()}
+
+    def get_window(self, ticker, start, end):
+        return self.get_windows([ticker], start, end)[ticker]
+
+    def last_bar_date(self, ticker):
+        frame = self._load(ticker)
+        return None if frame.empty else frame.index[-1]
+
+
+market_store = OHLCVStore(MARKET_DATA_DIR, create_source())
@@ -1,17 +1,22 @@
+import asyncio
 import numpy as np
-import pickle
-from fastapi import HTTPException
 import logging
+from fastapi import HTTPException
 from datetime import datetime, timedelta
-import yfinance as yf
-from ta import add_all_ta_features
-import joblib
 import pandas as pd
-import os
 from supabase import Client
-from pycaret.regression import load_model
-from statsmodels.tsa.statespace.sarimax import SARIMAXResults
-import gzip
+from services.registry import model_registry
+from services.market_data import market_store
+from services.cache import prediction_cache
+from services.executor import run_blocking, PREDICTION_TIMEOUT
+from services.inference import inference_pool
+from services.assets import resolve_assets
+from services.features import entry_feature_columns, feature_engine, model_inputs
+from services.forecasting import FORECASTERS, FORECAST_STEPS, slice_forecast
+from services.encoding import legacy_series
+from services.predictions import prediction_store
+from services.logs import insert_log
+from services.timing import stage
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -19,67 +24,41 @@ logger = logging.getLogger(__name__)
 
 from datetime import datetime
 
-def insert_log(supabase, system, action, code):
-    try:
-        log_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        log_entry = {
-            "datetime": log_timestamp,
-            "system": system,
-            "action": action,
-            "code": code
-        }
-
-        supabase.table("logs").insert(log_entry).execute()
-
-    except Exception as e:
-        logger.error(f"Error while inserting log: {str(e)}")
+PREDICTION_WINDOW_DAYS = 30  # days of history the regression features are computed from
 
-def fetch_btc_data():
+# Function to fetch the last 30 daily bars for several tickers in one batched store read
+def fetch_recent_data(tickers):
     today = datetime.now()
     yesterday = today - timedelta(days=1)
-    thirty_days_ago = yesterday - timedelta(days=29)
+    thirty_days_ago = yesterday - timedelta(days=PREDICTION_WINDOW_DAYS - 1)
     
     start_date = thirty_days_ago.strftime('%Y-%m-%d')
     end_date = yesterday.strftime('%Y-%m-%d') 
     
-    logger.info(f"Fetching BTC data from {start_date} to {end_date}.")
-    
-    btc_data = yf.download('BTC-USD', start=start_date, end=end_date, interval='1d')
-    
-    if not btc_data.empty:
-        btc_data = btc_data[['Open', 'High', 'Low', 'Close', 'Volume']]
-        btc_data['Adj Close'] = btc_data['Close']
-        logger.info("Successfully fetched BTC data.")
-        return btc_data
-    else:
-        raise ValueError("No data fetched for BTC")
-
-# Function to fetch Ethereum data for the last 30 days
-def fetch_eth_data():
-    today = datetime.now()
-    yesterday = today - timedelta(days=1)
-    thirty_days_ago = yesterday - timedelta(days=29)
-    
-    start_date = thirty_days_ago.strftime('%Y-%m-%d')
-    end_date = yesterday.strftime('%Y-%m-%d')
-    
-    logger.info(f"Fetching ETH data from {start_date} to {end_date}.")
+    logger.info(f"Fetching {', '.join(tickers)} data from {start_date} to {end_date}.")
     
-    eth_data = yf.download('ETH-USD', start=start_date, end=end_date, interval='1d')
-    
-    if not eth_data.empty:
-        eth_data = eth_data[['Open', 'High', 'Low', 'Close', 'Volume']]
-        eth_data['Adj Close'] = eth_data['Close']
-        logger.info("Successfully fetched ETH data.")
-        return eth_data
-    else:
-        raise ValueError("No data fetched for ETH")
+    windows = market_store.get_windows(tickers, start_date, end_date)
+    for data in windows.values():
+        if not data.empty:
+            data['Adj Close'] = data['Close']
+    return windows
+
+# Function to fetch the two-year history served alongside the forecasts
+def fetch_history(tickers):
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
+    return market_store.get_windows(tickers, start_date, end_date)
+
+# Newest bar a pipeline run now would read: both windows end (exclusively) on the end_date above
+def expected_bar_date(family):
+    window_end = datetime.now() - timedelta(days=1) if family == "regression" else datetime.now()
+    return (window_end - timedelta(days=1)).strftime('%Y-%m-%d')
 
 # Function to add technical analysis indicators to the DataFrame
 def add_technical_indicators(df):
     try:
         logger.info("Adding technical indicators to the data.")
+        from ta import add_all_ta_features  # only the full-feature fallback needs it
         return add_all_ta_features(
             df, open="Open", high="High", low="Low", close="Close", volume="Volume", fillna=True)
     except Exception as e:
@@ -87,14 +66,18 @@ def add_technical_indicators(df):
         raise
 
 # Preprocess the data before prediction (for both BTC and ETH)
-def preprocess_for_prediction(df):
+def preprocess_for_prediction(df, columns=None, ticker=None):
     try:
         logger.info("Starting preprocessing of data.")
         
         if df.shape[0] < 2:
             raise ValueError("Not enough data to compute technical indicators.")
         
-        df = add_technical_indicators(df)
+        if columns is None:
+            df = add_technical_indicators(df)
+        else:
+            # Only the indicators the model actually reads
+            df = feature_engine.compute(df, columns, ticker)
         logger.debug(f"Data after adding technical indicators: {df.head()}")
 
         df = df.drop(['others_dr', 'others_dlr', 'others_cr'], axis=1, errors='ignore')
@@ -112,138 +95,213 @@ def preprocess_for_prediction(df):
         logger.error(f"Unexpected error during preprocessing: {str(e)}")
         raise
 
-# Function to download the model from Supabase Storage using the provided Supabase client
-def download_model_from_supabase(supabase, bucket_name: str, model_path: str):
-    try:
-        logger.info(f"Downloading model from Supabase bucket: {bucket_name}, path: {model_path}")
-        response = supabase.storage.from_(bucket_name).download(model_path)
-        model_file_path = f"/tmp/{os.path.basename(model_path)}"  # Save the model in a temporary directory
-        
-        with open(model_file_path, "wb") as f:
-            f.write(response)
-        
-        logger.info(f"Model {model_path} downloaded successfully.")
-        return model_file_path
-    
-    except Exception as e:
-        logger.error(f"Error downloading model from Supabase: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to download model from Supabase: {str(e)}")
+# Function to resolve the registry entry of every asset for one model family
+def resolve_models(supabase, assets, family):
+    entries = {}
+    for asset in assets:
+        spec = getattr(asset, family)
+        try:
+            if spec is None:
+                raise ValueError(f"No {family} model registered for {asset.symbol}")
+            entries[asset.symbol] = model_registry.get(supabase, spec.bucket, spec.path)
+        except Exception as e:
+            logger.error(f"Could not load {family} model for {asset.symbol}: {str(e)}")
+            entries[asset.symbol] = e
+    return entries
 
-# Function to load the model and make a prediction (for both BTC and ETH)
-def load_model_and_predict(supabase, data, bucket_name, model_path):
-    try:
-        logger.info("Loading pre-trained PyCaret model.")
-        
-        # Download the model from Supabase
-        model_file_path = download_model_from_supabase(supabase, bucket_name, model_path)
-        
-        # Load the model using PyCaret's load_model function
-        model = load_model(model_file_path.replace('.pkl', ''))  # Remove .pkl from file path for PyCaret
-        
-        logger.info(f"Model loaded successfully.")
-        
-        latest_data = data.iloc[-1:].fillna(0)
-        
-        logger.debug("Latest data for prediction:")
-        logger.debug(latest_data)
-        
-        prediction = model.predict(latest_data)
-        rounded_prediction = np.round(prediction, 2)
-        logger.info(f"Prediction result: {rounded_prediction}")
-        
-        return rounded_prediction  
-    
-    except Exception as e:
-        logger.error(f"Error during model prediction: {str(e)}")
-        raise
+# Function to score the latest row of several assets, one model.predict call per model
+def predict_latest_rows(jobs):
+    outcomes = {}
+    by_model = {}
+    for key, (asset, df, entry) in jobs.items():
+        try:
+            with stage("features", asset.symbol):
+                processed = preprocess_for_prediction(df, entry_feature_columns(entry), asset.ticker)
+            latest = model_inputs(processed, entry).iloc[-1:].fillna(0)
+            by_model.setdefault(entry.version, (entry, []))[1].append((key, latest))
+        except Exception as e:
+            outcomes[key] = e
+
+    for entry, rows in by_model.values():
+        try:
+            logger.info(f"Predicting {len(rows)} row(s) with PyCaret model {entry.spec.path} (version {entry.version}).")
+            batch = pd.concat([latest for _, latest in rows])
+            # One call scores every asset of the batch, so it is timed as batched work ("all"), not per asset
+            with stage("inference"):
+                predictions = np.round(entry.model.predict(batch), 2)
+            logger.info(f"Prediction result: {predictions}")
+            for (key, latest), prediction in zip(rows, predictions):
+                outcomes[key] = {
+                    "prediction": float(prediction),
+                    "model_version": entry.version,
+                    "bar_date": latest.index[-1].strftime('%Y-%m-%d')
+                }
+        except Exception as e:
+            logger.error(f"Error during model prediction: {str(e)}")
+            for key, _ in rows:
+                outcomes[key] = e
+    return outcomes
+
+# Scores the latest rows on the inference worker processes when they are enabled, otherwise on this thread
+def score_latest_rows(jobs):
+    if inference_pool.enabled:
+        return inference_pool.predict_rows(jobs)
+    return predict_latest_rows(jobs)
+
+# Runs the regression pipeline for a batch of assets; returns (results, errors) keyed by symbol
+async def regression_predictions(supabase, assets):
+    with stage("market_data"):
+        windows = await run_blocking(fetch_recent_data, [asset.ticker for asset in assets])
+    with stage("model_load"):
+        entries = await run_blocking(resolve_models, supabase, assets, "regression")
+
+    results, errors, jobs = {}, {}, {}
+    for asset in assets:
+        df, entry = windows.get(asset.ticker), entries[asset.symbol]
+        if isinstance(entry, Exception):
+            errors[asset.symbol] = str(entry)
+        elif df is None or df.empty:
+            errors[asset.symbol] = f"No data fetched for {asset.symbol}"
+        else:
+            jobs[("regression", asset.symbol, df.index[-1], entry.version)] = (asset, df, entry)
+
+    # Cached keys are served directly; the misses are scored together in one pool job
+    outcomes = await prediction_cache.get_or_compute_many(
+        list(jobs), lambda keys: score_latest_rows({key: jobs[key] for key in keys}))
+    for key, outcome in outcomes.items():
+        symbol = key[1]
+        if isinstance(outcome, Exception):
+            errors[symbol] = str(outcome)
+        else:
+            results[symbol] = outcome
+    return results, errors
+
+# Serves the scheduler's stored results when they are current, otherwise runs the pipeline on demand
+async def scheduled_or_compute(supabase, assets, family):
+    results = prediction_store.current(family, assets, model_registry, expected_bar_date(family))
+    if results is not None:
+        return results, {}
+    predictions = regression_predictions if family == "regression" else time_series_predictions
+    return await asyncio.wait_for(predictions(supabase, assets), timeout=PREDICTION_TIMEOUT)
+
+# Resolves the BTC and ETH assets the legacy endpoints serve; a registry without them is a configuration error
+def legacy_assets(supabase, action):
+    assets, errors = resolve_assets(["BTC", "ETH"])
+    if errors:
+        missing = ", ".join(errors)
+        logger.error(f"{missing} not in the asset registry; the legacy endpoints need BTC and ETH.")
+        insert_log(supabase, system="model_service", action=action, code=503)
+        raise HTTPException(status_code=503, detail=f"Not in the asset registry (ASSETS_CONFIG): {missing}")
+    return assets
 
 # Main function to run the regression prediction for both BTC and ETH
-def regression_prediction(supabase=Client):
+async def regression_prediction(supabase=Client):
+    assets = legacy_assets(supabase, "predict_regression")
     try:
         logger.info("Starting regression prediction process for BTC and ETH.")
         
-        # BTC Prediction
-        btc_df = fetch_btc_data()
-        btc_df_processed = preprocess_for_prediction(btc_df)
-        btc_prediction = load_model_and_predict(supabase, btc_df_processed, 'regression_models', 'BTC/btc_br_model.pkl')
-        
-        # ETH Prediction
-        eth_df = fetch_eth_data()
-        eth_df_processed = preprocess_for_prediction(eth_df)
-        eth_prediction = load_model_and_predict(supabase, eth_df_processed, 'regression_models', 'ETH/eth_br_model.pkl')
+        results, errors = await scheduled_or_compute(supabase, assets, "regression")
+        if errors:
+            raise ValueError("; ".join(f"{symbol}: {error}" for symbol, error in errors.items()))
         
         logger.info("Regression prediction completed successfully for both BTC and ETH.")
         insert_log(supabase, system="model_service", action="predict_regression", code=200)
-        return {"Prediction BTC": btc_prediction[0], "Prediction ETH": eth_prediction[0]}
+        return {
+            "Prediction BTC": results["BTC"]["prediction"],
+            "Prediction ETH": results["ETH"]["prediction"],
+            "Model Versions": {"BTC": results["BTC"]["model_version"], "ETH": results["ETH"]["model_version"]}
+        }
 
-    
+    except asyncio.TimeoutError:
+        logger.error(f"Regression prediction timed out after {PREDICTION_TIMEOUT}s")
+        insert_log(supabase, system="model_service", action="predict_regression", code=504)
+        raise HTTPException(status_code=504, detail="Regression prediction timed out")
     except Exception as e:
         logger.error(f"Error in regression prediction: {str(e)}")
         insert_log(supabase, system="model_service", action="predict_regression", code=500)
         return {"Error": str(e)}
-    
-def time_series_prediction(supabase):
-    logger = logging.getLogger(__name__)
+
+# Runs the forecast for one asset, reusing the cached result for its latest bar
+async def time_series_asset_prediction(asset, data, entry):
+    key = ("time_series", asset.symbol, data.index[-1], entry.version)
+
+    def compute():
+        if inference_pool.enabled:
+            forecast_df = inference_pool.forecast(asset.symbol, entry, data)
+        else:
+            with stage("forecast", asset.symbol):
+                forecast_df = FORECASTERS[entry.spec.kind](entry, data, asset.symbol)
+        # Kept as series over the longest horizon; responses slice the horizon and intervals they need
+        return {
+            "historical": data['Close'].copy(),
+            "forecast": forecast_df['Forecast'],
+            "bands": forecast_df.drop(columns='Forecast'),
+            "model_version": entry.version
+        }
+
+    return await prediction_cache.get_or_compute_async(key, compute)
+
+# Runs the forecasts for a batch of assets concurrently; returns (results, errors) keyed by symbol
+async def time_series_predictions(supabase, assets):
+    with stage("market_data"):
+        windows = await run_blocking(fetch_history, [asset.ticker for asset in assets])
+    with stage("model_load"):
+        entries = await run_blocking(resolve_models, supabase, assets, "time_series")
+
+    errors, ready = {}, []
+    for asset in assets:
+        data, entry = windows.get(asset.ticker), entries[asset.symbol]
+        if isinstance(entry, Exception):
+            errors[asset.symbol] = str(entry)
+        elif data is None or data.empty:
+            errors[asset.symbol] = f"No data fetched for {asset.symbol}"
+        else:
+            ready.append((asset, data, entry))
+
+    outcomes = await asyncio.gather(*[time_series_asset_prediction(*job) for job in ready], return_exceptions=True)
+    results = {}
+    for (asset, _, _), outcome in zip(ready, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error forecasting {asset.symbol}: {str(outcome)}")
+            errors[asset.symbol] = str(outcome)
+        else:
+            results[asset.symbol] = outcome
+    return results, errors
+
+async def time_series_prediction(supabase):
     logger.info("Starting time series prediction process for BTC and ETH")
+    assets = legacy_assets(supabase, "predict_time_series")
 
     try:
-        # Model paths and download
-        bucket_name = 'time_series_models'
-        btc_model_path = 'BTC/btc_sarima_model.pkl.gz'
-        eth_model_path = 'ETH/eth_prophet_model.pkl'
-
-        # Fetch historical data
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
-        btc_data = yf.download('BTC-USD', start=start_date, end=end_date, interval='1d')
-        eth_data = yf.download('ETH-USD', start=start_date, end=end_date, interval='1d')
-
-        btc_data['Close_log'] = np.log(btc_data['Close'])
-
-        # Load BTC SARIMA model
-        btc_model_file_path = download_model_from_supabase(supabase, bucket_name, btc_model_path)
-        with gzip.open(btc_model_file_path, 'rb') as f:
-            btc_model = SARIMAXResults.load(f)
-            # Assuming btc_data['Close_log'] is your endogenous variable:
-            # btc_model.model.endog = btc_data['Close_log'].values
-            # btc_model.model.nobs = len(btc_data['Close_log'])
-            # btc_model.model.k_endog = 1  # if it's univariate
-
-        # Load ETH Prophet model
-        eth_model_file_path = download_model_from_supabase(supabase, bucket_name, eth_model_path)
-        with open(eth_model_file_path, 'rb') as f:
-            eth_model = pickle.load(f)
-
-        # Make BTC forecast
-        btc_forecast_log = btc_model.get_forecast(steps=90)
-        btc_forecast = np.exp(btc_forecast_log.predicted_mean)
-
-        btc_forecast_dates = pd.date_range(start=btc_data.index[-1] + timedelta(days=1), periods=90, freq='D')
-        btc_forecast_df = pd.DataFrame({'Forecast': btc_forecast}, index=btc_forecast_dates)
-        btc_forecast_df = btc_forecast_df.fillna(0)
-
-        # Make ETH forecast
-        eth_future_dates = pd.DataFrame({'ds': pd.date_range(start=eth_data.index[-1] + timedelta(days=1), periods=90, freq='D')})
-        eth_forecast = eth_model.predict(eth_future_dates)
-        eth_forecast.set_index('ds', inplace=True)
-        eth_forecast.rename(columns={'yhat': 'Forecast'}, inplace=True)
-
-        # Serialize results
-        result = {
-            "BTC": {
-                "historical": btc_data['Close'].to_dict(),
-                "forecast": btc_forecast_df['Forecast'].apply(float).to_dict()
-            },
-            "ETH": {
-                "historical": eth_data['Close'].to_dict(),
-                "forecast": eth_forecast['Forecast'].apply(float).to_dict()
-            }
-        }
+        results, errors = await scheduled_or_compute(supabase, assets, "time_series")
+        if errors:
+            raise ValueError("; ".join(f"{symbol}: {error}" for symbol, error in errors.items()))
         logger.info("Time series prediction completed successfully for both BTC and ETH")
         insert_log(supabase, system="model_service", action="predict_time_series", code=200)
-        return result
+        return {"BTC": results["BTC"], "ETH": results["ETH"]}
 
+    except asyncio.TimeoutError:
+        logger.error(f"Time series prediction timed out after {PREDICTION_TIMEOUT}s")
+        insert_log(supabase, system="model_service", action="predict_time_series", code=504)
+        raise HTTPException(status_code=504, detail="Time series prediction timed out")
     except Exception as e:
         logger.error(f"Error in time series prediction: {str(e)}")
         insert_log(supabase, system="model_service", action="predict_time_series", code=500)
-        raise Exception(f"Failed to make time series prediction: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to make time series prediction: {str(e)}")
+
+# Generic multi-asset prediction; per-asset failures are reported without failing the batch
+async def multi_asset_prediction(supabase, names, family, horizon=FORECAST_STEPS, levels=()):
+    assets, errors = resolve_assets(names)
+    try:
+        results, asset_errors = await scheduled_or_compute(supabase, assets, family)
+    except asyncio.TimeoutError:
+        logger.error(f"Multi-asset {family} prediction timed out after {PREDICTION_TIMEOUT}s")
+        insert_log(supabase, system="model_service", action=f"predict_{family}", code=504)
+        raise HTTPException(status_code=504, detail=f"{family} prediction timed out")
+    errors.update(asset_errors)
+    if family == "time_series":
+        results = {symbol: legacy_series(slice_forecast(result, horizon, levels)) for symbol, result in results.items()}
+
+    code = 200 if not errors else (500 if not results else 207)
+    insert_log(supabase, system="model_service", action=f"predict_{family}", code=code)
+    return {"results": results, "errors": errors}
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from services.encoding import columnar_series
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_SCHEDULE_INTERVAL = int(os.getenv("PREDICTION_SCHEDULE_INTERVAL", "600"))  # seconds, 0 disables
+PREDICTION_ARCHIVE_TABLE = os.getenv("PREDICTION_ARCHIVE_TABLE", "predictions")
+ARCHIVE_COLUMNS = "asset, family, bar_date, model_version, created_at, prediction, forecast"
+
+
+class PredictionStore:
+    """
+    Latest scheduled result per model family and asset.
+
+    The scheduler refreshes every record each interval; a record is served while
+    it has been refreshed within two intervals, was produced by the model
+    version currently loaded and is for the newest bar the pipeline would read
+    now. A stalled scheduler, a hot-swapped model or a new daily bar (stored
+    or not yet downloaded) sends requests back to the on-demand pipeline.
+    """
+
+    def __init__(self, interval=PREDICTION_SCHEDULE_INTERVAL):
+        self.interval = interval
+        self._records = {}
+        self._lock = threading.Lock()
+        self.last_run = None
+
+    def put(self, family, symbol, bar_date, model_version, result):
+        """Stores a result; returns True when it is new (another bar or model version than the stored one)."""
+        with self._lock:
+            previous = self._records.get((family, symbol))
+            self._records[(family, symbol)] = {
+                "bar_date": bar_date,
+                "model_version": model_version,
+                "result": result,
+                "refreshed": time.monotonic(),
+            }
+        return previous is None or (previous["bar_date"], previous["model_version"]) != (bar_date, model_version)
+
+    def current(self, family, assets, registry, expected_bar=None):
+        """
+        Returns {symbol: result} when every asset has a servable record, otherwise
+        None. expected_bar (YYYY-MM-DD) is the newest bar the on-demand pipeline
+        would use; records for an older bar are not served.
+        """
+        if self.interval <= 0:
+            return None
+        results = {}
+        now = time.monotonic()
+        for asset in assets:
+            record = self._records.get((family, asset.symbol))
+            spec = getattr(asset, family)
+            if record is None or spec is None or now - record["refreshed"] > 2 * self.interval:
+                return None
+            if expected_bar is not None and record["bar_date"] < expected_bar:
+                return None
+            entry = registry.peek(spec.bucket, spec.path)
+            if entry is None or entry.version != record["model_version"]:
+                return None
+            results[asset.symbol] = record["result"]
+        return results
+
+    def describe(self):
+        now = time.monotonic()
+        return {
+            "interval": self.interval,
+            "last_run": self.last_run,
+            "records": [
+                {"family": family, "asset": symbol, "bar_date": record["bar_date"],
+                 "model_version": record["model_version"], "age_seconds": round(now - record["refreshed"], 1)}
+                for (family, symbol), record in sorted(self._records.items())
+            ],
+        }
+
+
+prediction_store = PredictionStore()
+
+
+def archive_row(family, symbol, bar_date, model_version, result):
+    row = {
+        "asset": symbol,
+        "family": family,
+        "bar_date": bar_date,
+        "model_version": model_version,
+        "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "prediction": None,
+        "forecast": None,
+    }
+    if family == "regression":
+        row["prediction"] = result["prediction"]
+    else:
+        forecast = columnar_series(result["forecast"])
+        values = np.asarray(forecast["values"], dtype=float)
+        row["forecast"] = {
+            "start_day": forecast["start_day"],
+            "values": [None if np.isnan(v) else float(v) for v in values],
+        }
+    return row
+
+
+def archive_predictions(supabase, rows):
+    """Writes archive rows; one row per (asset, family, bar_date, model_version), so reruns and replicas don't duplicate."""
+    if not rows:
+        return
+    try:
+        supabase.table(PREDICTION_ARCHIVE_TABLE).upsert(
+            rows, on_conflict="asset,family,bar_date,model_version", ignore_duplicates=True).execute()
+        logger.info(f"Archived {len(rows)} prediction(s).")
+    except Exception as e:
+        logger.error(f"Error while archiving predictions: {str(e)}")
+
+
+def get_archived_predictions(supabase, asset=None, family=None, start=None, end=None, limit=1000):
+    """Archived predictions with start <= bar_date < end, oldest first."""
+    query = supabase.table(PREDICTION_ARCHIVE_TABLE).select(ARCHIVE_COLUMNS)
+    if asset is not None:
+        query = query.eq("asset", asset.upper())
+    if family is not None:
+        query = query.eq("family", family)
+    if start is not None:
+        query = query.gte("bar_date", start.strftime('%Y-%m-%d'))
+    if end is not None:
+        query = query.lt("bar_date", end.strftime('%Y-%m-%d'))
+    return query.order("bar_date").limit(limit).execute().data
@@ -0,0 +1,205 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from fastapi import HTTPException
+from services.assets import ASSETS, ModelSpec
+from services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/tmp/farcry_models")
+MODEL_REFRESH_INTERVAL = int(os.getenv("MODEL_REFRESH_INTERVAL", "3600"))  # seconds, 0 disables
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    spec: ModelSpec
+    version: str
+    model: object = field(repr=False)
+    local_path: str
+    stamp: str = None
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    def describe(self):
+        return {
+            "bucket": self.spec.bucket,
+            "path": self.spec.path,
+            "kind": self.spec.kind,
+            "version": self.version,
+            "loaded_at": self.loaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
+def _asset_of(spec):
+    for asset in ASSETS.values():
+        if spec in asset.model_specs():
+            return asset.symbol
+    return None
+
+
+def _load_artifact(kind, local_path):
+    if kind == "pycaret":
+        from pycaret.regression import load_model
+        return load_model(local_path[:-len(".pkl")])  # PyCaret appends .pkl itself
+    if kind == "sarimax":
+        from statsmodels.tsa.statespace.sarimax import SARIMAXResults
+        with gzip.open(local_path, 'rb') as f:
+            return SARIMAXResults.load(f)
+    if kind == "linear":
+        from services.linear import LinearArtifact
+        return LinearArtifact(local_path)
+    if kind in ("prophet", "pickle"):
+        with open(local_path, 'rb') as f:
+            return pickle.load(f)
+    raise ValueError(f"Unknown model kind: {kind}")
+
+
+class ModelRegistry:
+    """
+    Keeps every model artifact deserialized in memory, keyed by bucket and path.
+
+    Entries are immutable snapshots: a refresh builds a new LoadedModel and swaps
+    it in with a single dict assignment, so requests holding the previous entry
+    finish on the model they started with.
+    """
+
+    def __init__(self, specs=None):
+        self._specs = {(s.bucket, s.path): s for s in (specs or [])}
+        self._entries = {}
+        self._swap_lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._swap_lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _remote_stamp(self, supabase, spec):
+        folder, _, name = spec.path.rpartition("/")
+        try:
+            for item in supabase.storage.from_(spec.bucket).list(folder):
+                if item.get("name") == name:
+                    metadata = item.get("metadata") or {}
+                    return metadata.get("eTag") or item.get("updated_at")
+        except Exception as e:
+            logger.warning(f"Could not stat {spec.bucket}/{spec.path}: {str(e)}")
+        return None
+
+    def _download_and_load(self, supabase, spec, stamp=None):
+        logger.info(f"Downloading model from Supabase bucket: {spec.bucket}, path: {spec.path}")
+        try:
+            with stage("model_download", _asset_of(spec)):
+                payload = supabase.storage.from_(spec.bucket).download(spec.path)
+        except Exception as e:
+            logger.error(f"Error downloading model from Supabase: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to download model from Supabase: {str(e)}")
+
+        version = hashlib.sha256(payload).hexdigest()[:12]
+        if spec.version is not None and spec.version != version:
+            logger.warning(f"{spec.bucket}/{spec.path} is version {version}, but the manifest expects {spec.version}.")
+        current = self._entries.get((spec.bucket, spec.path))
+        if current is not None and current.version == version:
+            return current, False
+
+        # One file per content hash, so a new version never overwrites a file in use
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        local_path = os.path.join(MODEL_CACHE_DIR, f"{version}_{os.path.basename(spec.path)}")
+        if not os.path.exists(local_path):
+            with open(local_path, "wb") as f:
+                f.write(payload)
+
+        with stage("model_deserialize", _asset_of(spec)):
+            model = _load_artifact(spec.kind, local_path)
+        logger.info(f"Model {spec.path} loaded, version {version}.")
+        return LoadedModel(spec=spec, version=version, model=model, local_path=local_path, stamp=stamp), True
+
+    def get(self, supabase, bucket, path):
+        """Returns the current entry for an artifact, downloading and loading it on first use."""
+        key = (bucket, path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        spec = self._specs.get(key)
+        if spec is None:
+            raise KeyError(f"Model {bucket}/{path} is not registered")
+
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None:
+                entry, _ = self._download_and_load(supabase, spec, self._remote_stamp(supabase, spec))
+                with self._swap_lock:
+                    self._entries[key] = entry
+        return entry
+
+    def peek(self, bucket, path):
+        """Returns the loaded entry for an artifact, or None, without loading anything."""
+        return self._entries.get((bucket, path))
+
+    def warm(self, supabase):
+        """Loads every registered artifact; returns {(bucket, path): (seconds, loaded)}."""
+        timings = {}
+        for key in list(self._specs):
+            started = time.perf_counter()
+            loaded = True
+            try:
+                self.get(supabase, *key)
+            except Exception as e:
+                logger.error(f"Warm load failed for {key[0]}/{key[1]}: {str(e)}")
+                loaded = False
+            timings[key] = (time.perf_counter() - started, loaded)
+        return timings
+
+    def spec(self, bucket, path):
+        return self._specs.get((bucket, path))
+
+    def refresh(self, supabase, force=False):
+        """
+        Rechecks storage for every registered artifact and swaps in changed ones.
+        Returns the list of artifacts whose version changed.
+        """
+        changed = []
+        for key, spec in list(self._specs.items()):
+            with self._key_lock(key):
+                current = self._entries.get(key)
+                stamp = self._remote_stamp(supabase, spec)
+                if not force and current is not None and stamp is not None and stamp == current.stamp:
+                    continue
+                try:
+                    entry, is_new = self._download_and_load(supabase, spec, stamp)
+                except Exception as e:
+                    logger.error(f"Refresh failed for {spec.bucket}/{spec.path}, keeping current version: {str(e)}")
+                    continue
+                if not is_new:
+                    entry = LoadedModel(spec=spec, version=entry.version, model=entry.model,
+                                        local_path=entry.local_path, stamp=stamp, loaded_at=entry.loaded_at)
+                with self._swap_lock:
+                    self._entries[key] = entry
+                if is_new:
+                    changed.append(entry.describe())
+        if changed:
+            logger.info(f"Swapped in {len(changed)} new model version(s).")
+        return changed
+
+    def describe(self):
+        return [entry.describe() for entry in self._entries.values()]
+
+
+# Every artifact referenced by the asset registry
+model_registry = ModelRegistry([spec for asset in ASSETS.values() for spec in asset.model_specs()])
+
+
+async def run_refresh_loop(registry, supabase, interval=MODEL_REFRESH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.refresh, supabase)
+        except Exception as e:
+            logger.error(f"Periodic model refresh failed: {str(e)}")
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from services.assets import ASSETS
+from services.executor import PREDICTION_TIMEOUT
+from services.model import regression_predictions, time_series_predictions
+from services.predictions import (PREDICTION_SCHEDULE_INTERVAL, archive_predictions, archive_row,
+                                  prediction_store)
+
+logger = logging.getLogger(__name__)
+
+PIPELINES = (("regression", regression_predictions), ("time_series", time_series_predictions))
+
+
+def _bar_date(family, result):
+    if family == "regression":
+        return result["bar_date"]
+    return result["historical"].index[-1].strftime('%Y-%m-%d')
+
+
+async def run_scheduled_predictions(supabase, store=prediction_store):
+    """
+    Runs every pipeline for every registered asset and refreshes the store.
+    Until a new bar or model version shows up this is all cache hits; results
+    for a new (bar date, model version) are added to the archive.
+    """
+    rows = []
+    for family, predictions in PIPELINES:
+        assets = [asset for asset in ASSETS.values() if getattr(asset, family) is not None]
+        if not assets:
+            continue
+        try:
+            results, errors = await asyncio.wait_for(predictions(supabase, assets), timeout=PREDICTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Scheduled {family} predictions timed out after {PREDICTION_TIMEOUT}s")
+            continue
+        for symbol, error in errors.items():
+            logger.warning(f"Scheduled {family} prediction for {symbol} failed: {error}")
+        for symbol, result in results.items():
+            bar_date = _bar_date(family, result)
+            if store.put(family, symbol, bar_date, result["model_version"], result):
+                logger.info(f"New {family} prediction for {symbol}: bar {bar_date}, model {result['model_version']}.")
+                rows.append(archive_row(family, symbol, bar_date, result["model_version"], result))
+
+    store.last_run = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    await asyncio.to_thread(archive_predictions, supabase, rows)
+    return rows
+
+
+async def run_prediction_scheduler(supabase, interval=PREDICTION_SCHEDULE_INTERVAL):
+    while True:
+        try:
+            await run_scheduled_predictions(supabase)
+        except Exception as e:
+            logger.error(f"Scheduled prediction run failed: {str(e)}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from services.assets import ASSETS
+from services.inference import inference_pool
+from services.model import regression_predictions, time_series_predictions
+from services.registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+PREWARM = os.getenv("PREWARM", "true").lower() == "true"
+
+
+class StartupReport:
+    """
+    Timeline of the backend start, from the first import of main.py to the end
+    of the pre-warm phase. The process serves / as soon as the app is built;
+    it only reports ready once pre-warm has finished.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self.ready = False
+        self.ready_after = None
+
+    def record(self, name, seconds, ok=True):
+        self.stages.append({"stage": name, "seconds": round(seconds, 3), "ok": ok})
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - started, ok)
+
+    def mark_ready(self):
+        self.ready = True
+        self.ready_after = round(time.perf_counter() - self.started, 3)
+        breakdown = ", ".join(f"{s['stage']}={s['seconds']}s" + ("" if s["ok"] else " (failed)") for s in self.stages)
+        logger.info(f"Backend ready after {self.ready_after}s: {breakdown}")
+
+    def describe(self):
+        return {"ready": self.ready, "ready_after_seconds": self.ready_after, "stages": self.stages}
+
+
+startup_report = StartupReport()
+
+
+async def prewarm(supabase, report=startup_report):
+    """
+    Loads every model (importing each family's libraries on first use), then
+    runs each prediction pipeline once so market data, indicators, SARIMAX
+    state and the prediction cache are all warm before the first request.
+    Failures are reported but do not block readiness; those paths load lazily.
+    """
+    if PREWARM:
+        timings = await asyncio.to_thread(model_registry.warm, supabase)
+        for (bucket, path), (seconds, loaded) in timings.items():
+            kind = model_registry.spec(bucket, path).kind
+            report.record(f"load {kind} {bucket}/{path}", seconds, loaded)
+
+        if inference_pool.enabled:
+            # Workers start on the artifacts just downloaded, so each loads its models from local files
+            try:
+                with report.stage("inference workers"):
+                    await asyncio.to_thread(inference_pool.start)
+            except Exception as e:
+                logger.error(f"Starting inference workers failed: {str(e)}")
+
+        for family, predictions in (("regression", regression_predictions), ("time_series", time_series_predictions)):
+            assets = [asset for asset in ASSETS.values() if getattr(asset, family) is not None]
+            if not assets:
+                continue
+            try:
+                with report.stage(f"warm {family} pipeline"):
+                    _, errors = await predictions(supabase, assets)
+                for symbol, error in errors.items():
+                    logger.warning(f"Pre-warm of {family} for {symbol} failed: {error}")
+            except Exception as e:
+                logger.error(f"Pre-warm of the {family} pipeline failed: {str(e)}")
+
+    report.mark_ready()
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from prometheus_client import Counter, Gauge
+
+from services.assets import ASSETS
+from services.executor import run_blocking
+from services.features import compute_indicators, entry_feature_columns
+from services.intraday import create_intraday_source
+from services.market_data import market_store
+from services.model import PREDICTION_WINDOW_DAYS, preprocess_for_prediction, resolve_models
+from services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))  # events buffered per subscriber
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "200"))
+
+STREAM_SUBSCRIBERS = Gauge("farcry_stream_subscribers", "Connected stream subscribers", multiprocess_mode="livesum")
+STREAM_DROPPED = Counter("farcry_stream_dropped_total", "Stream events dropped for slow subscribers", ["asset"])
+
+
+class Subscription:
+    """
+    One client's bounded event queue.
+
+    When a client falls behind, the oldest queued events are dropped rather
+    than blocking the publisher or growing without bound; the next event it
+    receives carries the number it missed. Events are full updates, so the
+    latest one is always enough to catch up.
+    """
+
+    def __init__(self, topics, maxsize=STREAM_QUEUE_SIZE):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event):
+        while self.queue.full():
+            lost = self.queue.get_nowait()
+            self.dropped += 1
+            STREAM_DROPPED.labels(lost["asset"]).inc()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if self.dropped:
+            event = dict(event, dropped=self.dropped)
+            self.dropped = 0
+        return event
+
+
+class StreamHub:
+    """Per-asset topics; publishing hands each event to every subscriber of its topic. Runs on the event loop."""
+
+    def __init__(self, max_subscribers=STREAM_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscriptions = set()
+        self._latest = {}
+        self._sequence = 0
+        self._subscribed = None  # asyncio.Event, created on the loop that waits for it
+
+    async def wait_for_subscribers(self):
+        """Returns once at least one client is subscribed."""
+        while not self._subscriptions:
+            if self._subscribed is None:
+                self._subscribed = asyncio.Event()
+            self._subscribed.clear()
+            await self._subscribed.wait()
+
+    def publish(self, topic, event):
+        self._sequence += 1
+        event = dict(event, seq=self._sequence)
+        self._latest[topic] = event
+        for subscription in self._subscriptions:
+            if topic in subscription.topics:
+                subscription.offer(event)
+
+    def subscribe(self, topics):
+        """Registers a subscription that starts with the latest event of each topic; pair with unsubscribe."""
+        if len(self._subscriptions) >= self.max_subscribers:
+            raise OverflowError(f"At most {self.max_subscribers} stream subscribers")
+        subscription = Subscription(set(topics))
+        for topic in topics:
+            if topic in self._latest:
+                subscription.offer(self._latest[topic])
+        self._subscriptions.add(subscription)
+        STREAM_SUBSCRIBERS.set(len(self._subscriptions))
+        if self._subscribed is not None:
+            self._subscribed.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions.discard(subscription)
+        STREAM_SUBSCRIBERS.set(len(self._subscriptions))
+
+    def describe(self):
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self._sequence,
+            "latest": {topic: {"seq": event["seq"], "time": event["bar"]["time"]} for topic, event in self._latest.items()},
+        }
+
+
+stream_hub = StreamHub()
+
+
+class IntradayEngine:
+    """
+    Turns intraday bars into live regression predictions.
+
+    The regression models are trained on daily bars, so each intraday bar
+    updates the current day's partial daily bar (first open, highest high,
+    lowest low, last close, summed volume), which is scored on top of the
+    completed daily bars before it. Those are read once per day, and each bar
+    recomputes features over the same fixed window the daily pipeline uses,
+    so the cost per bar does not grow with the history.
+    """
+
+    def __init__(self, window_days=PREDICTION_WINDOW_DAYS):
+        self.window_days = window_days
+        self._days = {}
+
+    def _partial_day(self, ticker, timestamp, bar):
+        day = timestamp.normalize()
+        state = self._days.get(ticker)
+        if state is None or state["date"] != day:
+            # fetch_recent_data scores the last window_days - 1 daily bars; today's partial bar is the last of them
+            history = market_store.get_window(ticker, day - timedelta(days=self.window_days - 2), day)
+            state = {"date": day, "history": history, "bar": dict(bar)}
+            self._days[ticker] = state
+        else:
+            current = state["bar"]
+            current["high"] = max(current["high"], bar["high"])
+            current["low"] = min(current["low"], bar["low"])
+            current["close"] = bar["close"]
+            current["volume"] += bar["volume"]
+        return state
+
+    def update(self, asset, entry, timestamp, bar):
+        """Blocking: folds one bar into its day and scores the day; returns the event to publish."""
+        state = self._partial_day(asset.ticker, timestamp, bar)
+        day = state["bar"]
+        event = {
+            "asset": asset.symbol,
+            "bar": {"time": timestamp.isoformat(), **bar},
+            "day": {"date": state["date"].strftime('%Y-%m-%d'), **day},
+            "prediction": None,
+            "model_version": None,
+        }
+        if entry is None:
+            return event
+
+        partial = pd.DataFrame([[day["open"], day["high"], day["low"], day["close"], day["volume"]]],
+                               columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+                               index=pd.DatetimeIndex([state["date"]], name='Date'))
+        frame = pd.concat([state["history"][['Open', 'High', 'Low', 'Close', 'Volume']], partial])
+        frame['Adj Close'] = frame['Close']
+        columns = entry_feature_columns(entry)
+        with stage("stream_features", asset.symbol):
+            if columns is None:
+                latest = preprocess_for_prediction(frame).iloc[-1:]
+            else:
+                # Same features as the daily pipeline, without its per-call logging
+                latest = compute_indicators(frame, columns)[columns].iloc[-1:]
+        with stage("stream_inference", asset.symbol):
+            prediction = entry.model.predict(latest.fillna(0))
+        event["prediction"] = float(np.round(prediction[0], 2))
+        event["model_version"] = entry.version
+        return event
+
+
+async def run_intraday_stream(supabase, hub=stream_hub, source=None, engine=None):
+    """
+    Feeds bars from the source through the engine into the hub until the source
+    ends. The source is only pulled while someone is subscribed, so an idle
+    backend neither polls the data provider nor recomputes features; when a
+    client connects, bars that closed in the meantime are caught up.
+    """
+    source = source or create_intraday_source()
+    engine = engine or IntradayEngine()
+    assets = {asset.ticker: asset for asset in ASSETS.values()}
+    bars = source.stream(list(assets))
+    while True:
+        await hub.wait_for_subscribers()
+        # Pulling the next bar only after the previous one is published keeps a fast source from queueing up work
+        try:
+            ticker, timestamp, bar = await bars.__anext__()
+        except StopAsyncIteration:
+            break
+        asset = assets.get(ticker)
+        if asset is None:
+            continue
+        try:
+            entry = None
+            if asset.regression is not None:
+                entry = (await run_blocking(resolve_models, supabase, [asset], "regression"))[asset.symbol]
+                if isinstance(entry, Exception):
+                    logger.warning(f"Streaming {asset.symbol} without predictions: {str(entry)}")
+                    entry = None
+            event = await run_blocking(engine.update, asset, entry, timestamp, bar)
+        except Exception as e:
+            logger.error(f"Error updating {asset.symbol} stream at {timestamp}: {str(e)}")
+            continue
+        hub.publish(asset.symbol, event)
+    logger.info("Intraday source finished.")
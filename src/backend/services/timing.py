@@ -0,0 +1,136 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Histogram, generate_latest, multiprocess
+
+STAGE_SAMPLE_LIMIT = int(os.getenv("STAGE_SAMPLE_LIMIT", "10000"))  # samples kept per endpoint and stage
+# Set (to an empty directory) when uvicorn runs several worker processes, so /metrics covers all of them
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# From sub-millisecond cache hits to multi-second model downloads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "farcry_stage_seconds", "Time spent in one pipeline stage",
+    ["stage", "asset"], buckets=LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram(
+    "farcry_request_seconds", "End-to-end request handling time",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS)
+
+# Stage durations of the request being handled. Work submitted through
+# services.executor copies the context, so stages timed on pool threads land
+# in the same request's dict.
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+# Stages timed in an inference worker process, shipped back to the parent (see collect_stages)
+_collected_stages = contextvars.ContextVar("collected_stages", default=None)
+
+
+class StageRecorder:
+    """Keeps the most recent stage durations per endpoint, for benchmarks and diagnostics."""
+
+    def __init__(self, limit=STAGE_SAMPLE_LIMIT):
+        self._limit = limit
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, timings):
+        with self._lock:
+            for name, seconds in timings.items():
+                self._samples.setdefault((endpoint, name), deque(maxlen=self._limit)).append(seconds)
+
+    def snapshot(self):
+        """Returns {endpoint: {stage: [seconds, ...]}}."""
+        with self._lock:
+            result = {}
+            for (endpoint, name), samples in self._samples.items():
+                result.setdefault(endpoint, {})[name] = list(samples)
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+stage_recorder = StageRecorder()
+
+
+def metrics_payload():
+    """
+    The /metrics exposition. In multiprocess mode every worker writes its samples
+    to PROMETHEUS_MULTIPROC_DIR and they are merged here; otherwise only this
+    process's registry is visible.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+def mark_worker_exit():
+    """Drops this process's live gauges from the shared directory when the worker shuts down."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def begin_request():
+    """Starts collecting stages for the current request; returns (timings, token for end_request)."""
+    timings = {}
+    return timings, _request_timings.set(timings)
+
+
+def end_request(endpoint, method, status, timings, token):
+    _request_timings.reset(token)
+    REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(timings.get("total", 0.0))
+    stage_recorder.add(endpoint, timings)
+
+
+def server_timing(timings):
+    """Formats request stages as a Server-Timing header value (durations in milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def record_stage(name, seconds, asset=None):
+    """Adds a stage timed elsewhere, such as in an inference worker process."""
+    STAGE_SECONDS.labels(name, asset or "all").observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def collect_stages():
+    """Collects the (name, asset, seconds) of every stage timed in the block, for record_stage elsewhere."""
+    collected = []
+    token = _collected_stages.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected_stages.reset(token)
+
+
+@contextmanager
+def stage(name, asset=None):
+    """
+    Times a block into the stage histogram, labelled by asset ("all" for
+    batched work), and adds it to the current request's stages when there is
+    one. Stages repeated within a request (e.g. once per asset) are summed.
+    """
+    timings = _request_timings.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        collected = _collected_stages.get()
+        if collected is not None:
+            # Shipped back and observed by the parent (record_stage); observing here too would count it twice
+            collected.append((name, asset, elapsed))
+        else:
+            STAGE_SECONDS.labels(name, asset or "all").observe(elapsed)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
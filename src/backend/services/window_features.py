@@ -0,0 +1,425 @@
+"""
+Indicator values as the live pipeline sees them, for every day of a history at once.
+
+The live pipeline computes its features over a fixed window of recent bars, so
+the value of a cumulative or recursive indicator (volume_obv, momentum_rsi,
+trend_macd, ...) on a given day depends on where that day's window starts. The
+per-day answer is compute_indicators(bars[t - window + 1:t + 1]).iloc[-1];
+windowed_indicators returns the same rows for every t without a per-day pass:
+
+* indicators whose lookback fits in the window are window-invariant and are
+  computed once over the whole history;
+* the others run on a (days, window) matrix of strided windows, with the same
+  arithmetic as ta, so each recursive step is one vectorized operation across
+  all days instead of one pandas call per day.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.features import INDICATOR_COLUMNS, compute_indicators
+
+# Longest lookback among WINDOW_INVARIANT: momentum_uo reads 28 bars plus the close before them
+MIN_WINDOW_BARS = 29
+
+# Their value on the last bar of any window of at least MIN_WINDOW_BARS bars equals the full-history value
+WINDOW_INVARIANT = {
+    'volume_cmf', 'volume_em', 'volume_sma_em', 'volume_vwap', 'volume_mfi',
+    'volatility_bbm', 'volatility_bbh', 'volatility_bbl', 'volatility_bbw', 'volatility_bbp',
+    'volatility_bbhi', 'volatility_bbli', 'volatility_kcc', 'volatility_kch', 'volatility_kcl',
+    'volatility_kcw', 'volatility_kcp', 'volatility_kchi', 'volatility_kcli', 'volatility_dcl',
+    'volatility_dch', 'volatility_dcm', 'volatility_dcw', 'volatility_dcp', 'volatility_ui',
+    'trend_sma_fast', 'trend_sma_slow', 'trend_vortex_ind_pos', 'trend_vortex_ind_neg',
+    'trend_vortex_ind_diff', 'trend_dpo', 'trend_ichimoku_conv', 'trend_ichimoku_base',
+    'trend_ichimoku_a', 'trend_cci', 'trend_aroon_up', 'trend_aroon_down', 'trend_aroon_ind',
+    'momentum_uo', 'momentum_stoch', 'momentum_stoch_signal', 'momentum_wr', 'momentum_roc',
+    'others_dr', 'others_dlr',
+}
+
+
+# Column-wise equivalents of the pandas operations ta uses, on (days, bars) matrices
+
+def _shift(x, periods, fill_value=np.nan):
+    """Series.shift(periods, fill_value=...) along each row; fill_value may hold one value per row."""
+    out = np.empty_like(x)
+    out[:, :periods] = fill_value if np.ndim(fill_value) == 0 else np.asarray(fill_value)[:, None]
+    out[:, periods:] = x[:, :-periods]
+    return out
+
+
+def _mean(x):
+    # Series.mean: NaNs skipped
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(x, axis=1)
+
+
+def _rolling(x, window, how, min_periods=None):
+    """Series.rolling(window, min_periods).<how>() along each row; like pandas, infs count as missing."""
+    x = np.where(np.isinf(x), np.nan, x)
+    min_periods = window if min_periods is None else min_periods
+    span = min(window, x.shape[1])
+    padded = np.concatenate([np.full((x.shape[0], span - 1), np.nan), x], axis=1)
+    view = sliding_window_view(padded, span, axis=1)
+    count = (~np.isnan(view)).sum(axis=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        value = {"sum": np.nansum, "mean": np.nanmean, "min": np.nanmin, "max": np.nanmax}[how](view, axis=2)
+    return np.where(count >= max(min_periods, 1), value, np.nan)
+
+
+def _ewm(x, alpha, min_periods=0):
+    """Series.ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean() along each row; infs count as missing."""
+    x = np.where(np.isinf(x), np.nan, x)
+    min_periods = max(min_periods, 1)
+    out = np.empty_like(x)
+    weighted = x[:, 0].copy()
+    nobs = (~np.isnan(weighted)).astype(int)
+    old_wt = np.ones(len(x))
+    out[:, 0] = np.where(nobs >= min_periods, weighted, np.nan)
+    for i in range(1, x.shape[1]):
+        current = x[:, i]
+        observed = ~np.isnan(current)
+        nobs += observed
+        started = ~np.isnan(weighted)
+        old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+        update = started & observed
+        # pandas leaves the average untouched when the new value equals it, which keeps flat runs exact
+        weighted = np.where(update & (weighted != current), (old_wt * weighted + alpha * current) / (old_wt + alpha), weighted)
+        old_wt = np.where(update, 1.0, old_wt)
+        weighted = np.where(~started & observed, current, weighted)
+        out[:, i] = np.where(nobs >= min_periods, weighted, np.nan)
+    return out
+
+
+def _ema(x, periods):
+    # ta.utils._ema with fillna=True
+    return _ewm(x, 2 / (periods + 1))
+
+
+def _cumsum(x):
+    # Series.cumsum: NaNs stay NaN and are skipped
+    return np.where(np.isnan(x), np.nan, np.nancumsum(x, axis=1))
+
+
+def _last(x, value=0):
+    """The last column after IndicatorMixin._check_fillna (infs dropped, forward fill, then value; -1 back-fills)."""
+    x = np.where(np.isinf(x), np.nan, x)
+    valid = ~np.isnan(x)
+    last = x[np.arange(len(x)), x.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)]
+    fallback = np.nan if isinstance(value, int) and value == -1 else value
+    return np.where(valid.any(axis=1), last, fallback)
+
+
+def _divide(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / b
+
+
+# Window-dependent indicators, each mirroring its ta class with the parameters in services.features.INDICATORS
+
+def _adi(w):
+    clv = _divide((w.close - w.low) - (w.high - w.close), w.high - w.low)
+    clv = np.where(np.isnan(clv), 0.0, clv)
+    return {'volume_adi': _last(_cumsum(clv * w.volume))}
+
+
+def _obv(w):
+    signed = np.where(w.close < _shift(w.close, 1), -w.volume, w.volume)
+    return {'volume_obv': _last(_cumsum(signed))}
+
+
+def _fi(w):
+    return {'volume_fi': _last(_ema((w.close - _shift(w.close, 1)) * w.volume, 13))}
+
+
+def _vpt(w):
+    return {'volume_vpt': _last(_cumsum((_divide(w.close, _shift(w.close, 1)) - 1) * w.volume))}
+
+
+def _nvi(w):
+    change = _divide(w.close, _shift(w.close, 1)) - 1
+    factor = np.where(_shift(w.volume, 1) > w.volume, 1.0 + change, 1.0)
+    factor[:, 0] = 1000
+    return {'volume_nvi': _last(np.cumprod(factor, axis=1), value=1000)}
+
+
+def _atr(w, window=10):
+    close_shift = _shift(w.close, 1)
+    true_range = np.fmax(np.fmax(w.high - w.low, np.abs(w.high - close_shift)), np.abs(w.low - close_shift))
+    atr = _mean(true_range[:, :window])
+    for i in range(window, w.close.shape[1]):
+        atr = (atr * (window - 1) + true_range[:, i]) / float(window)
+    return {'volatility_atr': _last(atr[:, None])}
+
+
+def _macd(w):
+    macd = _ema(w.close, 12) - _ema(w.close, 26)
+    signal = _ema(macd, 9)
+    return {'trend_macd': _last(macd), 'trend_macd_signal': _last(signal), 'trend_macd_diff': _last(macd - signal)}
+
+
+def _ema_fast(w):
+    return {'trend_ema_fast': _ema(w.close, 12)[:, -1]}
+
+
+def _ema_slow(w):
+    return {'trend_ema_slow': _ema(w.close, 26)[:, -1]}
+
+
+def _trix(w):
+    ema3 = _ema(_ema(_ema(w.close, 15), 15), 15)
+    previous = _shift(ema3, 1, fill_value=_mean(ema3))
+    return {'trend_trix': _last(_divide(ema3 - previous, previous) * 100)}
+
+
+def _mass_index(w):
+    ema1 = _ema(w.high - w.low, 9)
+    mass = _divide(ema1, _ema(ema1, 9))
+    return {'trend_mass_index': _last(_rolling(mass, 25, "sum", 0))}
+
+
+def _kst(w):
+    mean_close = _mean(w.close)
+    rocma = []
+    for roc, window in ((10, 10), (15, 10), (20, 10), (30, 15)):
+        previous = _shift(w.close, roc, fill_value=mean_close)
+        rocma.append(_rolling(_divide(w.close - previous, previous), window, "mean", 0))
+    kst = 100 * (rocma[0] + 2 * rocma[1] + 3 * rocma[2] + 4 * rocma[3])
+    signal = _rolling(kst, 9, "mean", 0)
+    return {'trend_kst': _last(kst), 'trend_kst_sig': _last(signal), 'trend_kst_diff': _last(kst - signal)}
+
+
+def _ichimoku_b(w):
+    span_b = 0.5 * (_rolling(w.high, 52, "max", 0) + _rolling(w.low, 52, "min", 0))
+    return {'trend_ichimoku_b': _last(span_b, value=-1)}
+
+
+def _visual_ichimoku(w):
+    conversion = 0.5 * (_rolling(w.high, 9, "max", 0) + _rolling(w.low, 9, "min", 0))
+    base = 0.5 * (_rolling(w.high, 26, "max", 0) + _rolling(w.low, 26, "min", 0))
+    span_a = 0.5 * (conversion + base)
+    span_b = 0.5 * (_rolling(w.high, 52, "max", 0) + _rolling(w.low, 52, "min", 0))
+    return {'trend_visual_ichimoku_a': _last(_shift(span_a, 26, fill_value=_mean(span_a)), value=-1),
+            'trend_visual_ichimoku_b': _last(_shift(span_b, 26, fill_value=_mean(span_b)), value=-1)}
+
+
+def _stc(w, cycle=10):
+    macd = _ema(w.close, 23) - _ema(w.close, 50)
+    low, high = _rolling(macd, cycle, "min"), _rolling(macd, cycle, "max")
+    stoch_d = _ema(_divide(100 * (macd - low), high - low), 3)
+    low, high = _rolling(stoch_d, cycle, "min"), _rolling(stoch_d, cycle, "max")
+    return {'trend_stc': _last(_ema(_divide(100 * (stoch_d - low), high - low), 3))}
+
+
+def _adx(w, window=14):
+    # ADXIndicator smooths over the first window - 1 bars of its own output and leaves its last
+    # smoothed value at zero; the loops below keep both quirks
+    close_shift = _shift(w.close, 1)
+    directional = np.maximum(w.high, close_shift) - np.minimum(w.low, close_shift)
+    diff_up = w.high - _shift(w.high, 1)
+    diff_down = _shift(w.low, 1) - w.low
+    pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    count = w.close.shape[1] - (window - 1)
+    smoothed = []
+    for series in (directional, pos, neg):
+        values = np.zeros((len(series), count))
+        values[:, 0] = series[:, 1:window + 1].sum(axis=1)  # the first bar is NaN and dropped
+        for i in range(1, count - 1):
+            values[:, i] = values[:, i - 1] - values[:, i - 1] / float(window) + series[:, window + i]
+        smoothed.append(values)
+    trs, dip, din = smoothed
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dip_ratio = np.where(trs != 0, 100 * (dip / trs), 0)
+        din_ratio = np.where(trs != 0, 100 * (din / trs), 0)
+        index = np.where(dip_ratio + din_ratio != 0,
+                         100 * np.abs((dip_ratio - din_ratio) / (dip_ratio + din_ratio)), 0)
+    adx = index[:, :window].mean(axis=1)
+    for i in range(window + 1, count):
+        adx = (adx * (window - 1) + index[:, i - 1]) / float(window)
+    # adx_pos and adx_neg on the last bar come from the second-to-last smoothed value
+    return {'trend_adx': _last(adx[:, None], value=20),
+            'trend_adx_pos': _last(dip_ratio[:, count - 2:count - 1], value=20),
+            'trend_adx_neg': _last(din_ratio[:, count - 2:count - 1], value=20)}
+
+
+def _psar(w, step=0.02, max_step=0.20):
+    high, low = w.high, w.low
+    rows = len(high)
+    up_trend = np.ones(rows, dtype=bool)
+    acceleration = np.full(rows, step)
+    up_trend_high = high[:, 0].copy()
+    down_trend_low = low[:, 0].copy()
+    psar = w.close.copy()
+    psar_up = np.full_like(psar, np.nan)
+    psar_down = np.full_like(psar, np.nan)
+    for i in range(2, psar.shape[1]):
+        max_high, min_low = high[:, i], low[:, i]
+
+        rising = psar[:, i - 1] + acceleration * (up_trend_high - psar[:, i - 1])
+        up_reversal = min_low < rising
+        up_extends = ~up_reversal & (max_high > up_trend_high)
+        rising = np.where(up_reversal, up_trend_high,
+                          np.where(low[:, i - 2] < rising, low[:, i - 2], np.where(low[:, i - 1] < rising, low[:, i - 1], rising)))
+
+        falling = psar[:, i - 1] - acceleration * (psar[:, i - 1] - down_trend_low)
+        down_reversal = max_high > falling
+        down_extends = ~down_reversal & (min_low < down_trend_low)
+        falling = np.where(down_reversal, down_trend_low,
+                           np.where(high[:, i - 2] > falling, high[:, i - 2], np.where(high[:, i - 1] > falling, high[:, i - 1], falling)))
+
+        reversal = np.where(up_trend, up_reversal, down_reversal)
+        psar[:, i] = np.where(up_trend, rising, falling)
+        new_down_low = np.where(up_trend, np.where(up_reversal, min_low, down_trend_low),
+                                np.where(down_extends, min_low, down_trend_low))
+        up_trend_high = np.where(up_trend, np.where(up_extends, max_high, up_trend_high),
+                                 np.where(down_reversal, max_high, up_trend_high))
+        down_trend_low = new_down_low
+        extends = np.where(up_trend, up_extends, down_extends)
+        acceleration = np.where(reversal, step, np.where(extends, np.minimum(acceleration + step, max_step), acceleration))
+
+        up_trend = up_trend != reversal
+        psar_up[:, i] = np.where(up_trend, psar[:, i], np.nan)
+        psar_down[:, i] = np.where(up_trend, np.nan, psar[:, i])
+
+    def started(series):
+        return (~np.isnan(series[:, -1]) & np.isnan(series[:, -2])).astype(float)
+
+    return {'trend_psar_up': _last(psar_up, value=-1), 'trend_psar_down': _last(psar_down, value=-1),
+            'trend_psar_up_indicator': started(psar_up), 'trend_psar_down_indicator': started(psar_down)}
+
+
+def _rsi_series(close, window=14):
+    diff = close - _shift(close, 1)
+    up = np.where(diff > 0, diff, 0.0)
+    down = -np.where(diff < 0, diff, 0.0)
+    ema_up, ema_down = _ewm(up, 1 / window), _ewm(down, 1 / window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(ema_down == 0, 100, 100 - 100 / (1 + ema_up / ema_down))
+    # RSIIndicator.rsi() fills the whole series before StochRSI reads it
+    rsi = np.where(np.isinf(rsi), np.nan, rsi)
+    return pd.DataFrame(rsi.T).ffill().fillna(50).to_numpy().T
+
+
+def _rsi(w):
+    return {'momentum_rsi': _last(_rsi_series(w.close), value=50)}
+
+
+def _stoch_rsi(w, window=14):
+    rsi = _rsi_series(w.close, window)
+    low = _rolling(rsi, window, "min")
+    stoch = _divide(rsi - low, _rolling(rsi, window, "max") - low)
+    k = _rolling(stoch, 3, "mean")
+    return {'momentum_stoch_rsi': _last(stoch), 'momentum_stoch_rsi_k': _last(k),
+            'momentum_stoch_rsi_d': _last(_rolling(k, 3, "mean"))}
+
+
+def _tsi(w):
+    diff = w.close - _shift(w.close, 1)
+    smoothed = _ema(_ema(diff, 25), 13)
+    smoothed_abs = _ema(_ema(np.abs(diff), 25), 13)
+    return {'momentum_tsi': _last(_divide(smoothed, smoothed_abs) * 100)}
+
+
+def _ao(w):
+    median = 0.5 * (w.high + w.low)
+    return {'momentum_ao': _last(_rolling(median, 5, "mean", 0) - _rolling(median, 34, "mean", 0))}
+
+
+def _oscillator(series, prefix):
+    slow = _ema(series, 26)
+    line = _divide(_ema(series, 12) - slow, slow) * 100
+    signal = _ema(line, 9)
+    return {prefix: _last(line), f'{prefix}_signal': _last(signal), f'{prefix}_hist': _last(line - signal)}
+
+
+def _ppo(w):
+    return _oscillator(w.close, 'momentum_ppo')
+
+
+def _pvo(w):
+    return _oscillator(w.volume, 'momentum_pvo')
+
+
+def _kama(w, window=10, pow1=2, pow2=30):
+    close = w.close
+    # KAMAIndicator uses np.roll, which wraps around the start of its window
+    volatility = np.abs(close - np.roll(close, 1, axis=1))
+    change = np.abs(close - np.roll(close, window, axis=1))
+    noise = _rolling(volatility, window, "sum", 0)
+    efficiency = np.divide(change, noise, out=np.zeros_like(change), where=noise != 0)
+    smoothing = (efficiency * (2.0 / (pow1 + 1) - 2.0 / (pow2 + 1.0)) + 2 / (pow2 + 1.0)) ** 2.0
+    kama = close[:, 0].copy()
+    for i in range(1, close.shape[1]):
+        kama = kama + smoothing[:, i] * (close[:, i] - kama)
+    return {'momentum_kama': _last(kama[:, None], value=close[:, -1])}
+
+
+def _cr(w):
+    return {'others_cr': _last((w.close / w.close[:, :1] - 1) * 100, value=-1)}
+
+
+WINDOWED = [
+    (('volume_adi',), _adi),
+    (('volume_obv',), _obv),
+    (('volume_fi',), _fi),
+    (('volume_vpt',), _vpt),
+    (('volume_nvi',), _nvi),
+    (('volatility_atr',), _atr),
+    (('trend_macd', 'trend_macd_signal', 'trend_macd_diff'), _macd),
+    (('trend_ema_fast',), _ema_fast),
+    (('trend_ema_slow',), _ema_slow),
+    (('trend_trix',), _trix),
+    (('trend_mass_index',), _mass_index),
+    (('trend_kst', 'trend_kst_sig', 'trend_kst_diff'), _kst),
+    (('trend_ichimoku_b',), _ichimoku_b),
+    (('trend_stc',), _stc),
+    (('trend_adx', 'trend_adx_pos', 'trend_adx_neg'), _adx),
+    (('trend_visual_ichimoku_a', 'trend_visual_ichimoku_b'), _visual_ichimoku),
+    (('trend_psar_up', 'trend_psar_down', 'trend_psar_up_indicator', 'trend_psar_down_indicator'), _psar),
+    (('momentum_rsi',), _rsi),
+    (('momentum_stoch_rsi', 'momentum_stoch_rsi_k', 'momentum_stoch_rsi_d'), _stoch_rsi),
+    (('momentum_tsi',), _tsi),
+    (('momentum_ao',), _ao),
+    (('momentum_ppo', 'momentum_ppo_signal', 'momentum_ppo_hist'), _ppo),
+    (('momentum_pvo', 'momentum_pvo_signal', 'momentum_pvo_hist'), _pvo),
+    (('momentum_kama',), _kama),
+    (('others_cr',), _cr),
+]
+
+
+class _Windows:
+    """The OHLCV columns of df as (days, window) matrices; row i holds the bars ending at day window - 1 + i."""
+
+    def __init__(self, df, window):
+        for column in ("Open", "High", "Low", "Close", "Volume"):
+            setattr(self, column.lower(), sliding_window_view(df[column].to_numpy(dtype='float64'), window))
+
+
+def windowed_indicators(df, window, columns=None):
+    """
+    For each bar from the window-th on, the row compute_indicators(df) would end
+    with if df held only the window bars up to it. df must be gap-free (one row
+    per bar, no missing values); the result is indexed by each window's last bar.
+    """
+    if window < MIN_WINDOW_BARS:
+        raise ValueError(f"Windows must hold at least {MIN_WINDOW_BARS} bars")
+    if len(df) < window:
+        raise ValueError("Not enough history for one window")
+    wanted = set(INDICATOR_COLUMNS if columns is None else columns)
+
+    out = compute_indicators(df, [column for column in INDICATOR_COLUMNS if column in wanted & WINDOW_INVARIANT])
+    out = out.iloc[window - 1:].copy()
+    windows = _Windows(df, window)
+    with np.errstate(all="ignore"):
+        for outputs, function in WINDOWED:
+            if wanted.intersection(outputs):
+                for column, values in function(windows).items():
+                    if column in wanted:
+                        out[column] = values
+    return out.reindex(columns=list(df.columns) + [column for column in INDICATOR_COLUMNS if column in wanted])
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def synthetic_ohlcv(days=300, seed=7, end="2024-06-30"):
+    """Random-walk daily bars with the columns the market data store returns, plus Adj Close."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=end, periods=days, freq="D", name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    open_ = close * np.exp(rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, days))
+    volume = rng.uniform(1e6, 5e6, days)
+    df = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+    df["Adj Close"] = df["Close"]
+    return df
+
+
+@pytest.fixture
+def ohlcv():
+    return synthetic_ohlcv()
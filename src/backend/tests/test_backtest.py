@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from services.assets import ModelSpec
+from services.backtest import backtest_asset, serving_features
+from services.model import PREDICTION_WINDOW_DAYS, preprocess_for_prediction
+from services.registry import LoadedModel
+
+COLUMNS = ["Close", "Volume", "volume_obv", "volume_nvi", "trend_kst_sig", "momentum_rsi"]
+
+
+def test_each_day_uses_only_its_serving_window(ohlcv):
+    features = serving_features(ohlcv, COLUMNS)
+
+    # What the live pipeline scores when day is the latest bar of its window
+    for day in features.index[[0, 100, -1]]:
+        window = ohlcv.loc[:day].iloc[-(PREDICTION_WINDOW_DAYS - 1):]
+        live = preprocess_for_prediction(window, COLUMNS)[COLUMNS].iloc[-1]
+        np.testing.assert_allclose(features.loc[day].to_numpy(float), live.to_numpy(float))
+
+
+def test_reports_in_sample_days_from_the_training_end(ohlcv):
+    features = serving_features(ohlcv, COLUMNS)
+    model = LinearRegression().fit(features, ohlcv['Close'].reindex(features.index))
+    trained_until = features.index[50]
+    spec = ModelSpec("regression_models", "BTC/model.pkl", "pickle", features=tuple(COLUMNS),
+                     trained_until=f"{trained_until:%Y-%m-%d}")
+
+    result = backtest_asset(LoadedModel(spec=spec, version="v1", model=model, local_path=None), ohlcv)
+
+    assert result["days"] == len(features) - 1
+    assert result["in_sample_days"] == 51
+    assert result["training_end"] == f"{trained_until:%Y-%m-%d}"
+
+
+def test_in_sample_days_unknown_without_a_training_end(ohlcv):
+    features = serving_features(ohlcv, COLUMNS)
+    model = LinearRegression().fit(features, ohlcv['Close'].reindex(features.index))
+    spec = ModelSpec("regression_models", "BTC/model.pkl", "pickle", features=tuple(COLUMNS))
+
+    result = backtest_asset(LoadedModel(spec=spec, version="v1", model=model, local_path=None), ohlcv)
+
+    assert result["in_sample_days"] is None
+    assert 0 <= result["recommendation_accuracy"] <= 1
+
+
+def test_short_history_is_rejected(ohlcv):
+    with pytest.raises(ValueError):
+        serving_features(ohlcv.iloc[:10], COLUMNS)
+
+
+def test_histories_with_missing_days_use_calendar_windows(ohlcv):
+    history = ohlcv.drop(ohlcv.index[[40, 41, 150]])
+    features = serving_features(history, COLUMNS)
+
+    for day in features.index[[20, 120, -1]]:
+        window = history.loc[day - timedelta(days=PREDICTION_WINDOW_DAYS - 2):day]
+        live = preprocess_for_prediction(window, COLUMNS)[COLUMNS].iloc[-1]
+        np.testing.assert_allclose(features.loc[day].to_numpy(float), live.to_numpy(float))
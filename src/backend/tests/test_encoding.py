@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, Header
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+
+from services.encoding import etag_matches, series_etag, series_response
+
+
+def forecast_results():
+    history = pd.Series(np.linspace(100, 200, 400), index=pd.date_range("2023-01-01", periods=400, freq="D"))
+    forecast = pd.Series(np.linspace(200, 210, 90), index=pd.date_range(history.index[-1] + pd.Timedelta(days=1), periods=90))
+    return {"BTC": {"historical": history, "forecast": forecast, "model_version": "abc123"}}
+
+
+def test_etag_is_weak():
+    assert series_etag(forecast_results(), "json").startswith('W/"')
+
+
+def test_weak_comparison():
+    etag = 'W/"0123"'
+    assert etag_matches(etag, 'W/"0123"')
+    assert etag_matches(etag, '"0123"')
+    assert etag_matches(etag, '"other", W/"0123"')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, '"0124"')
+    assert not etag_matches(etag, None)
+
+
+def test_gzip_and_identity_bodies_revalidate_with_the_same_tag():
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+    @app.get("/series")
+    def series(if_none_match: str = Header(default=None)):
+        return series_response(forecast_results(), "json", if_none_match)
+
+    client = TestClient(app)
+    compressed = client.get("/series", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/series", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["ETag"] == plain.headers["ETag"]
+    assert compressed.headers["ETag"].startswith('W/"')
+
+    revalidated = client.get("/series", headers={"If-None-Match": compressed.headers["ETag"], "Accept-Encoding": "identity"})
+    assert revalidated.status_code == 304
@@ -0,0 +1,38 @@
+from services.features import INDICATOR_COLUMNS, FeatureEngine, compute_indicators, verify_parity
+
+MODEL_COLUMNS = ["Close", "volume_obv", "trend_macd", "momentum_rsi", "volatility_bbw", "others_cr"]
+
+
+def test_every_indicator_matches_add_all_ta_features(ohlcv):
+    assert verify_parity(ohlcv) == []
+
+
+def test_subset_matches_add_all_ta_features(ohlcv):
+    assert verify_parity(ohlcv, MODEL_COLUMNS) == []
+
+
+def test_subset_builds_only_requested_indicators(ohlcv):
+    features = compute_indicators(ohlcv, MODEL_COLUMNS)
+    assert [c for c in features.columns if c in INDICATOR_COLUMNS] == ["volume_obv", "volatility_bbw", "trend_macd",
+                                                                       "momentum_rsi", "others_cr"]
+
+
+def test_engine_reuses_features_for_the_same_bars(ohlcv):
+    engine = FeatureEngine()
+    window = ohlcv.iloc[-30:]
+    first = engine.compute(window, MODEL_COLUMNS, "BTC-USD")
+    assert engine.compute(window.copy(), MODEL_COLUMNS, "BTC-USD") is first
+
+
+def test_engine_recomputes_a_restated_bar_with_the_same_dates(ohlcv):
+    engine = FeatureEngine()
+    window = ohlcv.iloc[-30:].copy()
+    first = engine.compute(window, MODEL_COLUMNS, "BTC-USD")
+
+    restated = window.copy()
+    restated.iloc[-1, restated.columns.get_loc("Close")] *= 1.05
+    second = engine.compute(restated, MODEL_COLUMNS, "BTC-USD")
+
+    assert second is not first
+    assert second["Close"].iloc[-1] == restated["Close"].iloc[-1]
+    assert second["momentum_rsi"].iloc[-1] != first["momentum_rsi"].iloc[-1]
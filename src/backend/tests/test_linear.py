@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import BayesianRidge, Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from services.linear import LinearArtifact, export_linear, extract_linear
+
+
+def training_frame(rows=200, seed=3):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "Close": rng.normal(30000, 5000, rows),
+        "Volume": rng.normal(2e9, 5e8, rows),
+        "momentum_rsi": rng.uniform(0, 100, rows),
+    })
+    y = 0.9 * X["Close"] + 1e-7 * X["Volume"] + 3 * X["momentum_rsi"] + rng.normal(0, 10, rows)
+    return X, y
+
+
+@pytest.mark.parametrize("steps", [
+    [("impute", SimpleImputer()), ("scale", StandardScaler()), ("model", BayesianRidge())],
+    [("impute", SimpleImputer(strategy="median")), ("scale", MinMaxScaler()), ("model", Ridge(alpha=0.5))],
+])
+def test_artifact_matches_pipeline_predict(tmp_path, steps):
+    X, y = training_frame()
+    pipeline = Pipeline(steps).fit(X, y)
+    path = str(tmp_path / "model.arrow")
+
+    export_linear(pipeline, X, path, source_version="abc")
+    artifact = LinearArtifact(path)
+
+    scored = X.copy()
+    scored.iloc[::7, 1] = np.nan  # missing inputs take the imputer's fill value
+    np.testing.assert_allclose(artifact.predict(scored), pipeline.predict(scored), rtol=1e-9, atol=1e-6)
+    assert artifact.source_version == "abc"
+
+
+def test_coefficients_come_from_the_fitted_parameters():
+    X, y = training_frame()
+    pipeline = Pipeline([("scale", StandardScaler()), ("model", Ridge())]).fit(X, y)
+    scaler, ridge = pipeline.named_steps["scale"], pipeline.named_steps["model"]
+
+    coef, intercept = extract_linear(pipeline, list(X.columns))
+
+    np.testing.assert_allclose(coef, ridge.coef_ / scaler.scale_)
+    assert intercept == pytest.approx(ridge.intercept_ - np.sum(ridge.coef_ * scaler.mean_ / scaler.scale_))
+
+
+def test_non_linear_pipeline_is_rejected_without_writing(tmp_path):
+    X, y = training_frame()
+    pipeline = Pipeline([("model", RandomForestRegressor(n_estimators=5, random_state=0))]).fit(X, y)
+    path = tmp_path / "model.arrow"
+
+    with pytest.raises(ValueError):
+        export_linear(pipeline, X, str(path))
+    assert not path.exists()
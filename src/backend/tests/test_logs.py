@@ -0,0 +1,140 @@
+import json
+
+import pytest
+
+from services import logs
+
+
+class FlakyTable:
+    """A logs table whose inserts start failing after a number of successful calls."""
+
+    def __init__(self, fail_after=None):
+        self.rows = []
+        self.fail_after = fail_after
+
+    def insert(self, rows):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        if self.fail_after is not None and self.fail_after <= 0:
+            raise ConnectionError("database unreachable")
+        if self.fail_after is not None:
+            self.fail_after -= 1
+        self.rows.extend(self._pending)
+        return self
+
+
+class FlakySupabase:
+    def __init__(self, table):
+        self._table = table
+
+    def table(self, name):
+        return self._table
+
+
+@pytest.fixture
+def spill_path(tmp_path, monkeypatch):
+    path = tmp_path / "spill.jsonl"
+    monkeypatch.setattr(logs, "LOG_SPILL_PATH", str(path))
+    monkeypatch.setattr(logs, "LOG_BATCH_SIZE", 10)
+    return path
+
+
+def spilled_rows(count):
+    return [{"datetime": "2024-06-01 00:00:00", "system": "test", "action": f"row{i}", "code": 200} for i in range(count)]
+
+
+def test_failed_replay_keeps_only_unwritten_rows(spill_path):
+    table = FlakyTable(fail_after=2)
+    sink = logs.LogSink()
+    sink._supabase = FlakySupabase(table)
+    sink._spill(spilled_rows(35))
+
+    with pytest.raises(ConnectionError):
+        sink._replay_spill()
+
+    # Two chunks made it; the spill file holds exactly the other 15 rows
+    assert len(table.rows) == 20
+    remaining = [json.loads(line) for line in spill_path.read_text().splitlines()]
+    assert [row["action"] for row in remaining] == [f"row{i}" for i in range(20, 35)]
+    assert sink.written == 20 and sink.spilled == 15
+
+    table.fail_after = None
+    sink._replay_spill()
+
+    assert [row["action"] for row in table.rows] == [f"row{i}" for i in range(35)]
+    assert not spill_path.exists()
+    assert sink.written == 35 and sink.spilled == 0
+
+
+def test_flush_replays_spill_before_new_rows(spill_path):
+    table = FlakyTable()
+    sink = logs.LogSink()
+    sink._supabase = FlakySupabase(table)
+    sink._spill(spilled_rows(3))
+
+    sink._flush([{"datetime": "2024-06-01 00:01:00", "system": "test", "action": "new", "code": 200}])
+
+    assert [row["action"] for row in table.rows] == ["row0", "row1", "row2", "new"]
+    assert not spill_path.exists()
+
+
+def write_logs(supabase, count):
+    for i in range(count):
+        code = 500 if i % 4 == 0 else 200
+        supabase.table("logs").insert({"datetime": f"2024-06-01 {i % 3:02d}:{i % 60:02d}:00", "system": "test",
+                                       "action": "predict", "code": code}).execute()
+
+
+def test_summary_is_grouped_by_the_database_function():
+    from scripts.fakes import FakeSupabase
+
+    supabase = FakeSupabase("/nonexistent")
+    write_logs(supabase, 12)
+
+    summary = logs.summarize_logs(supabase, bucket="hour")
+
+    assert summary["truncated"] is False
+    assert [(b["bucket"], b["count"], b["errors"]) for b in summary["buckets"]] == [
+        ("2024-06-01 00:00:00", 4, 1), ("2024-06-01 01:00:00", 4, 1), ("2024-06-01 02:00:00", 4, 1)]
+
+
+def test_summary_scan_without_the_function_is_capped(monkeypatch):
+    from scripts.fakes import FakeSupabase
+
+    supabase = FakeSupabase("/nonexistent")
+    write_logs(supabase, 12)
+    monkeypatch.setattr(logs, "LOG_SUMMARY_FUNCTION", "missing_function")
+    grouped = logs.summarize_logs(supabase, bucket="day")
+    assert grouped == {"buckets": [{"bucket": "2024-06-01 00:00:00", "action": "predict", "count": 12, "errors": 3,
+                                    "error_rate": 0.25}], "truncated": False, "scanned_rows": 12}
+
+    monkeypatch.setattr(logs, "LOG_SUMMARY_MAX_ROWS", 5)
+    capped = logs.summarize_logs(supabase, bucket="day")
+    assert capped["truncated"] is True
+    assert capped["scanned_rows"] == 5
+    assert capped["buckets"][0]["count"] == 5
+
+
+def test_unpaginated_requests_keep_the_bare_list():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from database.supabase import get_supabase_client
+    from routers.logs import router
+    from scripts.fakes import FakeSupabase
+
+    supabase = FakeSupabase("/nonexistent")
+    write_logs(supabase, 120)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_supabase_client] = lambda: supabase
+    client = TestClient(app)
+
+    bare = client.get("/logs/")
+    assert isinstance(bare.json(), list) and len(bare.json()) == 100
+
+    page = client.get("/logs/", params={"limit": 100}).json()
+    assert page["items"] == bare.json()
+    assert page["next_cursor"] == bare.headers["X-Next-Cursor"]
+    assert len(client.get("/logs/", params={"cursor": page["next_cursor"]}).json()["items"]) == 20
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from conftest import synthetic_ohlcv
+from services.market_data import OHLCVStore
+
+
+class FlakySource:
+    """Serves bars until it is told to fail, counting every download attempt."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = 0
+        self.down = False
+
+    def fetch_many(self, tickers, start, end):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("source unavailable")
+        return {ticker: self.bars[(self.bars.index >= start) & (self.bars.index < end)] for ticker in tickers}
+
+
+def test_failed_downloads_back_off_and_serve_stored_bars(tmp_path):
+    today = pd.Timestamp(datetime.now().date())
+    bars = synthetic_ohlcv(days=60, end=today - timedelta(days=1)).drop(columns="Adj Close")
+    source = FlakySource(bars.iloc[:-5])
+    store = OHLCVStore(str(tmp_path), source)
+    start = today - timedelta(days=60)
+
+    stored = store.get_window("BTC-USD", start, today)
+    assert source.calls == 1 and len(stored) == 55
+
+    # The store is 5 bars behind, so the next request after the recheck interval downloads again
+    store._last_checked.clear()
+    source.down = True
+    for _ in range(3):
+        assert len(store.get_window("BTC-USD", start, today)) == 55
+    assert source.calls == 2
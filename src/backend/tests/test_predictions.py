@@ -0,0 +1,33 @@
+from services.assets import Asset, ModelSpec
+from services.predictions import PredictionStore
+
+BTC = Asset(symbol="BTC", ticker="BTC-USD",
+            regression=ModelSpec("regression_models", "BTC/btc_br_model.pkl", "pycaret"), time_series=None)
+
+
+class Entry:
+    version = "v1"
+
+
+class Registry:
+    def peek(self, bucket, path):
+        return Entry()
+
+
+def stored(bar_date, version="v1"):
+    store = PredictionStore(interval=600)
+    store.put("regression", "BTC", bar_date, version, {"prediction": 1.0, "bar_date": bar_date})
+    return store
+
+
+def test_serves_a_record_for_the_expected_bar():
+    assert stored("2024-06-02").current("regression", [BTC], Registry(), "2024-06-02") == {
+        "BTC": {"prediction": 1.0, "bar_date": "2024-06-02"}}
+
+
+def test_falls_through_once_a_newer_bar_is_due():
+    assert stored("2024-06-01").current("regression", [BTC], Registry(), "2024-06-02") is None
+
+
+def test_falls_through_for_another_model_version():
+    assert stored("2024-06-02", version="v0").current("regression", [BTC], Registry(), "2024-06-02") is None
@@ -0,0 +1,132 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from conftest import synthetic_ohlcv
+from services import streaming
+from services.backtest import serving_features
+from services.assets import ModelSpec
+from services.features import compute_indicators
+from services.intraday import ReplaySource
+from services.model import PREDICTION_WINDOW_DAYS
+from services.registry import LoadedModel
+from services.streaming import IntradayEngine, StreamHub, run_intraday_stream
+
+COLUMNS = ["Close", "Volume", "momentum_rsi", "trend_macd"]
+DAY = pd.Timestamp("2024-07-01")
+
+
+class DailyStore:
+    """The completed daily bars IntradayEngine reads once per day."""
+
+    def __init__(self, daily):
+        self.daily = daily
+        self.reads = []
+
+    def get_window(self, ticker, start, end):
+        window = self.daily[(self.daily.index >= start) & (self.daily.index < end)].copy()
+        self.reads.append(window)
+        return window
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    daily = synthetic_ohlcv(end=DAY - pd.Timedelta(days=1))
+    monkeypatch.setattr(streaming, "market_store", DailyStore(daily))
+
+    hours = pd.date_range(DAY, periods=6, freq="1h", name="Date")
+    close = daily["Close"].iloc[-1] * np.exp(np.linspace(0.001, 0.006, len(hours)))
+    bars = pd.DataFrame({"Open": close * 0.999, "High": close * 1.002, "Low": close * 0.997, "Close": close,
+                         "Volume": np.full(len(hours), 1e6)}, index=hours)
+    bars.to_csv(tmp_path / "BTC-USD.csv")
+
+    features = compute_indicators(daily, COLUMNS)[COLUMNS]
+    model = LinearRegression().fit(features, daily["Close"])
+    entry = LoadedModel(spec=ModelSpec("regression_models", "BTC/model.pkl", "pickle", features=tuple(COLUMNS)),
+                        version="v1", model=model, local_path=None)
+    monkeypatch.setattr(streaming, "resolve_models", lambda supabase, assets, family: {a.symbol: entry for a in assets})
+    return ReplaySource(str(tmp_path), delay=0), daily, bars, entry
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_replayed_bars_build_the_partial_day_and_its_prediction(replay):
+    source, daily, bars, entry = replay
+
+    async def run():
+        hub = StreamHub()
+        subscription = hub.subscribe(["BTC"])
+        await run_intraday_stream(None, hub=hub, source=source, engine=IntradayEngine())
+        return drain(subscription)
+
+    events = asyncio.run(run())
+
+    assert [event["bar"]["time"] for event in events] == [t.isoformat() for t in bars.index]
+    assert [event["seq"] for event in events] == sorted(event["seq"] for event in events)
+    last = events[-1]
+    assert last["day"]["date"] == "2024-07-01"
+    assert last["day"]["open"] == pytest.approx(bars["Open"].iloc[0])
+    assert last["day"]["high"] == pytest.approx(bars["High"].max())
+    assert last["day"]["low"] == pytest.approx(bars["Low"].min())
+    assert last["day"]["close"] == pytest.approx(bars["Close"].iloc[-1])
+    assert last["day"]["volume"] == pytest.approx(bars["Volume"].sum())
+
+    # The live prediction scores today's partial bar on the same window the daily pipeline reads
+    partial = pd.DataFrame([[last["day"][k] for k in ("open", "high", "low", "close", "volume")]],
+                           columns=['Open', 'High', 'Low', 'Close', 'Volume'], index=pd.DatetimeIndex([DAY]))
+    frame = pd.concat([daily[['Open', 'High', 'Low', 'Close', 'Volume']], partial])
+    frame["Adj Close"] = frame["Close"]
+    expected = entry.model.predict(serving_features(frame, COLUMNS).iloc[-1:])[0]
+    assert last["prediction"] == pytest.approx(round(expected, 2))
+    # One read per day: the completed bars plus the partial one fill the daily pipeline's window exactly
+    assert [len(window) + 1 for window in streaming.market_store.reads] == [PREDICTION_WINDOW_DAYS - 1]
+    assert last["model_version"] == "v1"
+
+
+def test_source_is_not_pulled_without_subscribers(replay):
+    source, *_ = replay
+    pulled = []
+
+    class CountingSource:
+        async def stream(self, tickers):
+            async for item in source.stream(tickers):
+                pulled.append(item)
+                yield item
+
+    async def run():
+        hub = StreamHub()
+        task = asyncio.ensure_future(run_intraday_stream(None, hub=hub, source=CountingSource(), engine=IntradayEngine()))
+        await asyncio.sleep(0.2)
+        assert pulled == []
+
+        subscription = hub.subscribe(["BTC"])
+        await asyncio.wait_for(task, timeout=10)
+        return drain(subscription)
+
+    assert len(asyncio.run(run())) == 6
+
+
+def test_slow_subscriber_drops_oldest_events(replay):
+    source, *_ = replay
+
+    async def run():
+        hub = StreamHub()
+        subscription = streaming.Subscription({"BTC"}, maxsize=2)
+        hub._subscriptions.add(subscription)
+        await run_intraday_stream(None, hub=hub, source=source, engine=IntradayEngine())
+        first = await subscription.get()
+        second = await subscription.get()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["dropped"] == 4
+    assert "dropped" not in second
+    assert second["seq"] == first["seq"] + 1
@@ -0,0 +1,37 @@
+import importlib
+
+from prometheus_client import REGISTRY
+
+from services import timing
+
+
+def stage_count(name, asset):
+    return REGISTRY.get_sample_value("farcry_stage_seconds_count", {"stage": name, "asset": asset}) or 0
+
+
+def test_stage_collected_for_the_parent_is_not_observed_twice():
+    before = stage_count("test_collected", "BTC")
+    with timing.collect_stages() as collected:
+        with timing.stage("test_collected", "BTC"):
+            pass
+    assert stage_count("test_collected", "BTC") == before
+
+    # What InferencePool does with the stages a worker ships back
+    for name, asset, seconds in collected:
+        timing.record_stage(name, seconds, asset)
+    assert stage_count("test_collected", "BTC") == before + 1
+
+
+def test_multiprocess_metrics_merge_every_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    from prometheus_client import values
+    importlib.reload(values)
+    try:
+        from prometheus_client import CollectorRegistry, Counter
+        counter = Counter("farcry_test_requests", "test", registry=CollectorRegistry())
+        counter.inc(3)
+        monkeypatch.setattr(timing, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        assert b"farcry_test_requests_total 3.0" in timing.metrics_payload()
+    finally:
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR")
+        importlib.reload(values)
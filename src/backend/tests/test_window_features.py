@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.features import INDICATOR_COLUMNS, compute_indicators
+from services.window_features import MIN_WINDOW_BARS, WINDOW_INVARIANT, WINDOWED, windowed_indicators
+
+WINDOW = 29
+
+
+def per_window(df, window):
+    return pd.DataFrame([compute_indicators(df.iloc[i - window + 1:i + 1]).iloc[-1] for i in range(window - 1, len(df))],
+                        index=df.index[window - 1:])
+
+
+def test_every_indicator_has_a_windowed_path():
+    windowed = {column for outputs, _ in WINDOWED for column in outputs}
+    assert not windowed & WINDOW_INVARIANT
+    assert windowed | WINDOW_INVARIANT == set(INDICATOR_COLUMNS)
+
+
+@pytest.mark.parametrize("window", [WINDOW, 40])
+def test_matches_one_indicator_pass_per_window(ohlcv, window):
+    df = ohlcv.iloc[:150].copy()
+    # A flat stretch: zero ranges and unchanged closes hit every division by zero
+    df.iloc[60:75, :5] = df.iloc[60, :5].to_numpy()
+    df.iloc[60:75, df.columns.get_loc("High")] = df.iloc[60:75]["Low"]
+    df["Adj Close"] = df["Close"]
+
+    expected = per_window(df, window)
+    features = windowed_indicators(df, window)
+
+    assert list(features.columns) == list(expected.columns)
+    assert features.index.equals(expected.index)
+    mismatches = [c for c in expected.columns
+                  if not np.allclose(features[c].to_numpy(float), expected[c].to_numpy(float), rtol=1e-9, atol=1e-9, equal_nan=True)]
+    assert mismatches == []
+
+
+def test_only_requested_columns_are_built(ohlcv):
+    features = windowed_indicators(ohlcv, WINDOW, ["volume_obv", "momentum_rsi"])
+    assert [c for c in features.columns if c in INDICATOR_COLUMNS] == ["volume_obv", "momentum_rsi"]
+
+
+def test_short_windows_are_rejected(ohlcv):
+    with pytest.raises(ValueError):
+        windowed_indicators(ohlcv, MIN_WINDOW_BARS - 1)
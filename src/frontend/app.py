@@ -1,17 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.preprocessing import MinMaxScaler
 import warnings
-import os
 import streamlit_shadcn_ui as ui
 import altair as alt
-import locale
-import requests 
-import yfinance as yf
-from datetime import datetime, timedelta
+
+from data import (current_bar, fetch_regression, fetch_time_series, fetch_logs, fetch_logs_summary,
+                  yesterdays_close, load_concurrently, StreamReader, LIVE_REFRESH)
 
 warnings.filterwarnings("ignore")
 
@@ -43,83 +37,50 @@ custom_styles = """
 
 st.markdown(custom_styles, unsafe_allow_html=True)
 
-def get_yesterdays_value(ticker_symbol):
-    """
-    Fetch yesterday's closing price for a given cryptocurrency using yfinance.
-    """
-    today = datetime.now()
-    yesterday = today - timedelta(days=1)
-
-    for attempt in range(3):
-        try:
-            data = yf.download(ticker_symbol, start=(yesterday - timedelta(days=attempt)).strftime('%Y-%m-%d'), end=today.strftime('%Y-%m-%d'))
-
-            if not data.empty:
-                return data['Close'].iloc[-1] 
-
-        except Exception as e:
-            st.error(f"Failed to fetch data for {ticker_symbol}: {e}")
-
-    st.warning(f"Could not fetch data for {ticker_symbol}. Please check the ticker or try again later.")
-    return None
-
-btc_yesterday_value = get_yesterdays_value('BTC-USD')
-eth_yesterday_value = get_yesterdays_value('ETH-USD')
-
-btc_yesterday_formatted = f"${btc_yesterday_value:,.2f}" if btc_yesterday_value else "N/A"
-eth_yesterday_formatted = f"${eth_yesterday_value:,.2f}" if eth_yesterday_value else "N/A"
-
-def fetch_time_series():
-    try:
-        response = requests.get("http://backend:8000/predictTimeSeries")
-        if response.status_code == 200:
-            data = response.json()
-            btc_ts_historical = data.get('BTC', {}).get('historical', {})
-            btc_ts_forecast = data.get('BTC', {}).get('forecast', {})
-            eth_ts_historical = data.get('ETH', {}).get('historical', {})
-            eth_ts_forecast = data.get('ETH', {}).get('forecast', {})
-            return btc_ts_historical, btc_ts_forecast, eth_ts_historical, eth_ts_forecast
-        else:
-            st.error(f"Error fetching prediction: {response.status_code}")
-            return None, None, None, None
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch predictions: {e}")
-        return None, None, None, None
-    
-def fetch_logs():
-    try:
-        response = requests.get("http://backend:8000/logs")
-        if response.status_code == 200:
-            logs = response.json()
-            return logs
-        else:
-            st.error(f"Error fetching logs: {response.status_code}")
-            return []
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch logs: {e}")
-        return []
-
 st.title('Farcry: Cryptocurrency Forecasting Tool')
 
-value = ui.tabs(options=['Dashboard', 'History'], default_value='Dashboard', key="kanaries")
+value = ui.tabs(options=['Dashboard', 'Live', 'History'], default_value='Dashboard', key="kanaries")
 st.header(value)
 
 if value == "Dashboard":
     st.write('Welcome to the Farcry Dashboard. Here you can view the latest predictions and recommendations for Bitcoin (BTC) and Ethereum (ETH)')
 
+    horizon = st.select_slider('Forecast horizon (days)', options=[7, 30, 90, 180], value=90)
+
+    # Predictions and history are requested together; both are memoized until the next daily bar
     with st.spinner('Fetching the latest predictions, please wait...'):
-        prediction_btc = None
-        prediction_eth = None
-        try:
-            response = requests.get("http://backend:8000/predictRegression")
-            if response.status_code == 200:
-                data = response.json()
-                prediction_btc = data.get('Prediction BTC', 0) 
-                prediction_eth = data.get('Prediction ETH', 0)  
-            else:
-                st.error(f"Error fetching prediction: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            st.error(f"Failed to fetch predictions: {e}")
+        bar = current_bar()
+        outcomes = load_concurrently({
+            "regression": (fetch_regression, (bar,)),
+            "time_series": (fetch_time_series, (bar, horizon)),
+        })
+
+    prediction_btc = None
+    prediction_eth = None
+    regression, error = outcomes["regression"]
+    if error is not None:
+        st.error(f"Failed to fetch predictions: {error}")
+    else:
+        prediction_btc = regression.get('Prediction BTC', 0)
+        prediction_eth = regression.get('Prediction ETH', 0)
+
+    series, error = outcomes["time_series"]
+    if error is not None:
+        st.error(f"Failed to fetch historical and forecasted data: {error}")
+        series = {}
+    btc_ts_historical = series.get('BTC', {}).get('historical')
+    btc_ts_forecast = series.get('BTC', {}).get('forecast')
+    btc_ts_intervals = series.get('BTC', {}).get('intervals', {})
+    eth_ts_historical = series.get('ETH', {}).get('historical')
+    eth_ts_forecast = series.get('ETH', {}).get('forecast')
+    eth_ts_intervals = series.get('ETH', {}).get('intervals', {})
+
+    # Yesterday's close comes from the same history the backend forecasts from
+    btc_yesterday_value = yesterdays_close(btc_ts_historical)
+    eth_yesterday_value = yesterdays_close(eth_ts_historical)
+
+    btc_yesterday_formatted = f"${btc_yesterday_value:,.2f}" if btc_yesterday_value else "N/A"
+    eth_yesterday_formatted = f"${eth_yesterday_value:,.2f}" if eth_yesterday_value else "N/A"
 
     prediction_btc_formatted = f"${prediction_btc:,.2f}" if prediction_btc else "N/A"
     prediction_eth_formatted = f"${prediction_eth:,.2f}" if prediction_eth else "N/A"
@@ -130,10 +91,20 @@ if value == "Dashboard":
         else:
             return f'<div class="dont-buy-card"><strong>DON\'T BUY</strong> more {crypto_name}</div>'
 
-    cols = st.columns(2)
+    def interval_bands(intervals):
+        # Wider interval first, so the narrower one is drawn on top of it
+        layers = []
+        for level, opacity in (('95', 0.15), ('80', 0.3)):
+            lower, upper = intervals.get(level, (None, None))
+            if lower is None or upper is None:
+                continue
+            band_df = pd.DataFrame({'Date': lower.index, 'Lower': lower.values, 'Upper': upper.values})
+            layers.append(alt.Chart(band_df).mark_area(opacity=opacity).encode(
+                x='Date:T', y='Lower:Q', y2='Upper:Q', tooltip=[alt.Tooltip('Date:T'), 'Lower:Q', 'Upper:Q']
+            ))
+        return layers
 
-    with st.spinner('Fetching historical and forecasted data, please wait...'):
-        btc_ts_historical, btc_ts_forecast, eth_ts_historical, eth_ts_forecast = fetch_time_series()
+    cols = st.columns(2)
 
     with cols[0]:
         ui.metric_card(
@@ -145,16 +116,16 @@ if value == "Dashboard":
         if prediction_btc and btc_yesterday_value:
             st.markdown(recommendation_card(prediction_btc, btc_yesterday_value, "BTC"), unsafe_allow_html=True)
 
-        if btc_ts_historical and btc_ts_forecast:
+        if btc_ts_historical is not None and btc_ts_forecast is not None:
             forecast_df = pd.DataFrame({
-                'Date': list(btc_ts_forecast.keys())[:-3], 
-                'Value': list(btc_ts_forecast.values())[:-3], 
+                'Date': btc_ts_forecast.index,
+                'Value': btc_ts_forecast.values,
                 'Type': 'Previsão'
             })
 
             historical_df = pd.DataFrame({
-                'Date': list(btc_ts_historical.keys()),
-                'Value': list(btc_ts_historical.values()),
+                'Date': btc_ts_historical.index,
+                'Value': btc_ts_historical.values,
                 'Type': 'Histórico'
             })
             
@@ -164,7 +135,8 @@ if value == "Dashboard":
                 x=alt.X('Date:T', title='Data'),
                 y=alt.Y('Value:Q', title='Valor'),
                 color='Type:N'
-            ).properties(
+            )
+            chart = alt.layer(*interval_bands(btc_ts_intervals), chart).properties(
                 width=600,
                 height=400,
                 title=f'Previsão BTC SARIMA'
@@ -183,16 +155,16 @@ if value == "Dashboard":
         if prediction_eth and eth_yesterday_value:
             st.markdown(recommendation_card(prediction_eth, eth_yesterday_value, "ETH"), unsafe_allow_html=True)
         
-        if eth_ts_historical and eth_ts_forecast:
+        if eth_ts_historical is not None and eth_ts_forecast is not None:
             forecast_df = pd.DataFrame({
-                'Date': list(eth_ts_forecast.keys()),
-                'Value': list(eth_ts_forecast.values()),
+                'Date': eth_ts_forecast.index,
+                'Value': eth_ts_forecast.values,
                 'Type': 'Previsão'
             })
 
             historical_df = pd.DataFrame({
-                'Date': list(eth_ts_historical.keys()),
-                'Value': list(eth_ts_historical.values()),
+                'Date': eth_ts_historical.index,
+                'Value': eth_ts_historical.values,
                 'Type': 'Histórico'
             })
 
@@ -202,7 +174,8 @@ if value == "Dashboard":
                 x=alt.X('Date:T', title='Data'),
                 y=alt.Y('Value:Q', title='Valor'),
                 color='Type:N'
-            ).properties(
+            )
+            chart = alt.layer(*interval_bands(eth_ts_intervals), chart).properties(
                 width=600,
                 height=400,
                 title=f'Previsão ETH Prophet'
@@ -210,10 +183,76 @@ if value == "Dashboard":
 
             st.altair_chart(chart, use_container_width=True)
 
+elif value == "Live":
+    st.write('Intraday bars and the prediction they imply for the day, pushed by the backend as each bar closes')
+
+    # One subscription per browser session, read by a background thread; the
+    # fragment only redraws what has arrived, and a reader that went idle is replaced
+    @st.fragment(run_every=LIVE_REFRESH)
+    def live_panel():
+        reader = st.session_state.get("stream_reader")
+        if reader is None or not reader.alive:
+            reader = st.session_state["stream_reader"] = StreamReader(["BTC", "ETH"])
+        live = reader.snapshot()
+        if reader.error:
+            st.error(f"Live stream unavailable: {reader.error}")
+
+        cols = st.columns(2)
+        for col, symbol in zip(cols, ["BTC", "ETH"]):
+            with col:
+                events = live.get(symbol)
+                if not events:
+                    st.info(f"Waiting for {symbol} intraday bars...")
+                    continue
+                event = events[-1]
+                prediction = event.get("prediction")
+                st.metric(
+                    label=f"{symbol} live prediction ({event['day']['date']})",
+                    value=f"${prediction:,.2f}" if prediction is not None else "N/A",
+                    delta=f"close ${event['bar']['close']:,.2f} at {pd.Timestamp(event['bar']['time']):%H:%M} UTC",
+                    delta_color="off"
+                )
+                bars_df = pd.DataFrame([(e["bar"]["time"], e["bar"]["close"]) for e in events], columns=['Time', 'Close'])
+                st.altair_chart(alt.Chart(bars_df).mark_line().encode(
+                    x=alt.X('Time:T', title='Hora'),
+                    y=alt.Y('Close:Q', title='Valor', scale=alt.Scale(zero=False))
+                ).properties(height=300, title=f'{symbol} intraday'), use_container_width=True)
+
+    live_panel()
+
 elif value == "History":
     st.write('Logs from the system')
 
-    logs = fetch_logs()
+    outcomes = load_concurrently({
+        "summary": (fetch_logs_summary, ("hour",)),
+        "logs": (fetch_logs, (500,)),
+    })
+
+    summary, error = outcomes["summary"]
+    if error is not None:
+        st.error(f"Failed to fetch logs summary: {error}")
+
+    if summary and summary.get("truncated"):
+        st.caption(f"Summary built from the latest {summary['scanned_rows']} requests only.")
+
+    if summary and summary.get("buckets"):
+        summary_df = pd.DataFrame(summary["buckets"])
+
+        chart = alt.Chart(summary_df).mark_bar().encode(
+            x=alt.X('bucket:T', title='Hour'),
+            y=alt.Y('count:Q', title='Requests'),
+            color='action:N',
+            tooltip=['bucket:T', 'action:N', 'count:Q', 'errors:Q', 'error_rate:Q']
+        ).properties(
+            height=300,
+            title='Requests per hour (last 7 days)'
+        )
+
+        st.altair_chart(chart, use_container_width=True)
+
+    logs, error = outcomes["logs"]
+    if error is not None:
+        st.error(f"Failed to fetch logs: {error}")
 
     if logs:
         logs_df = pd.DataFrame(logs)
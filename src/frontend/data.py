@@ -0,0 +1,205 @@
+"""
+Backend calls for the Streamlit app.
+
+Streamlit reruns app.py on every interaction, so every call here is memoized.
+Prediction caches are keyed by the current daily bar (crypto bars close at
+00:00 UTC) and so roll over with it; the TTL only bounds how long a model
+refresh on the backend can take to show up. All requests share one pooled
+HTTP session.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import orjson
+import pandas as pd
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "60"))  # seconds
+PREDICTION_TTL = int(os.getenv("PREDICTION_TTL", "900"))  # seconds
+LOGS_TTL = int(os.getenv("LOGS_TTL", "30"))  # seconds
+STREAM_READ_TIMEOUT = float(os.getenv("STREAM_READ_TIMEOUT", "60"))  # seconds; the backend sends keep-alives every 15
+STREAM_RETRY_SECONDS = float(os.getenv("STREAM_RETRY_SECONDS", "5"))  # wait before reconnecting a dropped stream
+STREAM_IDLE_SECONDS = float(os.getenv("STREAM_IDLE_SECONDS", "60"))  # unsubscribe once the Live tab stops rendering
+LIVE_REFRESH = float(os.getenv("LIVE_REFRESH", "2"))  # seconds between Live tab redraws of the received events
+
+
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def _validators():
+    # Last time-series payload and its ETag, shared by every browser session
+    return {}
+
+
+def current_bar():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def _get(path, **kwargs):
+    response = get_session().get(f"{BACKEND_URL}{path}", timeout=BACKEND_TIMEOUT, **kwargs)
+    if response.status_code not in (200, 304):
+        raise RuntimeError(f"{path} returned {response.status_code}")
+    return response
+
+
+def columnar_to_series(column):
+    # {"start_day": days since 1970-01-01, "values": one value per day}
+    if not column or column.get('start_day') is None:
+        return None
+    dates = pd.date_range(pd.Timestamp(column['start_day'], unit='D'), periods=len(column['values']), freq='D')
+    return pd.Series(column['values'], index=dates, dtype=float)
+
+
+@st.cache_data(ttl=PREDICTION_TTL, show_spinner=False)
+def fetch_regression(bar_date):
+    payload = orjson.loads(_get("/predictRegression").content)
+    # The backend reports failures as a 200 with an "Error" key; raising keeps them out of the cache
+    if "Error" in payload:
+        raise RuntimeError(f"/predictRegression failed: {payload['Error']}")
+    return payload
+
+
+@st.cache_data(ttl=PREDICTION_TTL, show_spinner=False)
+def fetch_time_series(bar_date, horizon=90):
+    # The backend answers 304 while the data is unchanged, so the last payload is reused
+    validators = _validators()
+    key = ("time_series", horizon)
+    cached = validators.get(key)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    response = _get("/predictTimeSeries", params={"format": "columnar", "horizon": horizon, "intervals": "80,95"},
+                    headers=headers)
+    if response.status_code == 304 and cached:
+        data = cached["data"]
+    else:
+        data = orjson.loads(response.content)
+        validators[key] = {"etag": response.headers.get("ETag"), "data": data}
+
+    return {
+        symbol: {
+            "historical": columnar_to_series(series.get("historical")),
+            "forecast": columnar_to_series(series.get("forecast")),
+            "intervals": {
+                level: (columnar_to_series(band.get("lower")), columnar_to_series(band.get("upper")))
+                for level, band in series.get("intervals", {}).items()
+            },
+        }
+        for symbol, series in data.items()
+    }
+
+
+@st.cache_data(ttl=LOGS_TTL, show_spinner=False)
+def fetch_logs(limit=500):
+    return orjson.loads(_get("/logs", params={"limit": limit}).content).get('items', [])
+
+
+@st.cache_data(ttl=LOGS_TTL, show_spinner=False)
+def fetch_logs_summary(bucket="hour"):
+    return orjson.loads(_get("/logs/summary", params={"bucket": bucket}).content)
+
+
+class StreamReader:
+    """
+    One long-lived /stream subscription for a browser session.
+
+    A daemon thread reads the backend's intraday events into a buffer of the
+    last `keep` bars per asset, reconnecting after STREAM_RETRY_SECONDS when the
+    stream drops; the page only renders snapshot(). Every snapshot() marks the
+    reader as watched, and the thread unsubscribes once nobody has looked for
+    STREAM_IDLE_SECONDS (the tab was left or the browser closed), at the latest
+    on the next keep-alive.
+    """
+
+    def __init__(self, assets=("BTC", "ETH"), keep=200):
+        self.assets = list(assets)
+        self.keep = keep
+        self.error = None
+        self._bars = {symbol: {} for symbol in self.assets}
+        self._watched = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="stream-reader", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self):
+        return self._thread.is_alive()
+
+    def _idle(self):
+        return time.monotonic() - self._watched > STREAM_IDLE_SECONDS
+
+    def _add(self, event):
+        with self._lock:
+            # Keyed by bar time: a reconnect starts with the latest event again
+            bars = self._bars.setdefault(event["asset"], {})
+            bars[event["bar"]["time"]] = event
+            for stale in sorted(bars)[:-self.keep]:
+                del bars[stale]
+            self.error = None
+
+    def _run(self):
+        while not self._idle():
+            try:
+                response = get_session().get(f"{BACKEND_URL}/stream", params={"assets": ",".join(self.assets)},
+                                             stream=True, timeout=(BACKEND_TIMEOUT, STREAM_READ_TIMEOUT))
+                with response:
+                    if response.status_code != 200:
+                        raise RuntimeError(f"/stream returned {response.status_code}")
+                    # chunk_size=None hands over each event (and keep-alive) as soon as it arrives
+                    for line in response.iter_lines(chunk_size=None):
+                        if self._idle():
+                            return
+                        if line.startswith(b"data: "):
+                            self._add(orjson.loads(line[len(b"data: "):]))
+            except (OSError, RuntimeError) as e:  # requests' errors are OSErrors
+                self.error = str(e)
+            time.sleep(STREAM_RETRY_SECONDS)
+
+    def snapshot(self):
+        """{symbol: events ordered by bar time}; also tells the reader someone is still watching."""
+        self._watched = time.monotonic()
+        with self._lock:
+            return {symbol: [bars[t] for t in sorted(bars)] for symbol, bars in self._bars.items()}
+
+
+def yesterdays_close(historical):
+    """Last close before today's (still open) bar, taken from the backend's history."""
+    if historical is None:
+        return None
+    closed = historical[historical.index < pd.Timestamp(current_bar())].dropna()
+    return float(closed.iloc[-1]) if not closed.empty else None
+
+
+def load_concurrently(calls):
+    """
+    Runs {name: (function, args)} on worker threads and returns
+    {name: (result, error)}; one failing call does not hide the others.
+    """
+    ctx = get_script_run_ctx()
+
+    def run(function, args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return function(*args)
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = {name: pool.submit(run, function, args) for name, (function, args) in calls.items()}
+
+    outcomes = {}
+    for name, future in futures.items():
+        try:
+            outcomes[name] = (future.result(), None)
+        except Exception as e:
+            outcomes[name] = (None, e)
+    return outcomes